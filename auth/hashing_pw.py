@@ -1,9 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from monitoring import metrics
+import asyncio
+import os
+import threading
+
+# Coste de bcrypt. Los hashes con otro coste se re-calculan al hacer login (verify_and_update)
+BCRYPT_ROUNDS = int(os.getenv("RTR_BCRYPT_ROUNDS", "12"))
+# Hilos dedicados a bcrypt (libera el GIL, así que los hilos aprovechan varios núcleos)
+HASH_WORKERS = int(os.getenv("RTR_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Operaciones admitidas a la vez (en cola + en ejecución); por encima se rechaza con 503
+HASH_MAX_PENDING = int(os.getenv("RTR_HASH_MAX_PENDING", "32"))
+HASH_RETRY_AFTER_SECONDS = 1
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingBusy(Exception):
+    """El pool de hashing está saturado: la petición se rechaza sin esperar"""
+
+
+class HashingPool:
+    """
+    Pool acotado para bcrypt (~100-300 ms de CPU por operación). Así una ráfaga de
+    logins no ocupa el threadpool de la API ni bloquea el event loop: como mucho
+    max_pending operaciones esperan turno y el resto falla rápido con HashingBusy.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _timed(self, fn, *args):
+        with metrics.auth_hash_duration.time(operation=fn.__name__):
+            return fn(*args)
+
+    def _release(self, _future: Future):
+        self._slots.release()
+        metrics.auth_hash_pending.dec()
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            metrics.auth_hash_rejected_total.inc()
+            raise HashingBusy(f"Password hashing pool saturated ({self.max_pending} pending)")
+        metrics.auth_hash_pending.inc()
+        try:
+            future = self._executor.submit(self._timed, fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        """Ejecuta fn en el pool sin bloquear el event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+# Instancia global
+hashing_pool = HashingPool()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(válida, nuevo hash o None). Hay nuevo hash si el almacenado usa otro coste/esquema."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password en el pool acotado. Lanza HashingBusy si está saturado."""
+    return await hashing_pool.run(hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update en el pool acotado. Lanza HashingBusy si está saturado."""
+    return await hashing_pool.run(verify_and_update, plain_password, hashed_password)
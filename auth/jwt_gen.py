@@ -2,7 +2,10 @@ from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from database.cache import TTLCache
+import hashlib
 import logging
+import os
 
 
 logger = logging.getLogger(__name__)
@@ -12,6 +15,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")  # Usa el endpoint de l
 SECRET_KEY = "tu_clave_secreta"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Tokens verificados recientes: evita decodificar y comprobar la firma en cada petición
+TOKEN_CACHE_SIZE = int(os.getenv("RTR_TOKEN_CACHE_SIZE", "1024"))
+
+# Claims por hash del token (no se guarda el token); cada entrada caduca con su 'exp'
+token_cache = TTLCache("jwt_claims", TOKEN_CACHE_SIZE)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -22,11 +30,18 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 def verify_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise Exception("Token inválido o expirado")
+    # Solo se cachean tokens con caducidad (los generados por create_access_token)
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.set(key, payload, expires_at=payload["exp"])
+    return payload
     
 def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
@@ -0,0 +1,128 @@
+"""
+Limitador de intentos de login por usuario y por IP con ventanas deslizantes.
+
+Se comprueba antes de consultar la base de datos y de ejecutar bcrypt, así que
+una ráfaga de credential stuffing se rechaza con 429 sin gastar CPU.
+
+El almacén por defecto vive en memoria (un contador por clave, acotado en
+número de claves). Con varios procesos/nodos se puede sustituir por un backend
+compartido que implemente WindowStore (p.ej. Redis con INCR + EXPIRE sobre las
+dos ventanas): login_throttle.store = MiStore(...).
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+import math
+import os
+import threading
+import time
+
+from monitoring import metrics
+
+LOGIN_WINDOW_SECONDS = float(os.getenv("RTR_LOGIN_WINDOW_SECONDS", "60"))
+# Intentos por ventana. Por usuario se reinicia al acertar la contraseña
+LOGIN_MAX_PER_USERNAME = int(os.getenv("RTR_LOGIN_MAX_PER_USERNAME", "5"))
+LOGIN_MAX_PER_IP = int(os.getenv("RTR_LOGIN_MAX_PER_IP", "20"))
+# Claves recordadas como máximo (se olvidan las menos recientes)
+THROTTLE_MAX_KEYS = 100_000
+
+
+class WindowStore(ABC):
+    """Interfaz del almacén de contadores (ventana deslizante de window segundos)"""
+
+    def __init__(self, window: float):
+        self.window = window
+
+    @abstractmethod
+    def acquire(self, key: str, limit: int, now: float) -> bool:
+        """Cuenta un intento si la clave está por debajo del límite. False = limitada."""
+
+    @abstractmethod
+    def reset(self, key: str):
+        """Olvida los intentos de la clave (p.ej. tras un login correcto)"""
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryWindowStore(WindowStore):
+    """
+    Contador de ventana deslizante aproximado: por clave solo se guardan la
+    ventana fija actual, su contador y el de la anterior, que se pondera por la
+    parte que aún solapa con la ventana deslizante.
+    """
+
+    def __init__(self, window: float, max_keys: int = THROTTLE_MAX_KEYS):
+        super().__init__(window)
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, list]" = OrderedDict()  # clave -> [n.º de ventana, actual, anterior]
+        self._lock = threading.Lock()
+
+    def _estimate(self, entry: list, now: float) -> float:
+        index = int(now // self.window)
+        if entry[0] != index:
+            entry[2] = entry[1] if entry[0] == index - 1 else 0
+            entry[0], entry[1] = index, 0
+        overlap = 1 - (now % self.window) / self.window
+        return entry[2] * overlap + entry[1]
+
+    def acquire(self, key: str, limit: int, now: float) -> bool:
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = self._counters[key] = [int(now // self.window), 0, 0]
+                if len(self._counters) > self.max_keys:
+                    self._counters.popitem(last=False)
+            else:
+                self._counters.move_to_end(key)
+            if self._estimate(entry, now) >= limit:
+                return False
+            entry[1] += 1
+            return True
+
+    def reset(self, key: str):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class LoginThrottle:
+    def __init__(self, store: Optional[WindowStore] = None, max_per_username: int = LOGIN_MAX_PER_USERNAME,
+                 max_per_ip: int = LOGIN_MAX_PER_IP):
+        self.store = store or MemoryWindowStore(LOGIN_WINDOW_SECONDS)
+        self.max_per_username = max_per_username
+        self.max_per_ip = max_per_ip
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return f"user:{username.strip().lower()}"
+
+    def attempt(self, username: str, ip: Optional[str]) -> Optional[int]:
+        """
+        Registra un intento de login. None si se permite; si no, segundos
+        recomendados para Retry-After.
+        """
+        now = time.time()
+        scope = None
+        if ip and not self.store.acquire(f"ip:{ip}", self.max_per_ip, now):
+            scope = "ip"
+        elif not self.store.acquire(self._user_key(username), self.max_per_username, now):
+            scope = "username"
+        if scope is None:
+            metrics.login_attempts_total.inc(result="allowed")
+            return None
+        metrics.login_attempts_total.inc(result="throttled")
+        metrics.login_throttled_total.inc(scope=scope)
+        window = self.store.window
+        return max(1, math.ceil(window - now % window))
+
+    def succeeded(self, username: str):
+        """Login correcto: se olvidan los intentos fallidos del usuario"""
+        self.store.reset(self._user_key(username))
+
+
+# Instancia global
+login_throttle = LoginThrottle()
+metrics.registry.add_collector(lambda: metrics.login_throttle_keys.set(len(login_throttle.store)))
@@ -0,0 +1,132 @@
+"""
+Benchmark de la API (main.py y main_web.py en proceso) sobre una base de datos dada.
+
+    python -m benchmarks.api_bench --database /tmp/rtr_50k.db [--iterations 20]
+                                   [--endpoints search,analytics_categories] [--save]
+                                   [--compare benchmarks/results/api-....json]
+
+Por endpoint informa latencia p50/p95/p99, consultas SQL por petición y
+'vm_kops' por petición: miles de instrucciones de la VM de SQLite ejecutadas
+(contadas con el progress handler), que es el indicador disponible de filas
+recorridas/escaneadas.
+"""
+from pathlib import Path
+from typing import Dict, Any, List, Callable
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.results import save_results, load_results, compare, print_table
+
+LOWER_IS_BETTER = ["p50_ms", "p95_ms", "p99_ms", "queries", "vm_kops"]
+PROGRESS_STEP = 1000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def endpoint_cases(sample: Dict[str, Any]) -> Dict[str, tuple]:
+    """Casos: nombre -> (app, url). `sample` trae datos reales de la base de datos."""
+    category = sample["category"]
+    return {
+        "search": ("api", f"/articles/search?nombre={sample['word']}&limit=100"),
+        "search_rtr_id": ("api", f"/articles/search?rtr_id={sample['rtr_id']}"),
+        "search_history": ("api", f"/articles/search/history?categoria={category}&min_date={sample['recent']}&limit=100"),
+        "all_data": ("api", f"/articles/all_data/{sample['article_id']}"),
+        "articles_all": ("api", "/articles/"),
+        "analytics_categories": ("api", "/analytics/categories"),
+        "analytics_category": ("api", f"/analytics/category/{category}"),
+        "analytics_price_drop": ("api", "/analytics/test/price-drop"),
+        "web_price_drop": ("web", "/price-drop"),
+        "web_product_detail": ("web", f"/products/{sample['rtr_id']}"),
+    }
+
+
+def run(database: Path, iterations: int, endpoints: List[str] | None) -> Dict[str, Dict[str, Any]]:
+    # La URL se lee al importar database.db_session
+    os.environ["RTR_DATABASE_URL"] = f"sqlite:///{database}"
+    from sqlalchemy import event, select, func
+    from fastapi.testclient import TestClient
+    from database.db_session import db_manager
+    from database.db_models import Article, PriceRecord
+    import main
+    import main_web
+
+    counters = {"queries": 0, "vm": 0}
+
+    @event.listens_for(db_manager.engine, "before_cursor_execute")
+    def count_query(*args):
+        counters["queries"] += 1
+
+    @event.listens_for(db_manager.engine, "connect")
+    def track_vm(dbapi_connection, connection_record):
+        def progress():
+            counters["vm"] += 1
+            return 0
+        dbapi_connection.set_progress_handler(progress, PROGRESS_STEP)
+
+    with db_manager.get_session() as session:
+        article = session.execute(select(Article).order_by(Article.id).limit(1)).scalar_one()
+        last_date = session.execute(select(func.max(PriceRecord.record_date))).scalar_one()
+    sample = {
+        "category": article.category,
+        "word": article.name.split()[0],
+        "rtr_id": article.rtr_id,
+        "article_id": article.id,
+        "recent": last_date.isoformat(),
+    }
+
+    clients: Dict[str, TestClient] = {"api": TestClient(main.app), "web": TestClient(main_web.app)}
+    results = {}
+    for name, (app, url) in endpoint_cases(sample).items():
+        if endpoints and name not in endpoints:
+            continue
+        client = clients[app]
+        client.get(url)  # calentamiento
+        latencies, queries, vm, size = [], [], [], 0
+        for _ in range(iterations):
+            counters["queries"] = counters["vm"] = 0
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counters["queries"])
+            vm.append(counters["vm"] * PROGRESS_STEP / 1000)
+            size = len(response.content)
+            if response.status_code >= 400:
+                print(f"{name}: HTTP {response.status_code}", file=sys.stderr)
+        results[name] = {
+            "status": response.status_code,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "queries": statistics.mean(queries),
+            "vm_kops": statistics.mean(vm),
+            "bytes": size,
+        }
+        print(f"{name}: p50 {results[name]['p50_ms']:.1f} ms", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de endpoints de la API sobre una base de datos")
+    parser.add_argument("--database", type=Path, required=True, help="SQLite (p.ej. generado con benchmarks.synthetic_catalogue)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--endpoints", help="Lista separada por comas (por defecto todos)")
+    parser.add_argument("--save", action="store_true", help="Guardar resultados en benchmarks/results")
+    parser.add_argument("--compare", type=Path, help="Resultados previos con los que comparar")
+    args = parser.parse_args()
+
+    results = run(args.database, args.iterations, args.endpoints.split(",") if args.endpoints else None)
+    print_table(results, ["status", "p50_ms", "p95_ms", "p99_ms", "queries", "vm_kops", "bytes"])
+    if args.save:
+        print(f"Saved to {save_results('api', results)}")
+    if args.compare:
+        regressions = compare(results, load_results(args.compare)["results"], LOWER_IS_BETTER, [])
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,146 @@
+"""
+Corpus local de páginas HTML de la tienda para los benchmarks del scraper.
+
+Grabar (requiere red, una vez):
+    python -m benchmarks.fixture_corpus record [--categories N]
+
+Servir el corpus (sustituto local del servidor de la tienda):
+    python -m benchmarks.fixture_corpus serve [--port 8765] [--latency-ms 0]
+
+El corpus es un directorio con un manifest.json {url: archivo} y los HTML
+grabados. Al servirlo, las URLs absolutas del origen grabado se reescriben al
+servidor local para que el scraper siga los enlaces sin salir a internet.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit
+from typing import Dict, Optional
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+
+CORPUS_DIR = Path(__file__).parent / "fixtures" / "html"
+MANIFEST = "manifest.json"
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _key(url: str) -> str:
+    """Clave del manifest: ruta + query, sin origen"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class CorpusRecorder:
+    """Listener de page_parser que guarda cada página descargada en el corpus"""
+
+    def __init__(self, corpus_dir: Path = CORPUS_DIR):
+        self.corpus_dir = corpus_dir
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        self.pages: Dict[str, str] = {}
+        self.origin: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, html: str, elapsed: float):
+        name = hashlib.sha1(_key(url).encode()).hexdigest()[:16] + ".html"
+        (self.corpus_dir / name).write_text(html, encoding="utf-8")
+        with self._lock:
+            self.origin = self.origin or _origin(url)
+            self.pages[_key(url)] = name
+
+    def save_manifest(self, main_url: str):
+        manifest = {"origin": self.origin, "main_url": _key(main_url), "pages": self.pages}
+        (self.corpus_dir / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def record(categories: Optional[int] = None, corpus_dir: Path = CORPUS_DIR) -> Path:
+    """Recorre la tienda real con el scraper y graba todas las páginas descargadas"""
+    from scrap.config.config import main_url
+    from scrap.engine import page_parser
+    from scrap.engine.scraper import ScrapEngine
+    from scrap.web_navigation.web_tree import get_categories_tree
+
+    recorder = CorpusRecorder(corpus_dir)
+    page_parser.add_fetch_listener(recorder)
+    try:
+        engine = ScrapEngine()
+        tree = list(get_categories_tree())
+        for cat, url in tree[:categories] if categories else tree:
+            engine.scrap_category(cat, url)
+    finally:
+        page_parser.remove_fetch_listener(recorder)
+    recorder.save_manifest(main_url)
+    print(f"Recorded {len(recorder.pages)} pages into {corpus_dir}")
+    return corpus_dir
+
+
+def load_manifest(corpus_dir: Path = CORPUS_DIR) -> dict:
+    path = corpus_dir / MANIFEST
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No fixture corpus at {corpus_dir}. Record one with: python -m benchmarks.fixture_corpus record"
+        )
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def make_server(corpus_dir: Path = CORPUS_DIR, port: int = 0, latency_ms: float = 0) -> ThreadingHTTPServer:
+    """Servidor HTTP local que sirve el corpus reescribiendo el origen grabado"""
+    manifest = load_manifest(corpus_dir)
+    origin = manifest["origin"].encode()
+    cache: Dict[str, bytes] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            name = manifest["pages"].get(self.path)
+            if name is None:
+                self.send_error(404)
+                return
+            body = cache.get(name)
+            if body is None:
+                local_origin = f"http://{self.headers.get('Host')}".encode()
+                body = (corpus_dir / name).read_bytes().replace(origin, local_origin)
+                cache[name] = body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def server_main_url(server: ThreadingHTTPServer, corpus_dir: Path = CORPUS_DIR) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{load_manifest(corpus_dir)['main_url']}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corpus HTML local para benchmarks del scraper")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Graba páginas reales de la tienda (requiere red)")
+    rec.add_argument("--categories", type=int, default=None, help="Limitar a las N primeras categorías")
+    srv = sub.add_parser("serve", help="Sirve el corpus en local")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada por petición")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.categories)
+    else:
+        server = make_server(port=args.port, latency_ms=args.latency_ms)
+        print(server_main_url(server), flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            sys.exit(0)
@@ -0,0 +1,78 @@
+"""Persistencia y comparación de resultados de benchmarks."""
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import json
+import platform
+import subprocess
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Variación relativa a partir de la cual se marca una regresión
+REGRESSION_THRESHOLD = 0.10
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def save_results(suite: str, results: Dict[str, Any], directory: Path = RESULTS_DIR) -> Path:
+    """Guarda los resultados como <suite>-<fecha>-<commit>.json"""
+    directory.mkdir(parents=True, exist_ok=True)
+    revision = git_revision()
+    payload = {
+        "suite": suite,
+        "revision": revision,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    path = directory / f"{suite}-{datetime.now():%Y%m%d_%H%M%S}-{revision}.json"
+    path.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            lower_is_better: List[str], higher_is_better: List[str],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compara dos resultados {caso: {métrica: valor}} y devuelve las regresiones
+    que superan el umbral relativo.
+    """
+    regressions = []
+    for case, metrics in current.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric, value in metrics.items():
+            old: Optional[float] = base.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if (metric in lower_is_better and change > threshold) or \
+               (metric in higher_is_better and change < -threshold):
+                regressions.append(f"{case} {metric}: {old:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def print_table(rows: Dict[str, Dict[str, Any]], columns: List[str]):
+    widths = [max(len(c), 10) for c in columns]
+    name_width = max([len("case")] + [len(name) for name in rows])
+    print("case".ljust(name_width), *(c.rjust(w) for c, w in zip(columns, widths)))
+    for name, metrics in rows.items():
+        cells = []
+        for column, width in zip(columns, widths):
+            value = metrics.get(column, "")
+            cells.append((f"{value:.4g}" if isinstance(value, float) else str(value)).rjust(width))
+        print(name.ljust(name_width), *cells)
@@ -0,0 +1,183 @@
+"""
+Benchmark del scraper contra el corpus de fixtures local (sin tocar la tienda).
+
+    python -m benchmarks.scraper_bench [--parsers html.parser,lxml] [--workers 1,4]
+                                       [--latency-ms 20] [--save] [--compare results/x.json]
+
+Para cada combinación parser x concurrencia se lanza un proceso limpio que mide:
+  - crawl:   ScrapEngine.scrap_all_categories contra el servidor local
+             (pages/sec, products/sec, CPU por página, memoria pico)
+  - parse:   BeautifulSoup + ProductsExtractor.parse_products sobre el corpus en disco
+             (CPU de parseo por página)
+  - product: Product.from_url + ArticleCreate (Pydantic) frente a ScrapedRecord.from_card
+             + as_article_dict sobre las tarjetas del corpus (products/sec)
+"""
+from pathlib import Path
+from typing import Dict, Any, List
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixture_corpus import CORPUS_DIR, load_manifest
+from benchmarks.results import save_results, load_results, compare, print_table
+
+LOWER_IS_BETTER = ["wall_s", "cpu_per_page_ms", "parse_cpu_per_page_ms", "peak_rss_mb"]
+HIGHER_IS_BETTER = ["pages_per_s", "products_per_s", "from_url_per_s", "from_card_per_s"]
+
+
+def available_parsers(requested: List[str]) -> List[str]:
+    from bs4 import BeautifulSoup, FeatureNotFound
+    parsers = []
+    for name in requested:
+        try:
+            BeautifulSoup("<p></p>", name)
+            parsers.append(name)
+        except FeatureNotFound:
+            print(f"Parser '{name}' not installed, skipped")
+    return parsers
+
+
+def run_one(main_url: str, parser: str, workers: int, corpus_dir: Path) -> Dict[str, Any]:
+    """Se ejecuta en un proceso hijo: la configuración del scraper se lee al importar"""
+    os.environ["RTR_MAIN_URL"] = main_url
+    os.environ["RTR_HTML_PARSER"] = parser
+    from bs4 import BeautifulSoup
+    from scrap.engine import page_parser
+    from scrap.engine.extractor import ProductsExtractor
+    from scrap.engine.scraper import ScrapEngine
+    from scrap.schemas.schema_product import Product
+    from scrap.schemas.scraped_record import ScrapedRecord
+    from orchestration.utils.pydantic_conversion import product_to_articlecreate
+
+    fetched = {"pages": 0, "bytes": 0, "fetch_s": 0.0}
+
+    def count(url, html, elapsed):
+        fetched["pages"] += 1
+        fetched["bytes"] += len(html)
+        fetched["fetch_s"] += elapsed
+
+    page_parser.add_fetch_listener(count)
+    extractor = ProductsExtractor()
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    # 1. Crawl completo
+    wall, cpu = time.perf_counter(), time.process_time()
+    with quiet:
+        products = ScrapEngine(product_extractor=extractor, max_workers=workers).scrap_all_categories()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    pages = max(fetched["pages"], 1)
+
+    # 2. Parseo offline del corpus
+    manifest = load_manifest(corpus_dir)
+    htmls = [(corpus_dir / name).read_text(encoding="utf-8") for name in manifest["pages"].values()]
+    parse_cpu = time.process_time()
+    cards = []
+    with quiet:
+        for html in htmls:
+            soup = BeautifulSoup(html, parser)
+            cards.extend(extractor.parse_products(soup, "bench"))
+    parse_cpu = time.process_time() - parse_cpu
+
+    # 3. Validación por tarjeta hasta la fila de base de datos: Pydantic frente a ScrapedRecord
+    rounds = max(1, 20000 // max(len(cards), 1))
+    from_url = time.perf_counter()
+    for _ in range(rounds):
+        for p in cards:
+            product_to_articlecreate(Product.from_url(
+                url=p.url, category=p.category, name=p.name, price=p.price,
+                image_url=p.image_url, scraped_date=p.scraped_date)).model_dump()
+    from_url = time.perf_counter() - from_url
+    from_card = time.perf_counter()
+    for _ in range(rounds):
+        for p in cards:
+            ScrapedRecord.from_card(url=p.url, category=p.category, name=p.name, price=p.price,
+                                    image_url=p.image_url, scraped_date=p.scraped_date).as_article_dict()
+    from_card = time.perf_counter() - from_card
+
+    return {
+        "pages": fetched["pages"],
+        "products": len(products),
+        "wall_s": wall,
+        "pages_per_s": fetched["pages"] / wall if wall else 0,
+        "products_per_s": len(products) / wall if wall else 0,
+        "cpu_per_page_ms": cpu / pages * 1000,
+        "fetch_mb": fetched["bytes"] / 1e6,
+        "parse_cpu_per_page_ms": parse_cpu / max(len(htmls), 1) * 1000,
+        "from_url_per_s": rounds * len(cards) / from_url if from_url else 0,
+        "from_card_per_s": rounds * len(cards) / from_card if from_card else 0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def start_server(corpus_dir: Path, latency_ms: float):
+    """Arranca el servidor de fixtures en un proceso aparte (su CPU no cuenta)"""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fixture_corpus", "serve", "--port", "0",
+         "--latency-ms", str(latency_ms)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    main_url = proc.stdout.readline().strip()
+    if not main_url:
+        proc.kill()
+        raise RuntimeError("Fixture server failed to start")
+    return proc, main_url
+
+
+def run_matrix(parsers: List[str], workers: List[int], latency_ms: float,
+               corpus_dir: Path = CORPUS_DIR) -> Dict[str, Dict[str, Any]]:
+    load_manifest(corpus_dir)  # falla pronto si no hay corpus
+    server, main_url = start_server(corpus_dir, latency_ms)
+    results = {}
+    try:
+        for parser in available_parsers(parsers):
+            for n in workers:
+                with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+                    output = out.name
+                subprocess.run(
+                    [sys.executable, "-m", "benchmarks.scraper_bench", "--run-one",
+                     "--main-url", main_url, "--parsers", parser, "--workers", str(n),
+                     "--output", output],
+                    check=True, stdout=subprocess.DEVNULL,
+                )
+                results[f"{parser}/workers={n}"] = json.loads(Path(output).read_text())
+                os.unlink(output)
+    finally:
+        server.terminate()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del scraper sobre fixtures locales")
+    parser.add_argument("--parsers", default="html.parser,lxml", help="Backends de BeautifulSoup a comparar")
+    parser.add_argument("--workers", default="1,4", help="Valores de concurrencia a comparar")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada del servidor")
+    parser.add_argument("--save", action="store_true", help="Guardar resultados en benchmarks/results")
+    parser.add_argument("--compare", type=Path, help="Resultados previos con los que comparar")
+    # Uso interno (proceso hijo)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--main-url", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        result = run_one(args.main_url, args.parsers, int(args.workers), CORPUS_DIR)
+        Path(args.output).write_text(json.dumps(result))
+        sys.exit(0)
+
+    results = run_matrix(args.parsers.split(","), [int(w) for w in args.workers.split(",")], args.latency_ms)
+    print_table(results, ["pages", "products", "wall_s", "pages_per_s", "products_per_s",
+                          "cpu_per_page_ms", "parse_cpu_per_page_ms", "from_url_per_s", "from_card_per_s", "peak_rss_mb"])
+    if args.save:
+        print(f"Saved to {save_results('scraper', results)}")
+    if args.compare:
+        regressions = compare(results, load_results(args.compare)["results"], LOWER_IS_BETTER, HIGHER_IS_BETTER)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,112 @@
+"""
+Benchmark de serialización: camino por defecto (ORM + Pydantic + json) frente a
+RTR_FAST_JSON=1 (filas + orjson) en los endpoints con respuestas grandes.
+
+    python -m benchmarks.serialization_bench --database /tmp/rtr_50k.db [--iterations 10] [--save]
+
+Por endpoint informa la latencia p50 de extremo a extremo de cada camino, el
+tiempo solo de serialización (validar + volcar a JSON frente a orjson.dumps
+sobre las filas) y comprueba que ambos cuerpos JSON son equivalentes.
+"""
+from pathlib import Path
+from typing import Dict, Any
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.api_bench import percentile
+from benchmarks.results import save_results, print_table
+
+
+def timed(function, iterations: int) -> float:
+    """p50 en ms"""
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return percentile(latencies, 50)
+
+
+def run(database: Path, iterations: int) -> Dict[str, Dict[str, Any]]:
+    # La URL se lee al importar database.db_session
+    os.environ["RTR_DATABASE_URL"] = f"sqlite:///{database}"
+    from typing import List as ListType
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    from sqlalchemy import select, func
+    from database.crud_operations import article_crud, analytics_crud
+    from database.db_session import db_manager
+    from database.db_models import Article, PriceRecord
+    from routers import fast_json
+    import schemas.articles
+    import main
+
+    with db_manager.get_session() as session:
+        category = session.execute(select(Article.category).order_by(Article.id).limit(1)).scalar_one()
+        first_date = session.execute(select(func.min(PriceRecord.record_date))).scalar_one()
+    history_filters = {"category": category, "min_date": first_date}
+
+    # nombre -> (url, payload por defecto, filas del camino rápido, adaptador de respuesta)
+    cases = {
+        "articles_all": (
+            "/articles/",
+            article_crud.get_all, article_crud.get_all_rows,
+            TypeAdapter(ListType[schemas.articles.ArticleResponse]),
+        ),
+        "search_history": (
+            f"/articles/search/history?categoria={category}&min_date={first_date}&limit=100",
+            lambda: article_crud.search_with_history(history_filters, limit=100),
+            lambda: article_crud.search_with_history_rows(history_filters, limit=100),
+            TypeAdapter(ListType[schemas.articles.ArticleFullData]),
+        ),
+        "price_drop": (
+            "/analytics/test/price-drop",
+            analytics_crud.get_products_with_price_drop, analytics_crud.get_products_with_price_drop,
+            None,
+        ),
+    }
+
+    client = TestClient(main.app)
+    results = {}
+    for name, (url, load_default, load_rows, adapter) in cases.items():
+        bodies = {}
+        for path, flag in (("default", "0"), ("fast", "1")):
+            os.environ["RTR_FAST_JSON"] = flag
+            client.get(url)  # calentamiento
+            bodies[path] = client.get(url)
+            results.setdefault(name, {})[f"{path}_p50_ms"] = timed(lambda: client.get(url), iterations)
+
+        # Solo serialización, sobre datos ya cargados
+        payload, rows = load_default(), load_rows()
+        if adapter is not None:
+            default_serialize = lambda: adapter.dump_json(adapter.validate_python(payload))
+        else:
+            default_serialize = lambda: json.dumps(jsonable_encoder(payload)).encode("utf-8")
+        results[name].update({
+            "default_ser_ms": timed(default_serialize, iterations),
+            "fast_ser_ms": timed(lambda: fast_json.dumps(rows), iterations),
+            "bytes": len(bodies["fast"].content),
+            "identical": bodies["default"].json() == bodies["fast"].json(),
+        })
+        results[name]["speedup"] = results[name]["default_p50_ms"] / results[name]["fast_p50_ms"]
+        print(f"{name}: {results[name]['default_p50_ms']:.1f} -> {results[name]['fast_p50_ms']:.1f} ms", file=sys.stderr)
+    os.environ.pop("RTR_FAST_JSON", None)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON (por defecto vs RTR_FAST_JSON)")
+    parser.add_argument("--database", type=Path, required=True, help="SQLite (p.ej. generado con benchmarks.synthetic_catalogue)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--save", action="store_true", help="Guardar resultados en benchmarks/results")
+    args = parser.parse_args()
+
+    results = run(args.database, args.iterations)
+    print_table(results, ["default_p50_ms", "fast_p50_ms", "speedup", "default_ser_ms", "fast_ser_ms", "bytes", "identical"])
+    if args.save:
+        print(f"Saved to {save_results('serialization', results)}")
+    sys.exit(0 if all(result["identical"] for result in results.values()) else 1)
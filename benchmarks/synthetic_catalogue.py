@@ -0,0 +1,127 @@
+"""
+Generador de catálogos sintéticos a escala configurable (a través de db_models).
+
+    python -m benchmarks.synthetic_catalogue --output /tmp/rtr_50k.db \
+        --articles 50000 --days 1095 [--change-rate 0.02] [--storage changes|daily]
+
+Cada artículo recibe un precio inicial y, cada día, cambia con probabilidad
+`change-rate`. Con --storage changes (el modo de producción) solo se escriben
+los cambios; con --storage daily se escribe una fila por artículo y día
+(50k x 3 años son ~55M filas: usar con cuidado).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Any, List
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+from database.db_session import DatabaseManager
+from database.db_models import Article, PriceRecord, LastPrice
+
+CATEGORIES = [
+    "Coches", "Crawlers", "Camiones", "Aviones", "Barcos", "Helicópteros", "Drones",
+    "Baterías", "Cargadores", "Emisoras", "Receptores", "Servos", "Motores",
+    "Variadores", "Ruedas", "Neumáticos", "Llantas", "Amortiguadores", "Carrocerías",
+    "Chasis", "Transmisiones", "Diferenciales", "Ejes", "Rodamientos", "Tornillería",
+    "Herramientas", "Pinturas", "Luces", "Accesorios", "Repuestos Traxxas",
+    "Repuestos Axial", "Repuestos Tamiya", "Repuestos Arrma", "Repuestos HPI",
+    "Repuestos Kyosho", "Kits", "Escala 1/10", "Escala 1/8", "Escala 1/24", "Ofertas",
+]
+WORDS = [
+    "Axial", "Traxxas", "Tamiya", "Arrma", "Kyosho", "HPI", "Crawler", "Rock", "Trail",
+    "Pro", "Sport", "Scale", "Brushless", "RTR", "Kit", "Jeep", "Ford", "Toyota",
+    "Metal", "Aluminio", "Carbono", "Delantero", "Trasero", "Set", "Rojo", "Negro",
+]
+BATCH_SIZE = 20000
+
+
+def _batches(rows: List[Dict[str, Any]], size: int = BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def generate(output: Path, articles: int = 50000, days: int = 1095, change_rate: float = 0.02,
+             storage: str = "changes", seed: int = 42) -> Dict[str, Any]:
+    """Crea la base de datos sintética en `output` y devuelve estadísticas"""
+    if output.exists():
+        output.unlink()
+    manager = DatabaseManager(f"sqlite:///{output}")
+    manager.create_tables()
+    rnd = random.Random(seed)
+    start_day = date.today() - timedelta(days=days - 1)
+    started = time.perf_counter()
+
+    article_rows, last_rows = [], []
+    price_rows_total = 0
+    with manager.engine.begin() as conn:
+        # Ajustes de carga masiva (solo para la generación)
+        conn.exec_driver_sql("PRAGMA journal_mode=OFF")
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        for i in range(articles):
+            rtr_id = 10000 + i
+            name = " ".join(rnd.sample(WORDS, 5))
+            article_rows.append({
+                "rtr_id": rtr_id,
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "name": f"{name} {rtr_id}",
+                "ean": 8400000000000 + i if rnd.random() < 0.7 else None,
+                "art_url": f"https://www.rtrvalladolid.es/inicio/-{rtr_id}{name.lower().replace(' ', '-')}.html",
+                "img_url": f"https://www.rtrvalladolid.es/{rtr_id}-large_default/img.jpg",
+                "status": rnd.random() < 0.95,
+            })
+        for batch in _batches(article_rows):
+            conn.execute(insert(Article), batch)
+
+        price_rows: List[Dict[str, Any]] = []
+        for article in article_rows:
+            price = Decimal(rnd.randint(199, 150000)) / 100
+            for day in range(days):
+                changed = day == 0 or rnd.random() < change_rate
+                if changed and day:
+                    factor = Decimal(str(round(rnd.uniform(0.8, 1.15), 2)))
+                    price = max(Decimal("0.99"), (price * factor).quantize(Decimal("0.01")))
+                if changed or storage == "daily":
+                    price_rows.append({
+                        "rtr_id": article["rtr_id"],
+                        "price": price,
+                        "record_date": start_day + timedelta(days=day),
+                    })
+            last_rows.append({"rtr_id": article["rtr_id"], "price": price,
+                              "record_date": start_day + timedelta(days=days - 1)})
+            if len(price_rows) >= BATCH_SIZE:
+                conn.execute(insert(PriceRecord), price_rows)
+                price_rows_total += len(price_rows)
+                price_rows = []
+        if price_rows:
+            conn.execute(insert(PriceRecord), price_rows)
+            price_rows_total += len(price_rows)
+        for batch in _batches(last_rows):
+            conn.execute(insert(LastPrice), batch)
+
+    manager.engine.dispose()
+    stats = {
+        "database": str(output),
+        "articles": articles,
+        "days": days,
+        "storage": storage,
+        "price_records": price_rows_total,
+        "size_mb": round(output.stat().st_size / 1e6, 1),
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético para benchmarks")
+    parser.add_argument("--output", type=Path, required=True, help="Archivo SQLite a crear (se sobreescribe)")
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--change-rate", type=float, default=0.02, help="Probabilidad diaria de cambio de precio")
+    parser.add_argument("--storage", choices=["changes", "daily"], default="changes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(generate(args.output, args.articles, args.days, args.change_rate, args.storage, args.seed))
@@ -0,0 +1,62 @@
+"""
+Caché en memoria acotada (LRU) con caducidad por entrada, segura entre hilos.
+
+Cada instancia tiene un nombre con el que exporta aciertos y fallos en
+rtr_cache_requests_total{cache=...} (hit ratio en /metrics).
+"""
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+
+from monitoring.metrics import record_cache
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float] = None):
+        """
+        Args:
+            name: Etiqueta de la caché en las métricas.
+            maxsize: Entradas como máximo (se descarta la usada hace más tiempo).
+            ttl: Segundos de vida por defecto (None = sin caducidad salvo expires_at).
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] is not None and entry[1] <= now:
+                del self._data[key]
+                entry = _MISSING
+            if entry is not _MISSING:
+                self._data.move_to_end(key)
+        record_cache(self.name, entry is not _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """expires_at: instante (time.time()) de caducidad; por defecto ahora + ttl"""
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,85 @@
+from typing import Dict, Any
+from sqlalchemy import select, delete, update, func, text
+from .db_session import DatabaseManager, db_manager
+from .db_models import PriceRecord, LastPrice
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def compact_price_history(manager: DatabaseManager = db_manager, dry_run: bool = False,
+                          vacuum: bool = False) -> Dict[str, Any]:
+    """
+    Compacta el historial diario existente a historial de solo cambios
+    (PRICE_STORAGE_MODE = "changes").
+
+    1. Sincroniza last_price con la última fecha observada de cada artículo, para
+       no perder cuándo se vio el precio por última vez.
+    2. Elimina los registros cuyo precio es igual al del registro anterior del
+       mismo artículo (incluidos duplicados del mismo día).
+
+    Args:
+        manager: DatabaseManager sobre el que trabajar.
+        dry_run: Solo calcula cuántas filas se eliminarían.
+        vacuum: Ejecuta VACUUM al terminar (SQLite) para liberar espacio en disco.
+
+    Returns:
+        dict con filas antes/después y filas eliminadas.
+    """
+    previous_price = func.lag(PriceRecord.price).over(
+        partition_by=PriceRecord.rtr_id,
+        order_by=(PriceRecord.record_date, PriceRecord.id),
+    )
+    ranked = select(PriceRecord.id, PriceRecord.price, previous_price.label("previous_price")).subquery()
+    redundant_ids = select(ranked.c.id).where(ranked.c.price == ranked.c.previous_price)
+
+    with manager.get_session() as session:
+        rows_before = session.execute(select(func.count(PriceRecord.id))).scalar_one()
+        redundant = session.execute(
+            select(func.count()).select_from(redundant_ids.subquery())
+        ).scalar_one()
+
+        if not dry_run:
+            # 1. Última fecha observada por artículo
+            last_seen = (
+                select(func.max(PriceRecord.record_date))
+                .where(PriceRecord.rtr_id == LastPrice.rtr_id)
+                .scalar_subquery()
+            )
+            session.execute(
+                update(LastPrice)
+                .where(last_seen > LastPrice.record_date)
+                .values(record_date=last_seen)
+                .execution_options(synchronize_session=False)
+            )
+
+            # 2. Borrar registros sin cambio de precio
+            session.execute(
+                delete(PriceRecord)
+                .where(PriceRecord.id.in_(redundant_ids))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+    if vacuum and not dry_run and manager.engine.dialect.name == "sqlite":
+        with manager.engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+    result = {
+        "rows_before": rows_before,
+        "rows_removed": redundant,
+        "rows_after": rows_before - redundant if not dry_run else rows_before,
+        "dry_run": dry_run,
+    }
+    logger.info(f"Price history compaction: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacta price_records a historial de solo cambios")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar las filas redundantes")
+    parser.add_argument("--vacuum", action="store_true", help="Ejecutar VACUUM al terminar")
+    args = parser.parse_args()
+    db_manager.create_tables()  # asegura el índice (rtr_id, record_date)
+    print(compact_price_history(dry_run=args.dry_run, vacuum=args.vacuum))
@@ -1,16 +1,120 @@
 from typing import List, Dict, Any, Optional, Sequence
-from sqlalchemy import insert, select, and_, update, func
-from sqlalchemy.orm import joinedload 
+from sqlalchemy import insert, select, and_, or_, update, delete, func, case, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, aliased
 from .crud_base import CRUDOperations
-from .db_models import Article, PriceRecord, LastPrice, User
+from .db_models import (Article, PriceRecord, LastPrice, User, JobLock, JobRun, CrawlTask, Watch, Notification,
+                        AlertCursor, PriceChange, ChangeLogLock)
 from .db_session import db_manager
-from datetime import date
+from .price_history import downsample, HISTORY_MAX_POINTS
+from .cache import TTLCache
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 import logging
+import os
 # from schemas.articles import ArticleCreate
 
 logger = logging.getLogger(__name__)
 
+# Modo de almacenamiento del historial de precios:
+#   "changes" -> solo se guarda una fila cuando el precio cambia (el precio de una
+#                fecha X es el del último registro con record_date <= X y
+#                last_price.record_date indica la última vez que se vio el precio)
+#   "daily"   -> una fila por artículo y día scrapeado (comportamiento original)
+PRICE_STORAGE_MODE = "changes"
+
+# Tamaño máximo de las listas IN (SQLite antiguo limita a 999 parámetros por consulta)
+IN_CHUNK_SIZE = 500
+
+# Caché de usuarios por id para las rutas autenticadas. Se invalida al actualizar o
+# borrar en este proceso; el TTL corto acota lo que otro proceso puede ver desactualizado
+USER_CACHE_TTL = float(os.getenv("RTR_USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = 1024
+
+# Campos del artículo que se actualizan al re-ingerir datos scrapeados
+ARTICLE_FIELDS = ("category", "name", "ean", "art_url", "img_url")
+
+
+def chunked(items: Sequence[Any], size: int = IN_CHUNK_SIZE):
+    """Parte una secuencia en trozos de como mucho `size` elementos"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def log_price_changes(session, events: List[Dict[str, Any]]):
+    """
+    Añade eventos (rtr_id, old_price, new_price, record_date) al registro de
+    cambios, en la misma transacción que la escritura del precio.
+
+    Antes se bloquea la fila de change_log_lock hasta el commit. Con varios
+    escritores a la vez (workers distribuidos sobre una base compartida) cada
+    transacción toma sus seq después de que se confirmen las anteriores, así
+    que un lector de GET /changes?since=seq no puede saltarse un seq menor que
+    aún no se había confirmado. En SQLite los escritores ya van de uno en uno.
+    """
+    if not events:
+        return
+    now = datetime.now()
+    locked = session.execute(
+        update(ChangeLogLock).where(ChangeLogLock.id == 1).values(updated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not locked:
+        # La fila la crea db_manager.create_tables(); crearla aquí haría chocar a dos primeros escritores
+        raise RuntimeError("change_log_lock row missing: run db_manager.create_tables()")
+    session.execute(insert(PriceChange), [{**event, "created_at": now} for event in events])
+
+
+def price_intervals():
+    """Subconsulta con el intervalo de validez de cada registro de precio.
+
+    valid_from es la fecha del registro y valid_until la del siguiente registro
+    del mismo artículo (NULL si es el vigente). Sirve igual para historial diario
+    que para historial de solo cambios.
+    """
+    return select(
+        PriceRecord.rtr_id,
+        PriceRecord.price,
+        PriceRecord.record_date.label("valid_from"),
+        func.lead(PriceRecord.record_date, type_=PriceRecord.record_date.type).over(
+            partition_by=PriceRecord.rtr_id, order_by=(PriceRecord.record_date, PriceRecord.id)
+        ).label("valid_until"),
+    ).subquery("price_intervals")
+
+
+def _history_window(min_date: Optional[date] = None, max_date: Optional[date] = None) -> list:
+    """Condiciones de rango de fechas sobre price_records"""
+    conditions = []
+    if min_date is not None:
+        conditions.append(PriceRecord.record_date >= min_date)
+    if max_date is not None:
+        conditions.append(PriceRecord.record_date <= max_date)
+    return conditions
+
+
+# Columnas (y orden) de schemas.articles.ArticleResponse, para las respuestas en filas
+ARTICLE_RESPONSE_COLUMNS = (Article.rtr_id, Article.category, Article.name, Article.ean,
+                            Article.art_url, Article.img_url, Article.id)
+
+
+def full_data_options(min_date: Optional[date] = None, max_date: Optional[date] = None):
+    """Opciones de carga para respuestas ArticleFullData.
+
+    selectinload resuelve price_records y updated_price con UNA consulta
+    adicional por relación para todo el lote de artículos (no una por artículo)
+    y solo trae las columnas que expone el schema. El rango de fechas, si se
+    indica, se aplica en la propia consulta del historial.
+    """
+    window = _history_window(min_date, max_date)
+    price_records = Article.price_records.and_(*window) if window else Article.price_records
+    return (
+        selectinload(price_records).load_only(
+            PriceRecord.id, PriceRecord.price, PriceRecord.record_date
+        ),
+        selectinload(Article.updated_price),
+    )
+
+
 class ArticleCRUD(CRUDOperations): # Clase para trabajar con la tabla Artículos de la DB
     """Operaciones CRUD Básicas para artículos"""
     
@@ -53,6 +157,7 @@ class ArticleCRUD(CRUDOperations): # Clase para trabajar con la tabla Artículos
                 existing = session.execute(
                     select(LastPrice).where(LastPrice.rtr_id == product_data["rtr_id"])
                 ).scalar_one_or_none()
+                old_price = existing.price if existing is not None else None
                 if existing is None:
                     ultimo = LastPrice(
                         rtr_id=product_data["rtr_id"],
@@ -63,6 +168,11 @@ class ArticleCRUD(CRUDOperations): # Clase para trabajar con la tabla Artículos
                 else:
                     existing.price = product_data["price"]
                     existing.record_date = product_data["record_date"]
+                if old_price is None or old_price != product_data["price"]:
+                    log_price_changes(session, [{
+                        "rtr_id": product_data["rtr_id"], "old_price": old_price,
+                        "new_price": product_data["price"], "record_date": product_data["record_date"],
+                    }])
 
                 session.commit()
                 return True
@@ -138,6 +248,29 @@ class ArticleCRUD(CRUDOperations): # Clase para trabajar con la tabla Artículos
                 raise  # Propagar el error para que la capa API lo maneje
         # Context manager se encarga del cierre automáticamente
     
+    def get_many(self, rtr_ids: Sequence[int] = (), eans: Sequence[int] = ()) -> List[Article]:
+        """
+        Artículos con alguno de los rtr_ids o EANs indicados, con su último precio.
+        Una consulta IN por cada IN_CHUNK_SIZE identificadores (y una para los
+        últimos precios), sin orden garantizado.
+        """
+        found = {}
+        with self.get_session() as session:
+            for column, values in ((Article.rtr_id, rtr_ids), (Article.ean, eans)):
+                for chunk in chunked(list(dict.fromkeys(values))):
+                    for article in session.execute(
+                        select(Article).options(selectinload(Article.updated_price)).where(column.in_(chunk))
+                    ).scalars():
+                        found[article.id] = article
+        return list(found.values())
+
+    def get_all_rows(self) -> List[Dict[str, Any]]:
+        """Todos los artículos como dicts con la forma de ArticleResponse (sin objetos ORM)"""
+        with self.get_session() as session:
+            return [dict(row) for row in session.execute(
+                select(*ARTICLE_RESPONSE_COLUMNS).order_by(Article.id)
+            ).mappings()]
+
     def get_active(self) -> List[Article]:
         """Obtener todos los artículos"""
         with self.get_session() as session:
@@ -175,55 +308,102 @@ class ArticleCRUD(CRUDOperations): # Clase para trabajar con la tabla Artículos
 
             return session.execute(query).scalars().all()
 
-    def search_with_history(self, filters: Dict[str, Any], limit: int = 20) -> Sequence[Article]:
-        with self.get_session() as session:
-            
-            
-            # Lista para acumular condiciones
-            article_conditions = []
-            pricedate_conditions = []
-
+    @staticmethod
+    def _history_search_conditions(filters: Dict[str, Any]) -> list:
+        """Condiciones de search_with_history (filtros de artículo + precio/fecha)"""
+        # Lista para acumular condiciones
+        article_conditions = []
+        pricedate_conditions = []
 
-            if 'name' in filters:
-                article_conditions.append(Article.name.ilike(f"%{filters['name']}%"))
-            
-            if 'category' in filters:
-                article_conditions.append(Article.category.ilike(f"%{filters['category']}%"))
-            
-            if 'rtr_id' in filters:
-                article_conditions.append(Article.rtr_id == filters['rtr_id'])
-            
-            if 'ean' in filters:
-                article_conditions.append(Article.ean == filters['ean'])
-            
-            if 'max_price' in filters:
-                pricedate_conditions.append(PriceRecord.price <= filters['max_price'])
 
-            if 'min_price' in filters:
-                pricedate_conditions.append(PriceRecord.price >= filters['min_price'])
+        if 'name' in filters:
+            article_conditions.append(Article.name.ilike(f"%{filters['name']}%"))
+        
+        if 'category' in filters:
+            article_conditions.append(Article.category.ilike(f"%{filters['category']}%"))
+        
+        if 'rtr_id' in filters:
+            article_conditions.append(Article.rtr_id == filters['rtr_id'])
+        
+        if 'ean' in filters:
+            article_conditions.append(Article.ean == filters['ean'])
+        
+        # Los filtros de precio/fecha se evalúan sobre intervalos de validez, de
+        # modo que un precio registrado antes de min_date y sin cambios después
+        # sigue contando como "precio en esa fecha".
+        intervals = price_intervals()
 
-            if 'max_date' in filters:
-                pricedate_conditions.append(PriceRecord.record_date <= filters['max_date'])
+        if 'max_price' in filters:
+            pricedate_conditions.append(intervals.c.price <= filters['max_price'])
 
-            if 'min_date' in filters:
-                pricedate_conditions.append(PriceRecord.record_date >= filters['min_date'])
+        if 'min_price' in filters:
+            pricedate_conditions.append(intervals.c.price >= filters['min_price'])
 
+        if 'max_date' in filters:
+            pricedate_conditions.append(intervals.c.valid_from <= filters['max_date'])
 
+        if 'min_date' in filters:
+            pricedate_conditions.append(
+                (intervals.c.valid_until.is_(None)) | (intervals.c.valid_until > filters['min_date'])
+            )
 
+        # Los artículos que cumplen se resuelven en un IN no correlacionado: así no
+        # se multiplican filas por cada registro de precio y el LIMIT se aplica a
+        # artículos, no a filas del JOIN.
+        price_match = Article.rtr_id.in_(
+            select(intervals.c.rtr_id).where(*pricedate_conditions)
+        )
+        return [*article_conditions, price_match]
 
-            # Como el endpoint ya valida que existen filtros de precio/fecha,
-            # siempre necesitaremos JOIN y eager loading
+    def search_with_history(self, filters: Dict[str, Any], limit: int = 20) -> Sequence[Article]:
+        with self.get_session() as session:
             query = (select(Article)
-                    .options(joinedload(Article.price_records))
-                    .join(PriceRecord, PriceRecord.rtr_id == Article.rtr_id)
-                    .distinct())
-                
-            # Aplicar TODAS las condiciones con AND
-            all_conditions = article_conditions + pricedate_conditions
-            query = query.where(and_(*all_conditions))    
-            query = query.limit(limit)
+                    .options(*full_data_options())
+                    .where(and_(*self._history_search_conditions(filters)))
+                    .order_by(Article.id)
+                    .limit(limit))
+
+            return session.execute(query).scalars().all()
+
+    def search_with_history_rows(self, filters: Dict[str, Any], limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Igual que search_with_history pero en filas ya con la forma de ArticleFullData
+        (dicts, sin objetos ORM): historial y último precio en una consulta IN cada uno.
+        """
+        with self.get_session() as session:
+            articles = [dict(row) for row in session.execute(
+                select(*ARTICLE_RESPONSE_COLUMNS)
+                .where(and_(*self._history_search_conditions(filters)))
+                .order_by(Article.id)
+                .limit(limit)
+            ).mappings()]
+            by_rtr_id = {}
+            for article in articles:
+                article["price_records"], article["updated_price"] = [], None
+                by_rtr_id[article["rtr_id"]] = article
+            for chunk in chunked(list(by_rtr_id)):
+                for rtr_id, price, record_date, record_id in session.execute(
+                    select(PriceRecord.rtr_id, PriceRecord.price, PriceRecord.record_date, PriceRecord.id)
+                    .where(PriceRecord.rtr_id.in_(chunk))
+                    .order_by(PriceRecord.rtr_id, PriceRecord.record_date)
+                ).tuples():
+                    by_rtr_id[rtr_id]["price_records"].append({"price": price, "record_date": record_date, "id": record_id})
+                for row in session.execute(
+                    select(LastPrice.rtr_id, LastPrice.price, LastPrice.record_date, LastPrice.id)
+                    .where(LastPrice.rtr_id.in_(chunk))
+                ).mappings():
+                    by_rtr_id[row["rtr_id"]]["updated_price"] = dict(row)
+            return articles
 
-            return session.execute(query).scalars().unique().all()
+    def get_full_data_by_id(self, id: int, min_date: Optional[date] = None,
+                            max_date: Optional[date] = None) -> Optional[Article]:
+        """Obtener artículo por ID con historial (opcionalmente acotado) y último precio precargados"""
+        with self.get_session() as session:
+            return session.execute(
+                select(Article)
+                .options(*full_data_options(min_date, max_date))
+                .where(Article.id == id)
+            ).scalar_one_or_none()
         
     def get_all_categories(self):
         with self.get_session() as session:
@@ -248,6 +428,60 @@ class PriceRecordCRUD(CRUDOperations): # Clase para trabajar con la tabla Histor
             session.commit()
             return len(prices_list)
     
+    def record_price(self, rtr_id: int, price: Decimal, record_date: date) -> bool:
+        """
+        Registrar el precio observado de un artículo según PRICE_STORAGE_MODE
+        y actualizar su último precio en la misma transacción.
+
+        Returns:
+            True si se escribió una fila en el historial, False si no hacía falta
+            (incluidas las observaciones anteriores al último precio conocido,
+            que upsert_batch cuenta como 'stale').
+        """
+        with self.get_session() as session:
+            last = session.execute(
+                select(LastPrice).where(LastPrice.rtr_id == rtr_id)
+            ).scalar_one_or_none()
+
+            if last is not None and record_date < last.record_date:
+                return False
+
+            if PRICE_STORAGE_MODE == "changes":
+                write_record = last is None or last.price != price
+            else:
+                write_record = session.execute(
+                    select(PriceRecord.id).where(
+                        PriceRecord.rtr_id == rtr_id, PriceRecord.record_date == record_date
+                    )
+                ).first() is None
+
+            if write_record:
+                session.add(PriceRecord(rtr_id=rtr_id, price=price, record_date=record_date))
+
+            if last is None:
+                session.add(LastPrice(rtr_id=rtr_id, price=price, record_date=record_date))
+                log_price_changes(session, [{"rtr_id": rtr_id, "old_price": None, "new_price": price,
+                                             "record_date": record_date}])
+            else:
+                if last.price != price:
+                    log_price_changes(session, [{"rtr_id": rtr_id, "old_price": last.price, "new_price": price,
+                                                 "record_date": record_date}])
+                last.price = price
+                last.record_date = record_date
+
+            session.commit()
+            return write_record
+
+    def get_price_on(self, rtr_id: int, on_date: date) -> Optional[Decimal]:
+        """Precio vigente de un artículo en una fecha (último registro <= fecha)"""
+        with self.get_session() as session:
+            return session.execute(
+                select(PriceRecord.price)
+                .where(PriceRecord.rtr_id == rtr_id, PriceRecord.record_date <= on_date)
+                .order_by(PriceRecord.record_date.desc(), PriceRecord.id.desc())
+                .limit(1)
+            ).scalar_one_or_none()
+
     def exists_for_date(self, rtr_id: int, record_date: str) -> bool:
         """Verificar si existe precio para una fecha específica"""
         with self.get_session() as session:
@@ -269,16 +503,56 @@ class PriceRecordCRUD(CRUDOperations): # Clase para trabajar con la tabla Histor
             ).all()
             return [fecha[0] for fecha in results]
 
-    def get_price_history(self, rtr_id: int):
-        """Devuelve la evolución de precios de un artículo por su RTR ID"""
+    def get_price_history(self, rtr_id: int, min_date: Optional[date] = None,
+                          max_date: Optional[date] = None, mode: str = "raw",
+                          max_points: Optional[int] = HISTORY_MAX_POINTS) -> List[Dict[str, Any]]:
+        """
+        Devuelve la evolución de precios de un artículo por su RTR ID.
+
+        Args:
+            rtr_id: RTR ID del artículo.
+            min_date / max_date: Rango de fechas (inclusive) a consultar.
+            mode: raw | changes | weekly | monthly | lttb (ver database.price_history).
+            max_points: Máximo de puntos devueltos.
+        """
         with self.get_session() as session:
             results = session.execute(
                 select(PriceRecord.record_date, PriceRecord.price)
-                .where(PriceRecord.rtr_id == rtr_id)
+                .where(PriceRecord.rtr_id == rtr_id, *_history_window(min_date, max_date))
                 .order_by(PriceRecord.record_date)
             ).all()
-            # Devuelve una lista de dicts para fácil uso en el template
-            return [{"record_date": r[0].isoformat(), "price": float(r[1])} for r in results]
+            points = [tuple(r) for r in results]
+
+            # Precio vigente al inicio del rango (registrado antes de min_date)
+            if min_date is not None and (not points or points[0][0] > min_date):
+                previous = session.execute(
+                    select(PriceRecord.price)
+                    .where(PriceRecord.rtr_id == rtr_id, PriceRecord.record_date < min_date)
+                    .order_by(PriceRecord.record_date.desc(), PriceRecord.id.desc())
+                    .limit(1)
+                ).scalar_one_or_none()
+                if previous is not None:
+                    points.insert(0, (min_date, previous))
+
+            # Con historial de solo cambios, el último precio sigue vigente hasta la
+            # última fecha en que se observó (last_price.record_date)
+            last = session.execute(
+                select(LastPrice.record_date, LastPrice.price).where(LastPrice.rtr_id == rtr_id)
+            ).first()
+            if (last is not None and points and last.record_date > points[-1][0]
+                    and (max_date is None or last.record_date <= max_date)):
+                points.append((last.record_date, last.price))
+
+        points = downsample(points, mode, max_points)
+        # Devuelve una lista de dicts para fácil uso en el template
+        if mode in ("weekly", "monthly"):
+            return [
+                {**bucket,
+                 "record_date": bucket["record_date"].isoformat(),
+                 **{k: float(bucket[k]) for k in ("open", "high", "low", "close", "price")}}
+                for bucket in points
+            ]
+        return [{"record_date": r[0].isoformat(), "price": float(r[1])} for r in points]
 
 class LastPriceCRUD(CRUDOperations): # Clase para trabajar con la tabla ultimo precio de la DB
     """Operaciones CRUD específicas para Ultimo Precio"""
@@ -310,41 +584,186 @@ class LastPriceCRUD(CRUDOperations): # Clase para trabajar con la tabla ultimo p
             # Guardamos los Cambios
             session.commit()
             
+class IngestionCRUD(CRUDOperations):
+    """Ingesta masiva e idempotente de artículos + historial + último precio"""
+
+    def upsert_batch(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Upsert de un lote de artículos con su precio observado en UNA transacción.
+
+        Cada item lleva los campos de ArticleCreate (rtr_id, category, name, ean,
+        art_url, img_url, price, record_date). Re-ingerir el mismo lote no cambia
+        nada: los artículos iguales no se tocan y el historial respeta
+        PRICE_STORAGE_MODE (en "changes" solo se escribe si cambia el precio, en
+        "daily" solo si no existe registro para esa fecha). Las observaciones más
+        antiguas que el último precio conocido se cuentan como 'stale'.
+
+        Returns:
+            dict con contadores (inserted, updated, unchanged, price_records, stale),
+            'changes': lista de (rtr_id, precio_anterior, precio_nuevo, fecha) e
+            'items': (estado del artículo, estado del precio) de cada item, en el
+            orden de entrada; artículo inserted | updated | unchanged, precio
+            changed | unchanged | stale.
+        """
+        result: Dict[str, Any] = {
+            "inserted": 0, "updated": 0, "unchanged": 0,
+            "price_records": 0, "stale": 0, "changes": [], "items": [],
+        }
+        if not items:
+            return result
+
+        # Orden cronológico: un mismo rtr_id puede aparecer varias veces en el lote
+        statuses: List[Any] = [None] * len(items)
+        ordered = sorted(enumerate(items), key=lambda pair: pair[1]["record_date"])
+        rtr_ids = list({item["rtr_id"] for item in items})
+
+        with self.get_session() as session:
+            # 1. Estado actual de los artículos del lote (consultas IN troceadas)
+            articles: Dict[int, Dict[str, Any]] = {}
+            last_prices: Dict[int, Dict[str, Any]] = {}
+            existing_dates = set()
+            for chunk in chunked(rtr_ids):
+                for row in session.execute(
+                    select(Article.id, Article.rtr_id, *[getattr(Article, f) for f in ARTICLE_FIELDS])
+                    .where(Article.rtr_id.in_(chunk))
+                ).mappings():
+                    articles[row["rtr_id"]] = dict(row)
+                for row in session.execute(
+                    select(LastPrice.id, LastPrice.rtr_id, LastPrice.price, LastPrice.record_date)
+                    .where(LastPrice.rtr_id.in_(chunk))
+                ).mappings():
+                    last_prices[row["rtr_id"]] = dict(row)
+                if PRICE_STORAGE_MODE == "daily":
+                    dates = list({item["record_date"] for item in items})
+                    existing_dates.update(session.execute(
+                        select(PriceRecord.rtr_id, PriceRecord.record_date)
+                        .where(PriceRecord.rtr_id.in_(chunk), PriceRecord.record_date.in_(dates))
+                    ).tuples())
+
+            # 2. Calcular inserciones/actualizaciones en memoria
+            new_article_ids, article_updates = [], {}
+            new_records, new_last, last_updates, events = [], {}, {}, []
+            for position, item in ordered:
+                rtr_id, price, record_date = item["rtr_id"], item["price"], item["record_date"]
+                fields = {f: item.get(f) for f in ARTICLE_FIELDS}
+
+                current = articles.get(rtr_id)
+                if current is None:
+                    new_article_ids.append(rtr_id)
+                    articles[rtr_id] = {"id": None, "rtr_id": rtr_id, **fields}
+                    article_status = "inserted"
+                elif any(current[f] != fields[f] for f in ARTICLE_FIELDS):
+                    current.update(fields)
+                    if current["id"] is not None:
+                        article_updates[rtr_id] = {"id": current["id"], **fields}
+                    article_status = "updated"
+                else:
+                    article_status = "unchanged"
+                result[article_status] += 1
+
+                last = last_prices.get(rtr_id)
+                if last is not None and record_date < last["record_date"]:
+                    result["stale"] += 1
+                    statuses[position] = (article_status, "stale")
+                    continue
+
+                if PRICE_STORAGE_MODE == "changes":
+                    write_record = last is None or last["price"] != price
+                else:
+                    write_record = (rtr_id, record_date) not in existing_dates
+                    existing_dates.add((rtr_id, record_date))
+                if write_record:
+                    new_records.append({"rtr_id": rtr_id, "price": price, "record_date": record_date})
+                    if last is not None and last["price"] != price:
+                        result["changes"].append((rtr_id, last["price"], price, record_date))
+
+                if last is None or last["price"] != price:
+                    events.append({"rtr_id": rtr_id, "old_price": last["price"] if last else None,
+                                   "new_price": price, "record_date": record_date})
+                    statuses[position] = (article_status, "changed")
+                else:
+                    statuses[position] = (article_status, "unchanged")
+
+                if last is None:
+                    last = {"id": None, "rtr_id": rtr_id, "price": price, "record_date": record_date}
+                    last_prices[rtr_id] = last
+                    new_last[rtr_id] = last
+                else:
+                    last["price"], last["record_date"] = price, record_date
+                    if last["id"] is not None:
+                        last_updates[rtr_id] = {"id": last["id"], "price": price, "record_date": record_date}
+
+            # 3. Escrituras en bloque (executemany)
+            if new_article_ids:
+                session.execute(insert(Article), [
+                    {f: articles[rtr_id][f] for f in ("rtr_id",) + ARTICLE_FIELDS}
+                    for rtr_id in new_article_ids
+                ])
+            if article_updates:
+                session.execute(update(Article), list(article_updates.values()))
+            if new_records:
+                session.execute(insert(PriceRecord), new_records)
+            if new_last:
+                session.execute(insert(LastPrice), [
+                    {"rtr_id": l["rtr_id"], "price": l["price"], "record_date": l["record_date"]}
+                    for l in new_last.values()
+                ])
+            if last_updates:
+                session.execute(update(LastPrice), list(last_updates.values()))
+            log_price_changes(session, events)
+            session.commit()
+
+        result["price_records"] = len(new_records)
+        result["items"] = statuses
+        return result
+
+
 class AnalyticsCRUD(CRUDOperations):
     """Operaciones específicas para analytics y estadísticas"""
-    def get_products_with_price_drop(self):
+    def get_products_with_price_drop(self) -> List[Dict[str, Any]]:
+        """
+        Artículos activos cuyo precio bajó en el último scrape en que se vieron.
+        Una sola consulta: el último registro de cada artículo y el anterior (lead)
+        salen de una ventana sobre el historial, en lugar de consultarlo artículo a
+        artículo.
+
+        Con historial de solo cambios los dos últimos registros siempre tienen
+        precios distintos, así que además se exige que el último registro sea de la
+        fecha de last_price (el precio bajó en la última observación), igual que
+        con una fila por día.
+        """
         with self.get_session() as session:
-            # 1. Solo artículos activos
-            articles = session.query(Article).filter(Article.status == True).all()
-            result = []
-            for article in articles:
-                # 2. Obtener los dos últimos precios
-                prices = (
-                    session.query(PriceRecord)
-                    .filter(PriceRecord.rtr_id == article.rtr_id)
-                    .order_by(PriceRecord.record_date.desc())
-                    .limit(2)
-                    .all()
+            newest_first = {
+                "partition_by": PriceRecord.rtr_id,
+                "order_by": (PriceRecord.record_date.desc(), PriceRecord.id.desc()),
+            }
+            ranked = select(
+                PriceRecord.rtr_id,
+                PriceRecord.price.label("price_now"),
+                PriceRecord.record_date.label("record_date_now"),
+                func.lead(PriceRecord.price, type_=PriceRecord.price.type).over(**newest_first).label("price_before"),
+                func.lead(PriceRecord.record_date, type_=PriceRecord.record_date.type).over(**newest_first).label("record_date_before"),
+                func.row_number().over(**newest_first).label("rn"),
+            ).subquery("ranked_prices")
+            query = (
+                select(
+                    Article.category, Article.name, Article.img_url, Article.art_url, Article.rtr_id,
+                    ranked.c.price_now, ranked.c.price_before, ranked.c.record_date_now, ranked.c.record_date_before,
                 )
-                if len(prices) == 2:
-                    latest, previous = prices[0], prices[1]
-                    if latest.price < previous.price:
-                        result.append({
-                            "category": article.category,
-                            "name": article.name,
-                            "img_url": article.img_url,
-                            "art_url": article.art_url,
-                            "rtr_id": article.rtr_id,
-                            "price_now": float(latest.price),
-                            "price_before": float(previous.price),
-                            "price_diff": float(previous.price) - float(latest.price),
-                            "record_date_now": latest.record_date,
-                            "record_date_before": previous.record_date,
-                        })
-            # 3. Agrupar por categoría (opcional)
-            # Puedes devolver result tal cual, o agruparlo por categoría si lo prefieres
+                .join(ranked, ranked.c.rtr_id == Article.rtr_id)
+                .join(LastPrice, LastPrice.rtr_id == Article.rtr_id)
+                .where(Article.status == True, ranked.c.rn == 1, ranked.c.price_now < ranked.c.price_before,
+                       ranked.c.record_date_now == LastPrice.record_date)
+                .order_by(Article.id)
+            )
+            result = []
+            for row in session.execute(query).mappings():
+                item = dict(row)
+                item["price_now"], item["price_before"] = float(row["price_now"]), float(row["price_before"])
+                item["price_diff"] = item["price_before"] - item["price_now"]
+                result.append(item)
             return result
-        
+
     def get_all_categories_stats(self) -> List[Dict[str, Any]]:
         with self.get_session() as session:
             query = (
@@ -354,9 +773,10 @@ class AnalyticsCRUD(CRUDOperations):
                     func.avg(PriceRecord.price).label('avg_price'), # AGREGACIÓN 2: Calcular el precio promedio por categoría
                     func.min(PriceRecord.price).label('min_price'), # AGREGACIÓN 3: Encontrar el precio MÁS BARATO por categoría
                     func.max(PriceRecord.price).label('max_price'), # AGREGACIÓN 4: Encontrar el precio MÁS CARO por categoría
-                    func.max(PriceRecord.record_date).label('last_update') # AGREGACIÓN 5: Encontrar la última fecha de esa categoría
+                    func.max(LastPrice.record_date).label('last_update') # AGREGACIÓN 5: Última vez que se vio un precio de esa categoría
                 )
-                .join(PriceRecord, Article.rtr_id == PriceRecord.rtr_id) # UNIR LAS TABLAS: Conectar artículos con sus últimos precios
+                .join(PriceRecord, Article.rtr_id == PriceRecord.rtr_id) # UNIR LAS TABLAS: Conectar artículos con su historial de precios
+                .outerjoin(LastPrice, Article.rtr_id == LastPrice.rtr_id) # ... y con su último precio (1:1, no multiplica filas)
                 .group_by(Article.category) # GROUP BY: Agrupar por categoría Con esto obtenemos UNA fila POR CADA categoría
             )
             
@@ -383,9 +803,10 @@ class AnalyticsCRUD(CRUDOperations):
                     func.avg(PriceRecord.price).label('avg_price'),
                     func.min(PriceRecord.price).label('min_price'),
                     func.max(PriceRecord.price).label('max_price'),
-                    func.max(PriceRecord.record_date).label('last_update')
+                    func.max(LastPrice.record_date).label('last_update')
                 )
                 .join(PriceRecord, Article.rtr_id == PriceRecord.rtr_id)
+                .outerjoin(LastPrice, Article.rtr_id == LastPrice.rtr_id)
                 .where(Article.category == given_category)
                 .group_by(Article.category)  
             )
@@ -407,6 +828,10 @@ class AnalyticsCRUD(CRUDOperations):
 class UserCRUD(CRUDOperations):
     """Operaciones CRUD Básicas para artículos"""
 
+    def __init__(self, db_manager):
+        super().__init__(db_manager)
+        self.cache = TTLCache("users", USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
     def insert_user(self, user_data: Dict[str, Any]):
         with self.get_session() as session:
             logger.info(f"Inserting user: {user_data.get('name', 'Unknown')}")
@@ -429,10 +854,16 @@ class UserCRUD(CRUDOperations):
             return session.execute(result_user).scalar_one_or_none()
 
     def get_user_by_id (self, user_id: int):
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
         with self.get_session() as session:
             logger.info(f"Getting user by id")
             result_user = select(User).where(User.id == user_id)
-            return session.execute(result_user).scalar_one_or_none()
+            user = session.execute(result_user).scalar_one_or_none()
+        if user is not None:
+            self.cache.set(user_id, user)
+        return user
 
     def update_user_by_id (self, user_id,  data_to_update: Dict[str, Any]):
         with self.get_session() as session:
@@ -453,6 +884,7 @@ class UserCRUD(CRUDOperations):
 
             # Commit
             session.commit()
+            self.cache.invalidate(user_id)
 
             # Return data from DB
             updated_user = session.execute(
@@ -460,6 +892,15 @@ class UserCRUD(CRUDOperations):
             ).scalar_one()
             return updated_user
 
+    def update_password_hash(self, user_id: int, hashed_password: str):
+        """Re-hash transparente al hacer login (cambio de coste de bcrypt)"""
+        with self.get_session() as session:
+            session.execute(
+                update(User).where(User.id == user_id).values(hashed_password=hashed_password)
+            )
+            session.commit()
+        self.cache.invalidate(user_id)
+
     def remove_user_by_id(self, user_id: int):
         with self.get_session() as session:
  
@@ -474,11 +915,422 @@ class UserCRUD(CRUDOperations):
 
             session.delete(user)
             session.commit()
+            self.cache.invalidate(user_id)
+            return True
+
+
+class JobCRUD(CRUDOperations):
+    """Locks con caducidad e historial de los trabajos programados (orchestration.scheduler)"""
+
+    def acquire_lock(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Toma el lock `name` si está libre, caducado o ya es de `owner` (renovación).
+        Es atómico entre procesos: el UPDATE condicional o la clave primaria deciden.
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        with self.get_session() as session:
+            taken = session.execute(
+                update(JobLock)
+                .where(JobLock.name == name, or_(JobLock.expires_at < now, JobLock.owner == owner))
+                .values(owner=owner, acquired_at=now, expires_at=expires_at)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not taken:
+                try:
+                    session.add(JobLock(name=name, owner=owner, acquired_at=now, expires_at=expires_at))
+                    session.flush()
+                except IntegrityError:
+                    session.rollback()
+                    return False
+            session.commit()
             return True
 
+    def release_lock(self, name: str, owner: str) -> bool:
+        with self.get_session() as session:
+            released = session.execute(
+                delete(JobLock).where(JobLock.name == name, JobLock.owner == owner)
+            ).rowcount
+            session.commit()
+            return bool(released)
+
+    def start_run(self, job_name: str, owner: str, category: Optional[str] = None) -> int:
+        with self.get_session() as session:
+            run = JobRun(job_name=job_name, category=category, owner=owner,
+                         started_at=datetime.now(), status="running")
+            session.add(run)
+            session.commit()
+            return run.id
+
+    def finish_run(self, run_id: int, status: str, stats: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None):
+        with self.get_session() as session:
+            run = session.get(JobRun, run_id)
+            run.finished_at = datetime.now()
+            run.duration_s = round((run.finished_at - run.started_at).total_seconds(), 3)
+            run.status = status
+            run.stats = stats
+            run.error = error
+            session.commit()
+
+    def last_started(self) -> Dict[str, datetime]:
+        """Último inicio de cada trabajo (para calcular la próxima ejecución tras reiniciar)"""
+        with self.get_session() as session:
+            rows = session.execute(
+                select(JobRun.job_name, func.max(JobRun.started_at)).group_by(JobRun.job_name)
+            ).all()
+            return {name: started for name, started in rows}
+
+    def recent_runs(self, limit: int = 50, job_name: Optional[str] = None) -> List[JobRun]:
+        with self.get_session() as session:
+            query = select(JobRun).order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit)
+            if job_name:
+                query = query.where(JobRun.job_name == job_name)
+            return session.execute(query).scalars().all()
+
+
+class CrawlTaskCRUD(CRUDOperations):
+    """
+    Cola de trabajo en base de datos para el crawl distribuido (orchestration.work_queue).
+
+    Las tareas se reclaman con un lease: si el worker muere o no termina antes de
+    que caduque, la tarea vuelve a estar disponible para otro worker, hasta
+    max_attempts intentos. La reclamación es un UPDATE condicional, así que es
+    segura entre procesos y nodos que compartan la base de datos.
+    """
+
+    # Tarea disponible: pendiente o con el lease caducado
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(CrawlTask.status == "pending",
+                   and_(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now))
+
+    def enqueue(self, crawl_id: str, tasks: List[Dict[str, Any]]) -> int:
+        """
+        Encola tareas {category, category_url, page}; las que ya existen en el crawl
+        se ignoran (reprocesar una página no duplica la siguiente). Devuelve las nuevas.
+        """
+        now = datetime.now()
+        with self.get_session() as session:
+            existing = set(session.execute(
+                select(CrawlTask.category, CrawlTask.page).where(CrawlTask.crawl_id == crawl_id)
+            ).tuples())
+            new = [
+                {**task, "crawl_id": crawl_id, "status": "pending", "attempts": 0, "enqueued_at": now}
+                for task in tasks if (task["category"], task["page"]) not in existing
+            ]
+            if not new:
+                return 0
+            try:
+                session.execute(insert(CrawlTask), new)
+                session.commit()
+            except IntegrityError:
+                # Otro worker la ha encolado a la vez
+                session.rollback()
+                return 0
+            return len(new)
+
+    def expire_leases(self, max_attempts: int) -> int:
+        """Leases caducados sin intentos restantes: fallo definitivo. Devuelve cuántos."""
+        now = datetime.now()
+        with self.get_session() as session:
+            expired = session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now,
+                       CrawlTask.attempts >= max_attempts)
+                .values(status="failed", lease_owner=None, finished_at=now, error="lease expired")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+            return expired
+
+    def claim(self, owner: str, lease_seconds: float, max_attempts: int,
+              candidates: int = 10) -> Optional[Dict[str, Any]]:
+        """Reclama la tarea disponible más antigua. None si la cola está vacía."""
+        self.expire_leases(max_attempts)
+        now = datetime.now()
+        with self.get_session() as session:
+            ids = session.execute(
+                select(CrawlTask.id).where(self._claimable(now)).order_by(CrawlTask.id).limit(candidates)
+            ).scalars().all()
+            for task_id in ids:
+                claimed = session.execute(
+                    update(CrawlTask)
+                    .where(CrawlTask.id == task_id, self._claimable(now))
+                    .values(status="leased", lease_owner=owner, attempts=CrawlTask.attempts + 1,
+                            lease_expires_at=now + timedelta(seconds=lease_seconds))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                session.commit()
+                if claimed:
+                    row = session.execute(
+                        select(CrawlTask.id, CrawlTask.crawl_id, CrawlTask.category, CrawlTask.category_url,
+                               CrawlTask.page, CrawlTask.attempts).where(CrawlTask.id == task_id)
+                    ).mappings().one()
+                    return dict(row)
+            return None
+
+    def complete(self, task_id: int, owner: str, products: int) -> bool:
+        """Marca la tarea como hecha. False si el lease ya no es de `owner` (caducó)."""
+        with self.get_session() as session:
+            done = session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id == task_id, CrawlTask.lease_owner == owner, CrawlTask.status == "leased")
+                .values(status="done", products=products, finished_at=datetime.now(),
+                        lease_owner=None, lease_expires_at=None, error=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+            return bool(done)
+
+    def fail(self, task_id: int, owner: str, error: str, max_attempts: int) -> str:
+        """Devuelve la tarea a la cola (o la da por fallida si no quedan intentos). Devuelve el estado."""
+        with self.get_session() as session:
+            task = session.get(CrawlTask, task_id)
+            if task is None or task.lease_owner != owner or task.status != "leased":
+                return task.status if task else "missing"
+            task.status = "failed" if task.attempts >= max_attempts else "pending"
+            task.lease_owner, task.lease_expires_at, task.error = None, None, error
+            if task.status == "failed":
+                task.finished_at = datetime.now()
+            session.commit()
+            return task.status
+
+    def requeue_failed(self, crawl_id: str) -> int:
+        """Vuelve a encolar las tareas fallidas de un crawl (con los intentos a cero)"""
+        with self.get_session() as session:
+            requeued = session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.crawl_id == crawl_id, CrawlTask.status == "failed")
+                .values(status="pending", attempts=0, finished_at=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+            return requeued
+
+    def crawl_status(self, crawl_id: str) -> Dict[str, Any]:
+        """Tareas por estado y productos procesados de un crawl"""
+        with self.get_session() as session:
+            rows = session.execute(
+                select(CrawlTask.status, func.count(), func.coalesce(func.sum(CrawlTask.products), 0))
+                .where(CrawlTask.crawl_id == crawl_id).group_by(CrawlTask.status)
+            ).all()
+        status = {"pending": 0, "leased": 0, "done": 0, "failed": 0, "products": 0}
+        for name, count, products in rows:
+            status[name] = count
+            status["products"] += products
+        return status
+
+    def open_tasks(self) -> int:
+        """Tareas pendientes o en curso en cualquier crawl"""
+        with self.get_session() as session:
+            return session.execute(
+                select(func.count()).select_from(CrawlTask).where(CrawlTask.status.in_(("pending", "leased")))
+            ).scalar()
+
+    def latest_crawl_id(self) -> Optional[str]:
+        with self.get_session() as session:
+            return session.execute(
+                select(CrawlTask.crawl_id).order_by(CrawlTask.id.desc()).limit(1)
+            ).scalar()
+
+
+class AlertCRUD(CRUDOperations):
+    """
+    Listas de seguimiento (watches), evaluación de alertas y cola de notificaciones.
+
+    La evaluación solo mira los cambios de precio registrados desde la anterior
+    (seq de price_changes, cursor en alert_cursors): se cruzan en bloque con las
+    reglas de los productos afectados, así que el coste depende de los precios
+    nuevos y no de usuarios x productos. Los seq quedan en orden de commit
+    (log_price_changes), así que el cursor no deja atrás cambios de una
+    transacción que aún no se había confirmado, igual que GET /changes.
+    """
+
+    CURSOR = "watchlist"
+
+    def add_watch(self, user_id: int, rtr_id: int, target_price: Optional[Decimal] = None,
+                  drop_pct: Optional[float] = None) -> Watch:
+        """ValueError si el artículo no existe; IntegrityError si el usuario ya lo vigila"""
+        with self.get_session() as session:
+            if session.execute(select(Article.id).where(Article.rtr_id == rtr_id)).scalar() is None:
+                raise ValueError(f"Article {rtr_id} not found")
+            current = session.execute(select(LastPrice.price).where(LastPrice.rtr_id == rtr_id)).scalar()
+            self._ensure_cursor(session)
+            watch = Watch(user_id=user_id, rtr_id=rtr_id, target_price=target_price, drop_pct=drop_pct,
+                          last_seen_price=current, drop_reference_price=current, created_at=datetime.now())
+            session.add(watch)
+            session.commit()
+            session.refresh(watch)
+            return watch
+
+    def list_watches(self, user_id: int) -> List[Watch]:
+        with self.get_session() as session:
+            return session.execute(
+                select(Watch).where(Watch.user_id == user_id).order_by(Watch.id)
+            ).scalars().all()
+
+    def remove_watch(self, user_id: int, rtr_id: int) -> bool:
+        with self.get_session() as session:
+            removed = session.execute(
+                delete(Watch).where(Watch.user_id == user_id, Watch.rtr_id == rtr_id)
+            ).rowcount
+            session.commit()
+            return bool(removed)
+
+    def _ensure_cursor(self, session) -> AlertCursor:
+        """Las alertas empiezan a evaluarse desde los cambios registrados a partir de ahora"""
+        cursor = session.get(AlertCursor, self.CURSOR)
+        if cursor is None:
+            cursor = AlertCursor(
+                name=self.CURSOR, updated_at=datetime.now(),
+                last_seq=session.execute(select(func.coalesce(func.max(PriceChange.seq), 0))).scalar(),
+            )
+            session.add(cursor)
+            session.flush()
+        return cursor
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Genera las notificaciones de los cambios de precio desde la última evaluación.
+
+        - target: el precio baja hasta el objetivo o por debajo (solo al cruzarlo).
+        - drop: el precio cae al menos drop_pct % respecto al máximo desde la última alerta
+          (incluidos los precios intermedios de la ventana, aunque solo se evalúa el último).
+
+        Todo en una transacción; si otra evaluación avanza el cursor a la vez,
+        esta no escribe nada ('skipped').
+        """
+        result = {"changed": 0, "target": 0, "drop": 0, "skipped": False}
+        now = datetime.now()
+        with self.get_session() as session:
+            cursor = self._ensure_cursor(session)
+            low = cursor.last_seq
+            high = session.execute(select(func.coalesce(func.max(PriceChange.seq), 0))).scalar()
+            if high <= low:
+                session.commit()
+                return result
+            if not session.execute(
+                update(AlertCursor)
+                .where(AlertCursor.name == self.CURSOR, AlertCursor.last_seq == low)
+                .values(last_seq=high, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount:
+                session.rollback()
+                result["skipped"] = True
+                return result
+
+            window = aliased(PriceChange, name="window_changes")
+            in_window = and_(window.seq > low, window.seq <= high)
+            # Último precio nuevo de cada artículo afectado (rango de la clave primaria) y máximo de la ventana
+            latest_seqs = select(func.max(window.seq)).where(in_window).group_by(window.rtr_id)
+            peaks = (
+                select(window.rtr_id, func.max(window.new_price).label("peak"))
+                .where(in_window).group_by(window.rtr_id)
+                .subquery("window_peaks")
+            )
+            changed = (
+                select(PriceChange.rtr_id, PriceChange.new_price.label("price"), PriceChange.record_date, peaks.c.peak)
+                .join(peaks, peaks.c.rtr_id == PriceChange.rtr_id)
+                .where(PriceChange.seq.in_(latest_seqs))
+                .subquery("changed_prices")
+            )
+            result["changed"] = session.execute(select(func.count()).select_from(changed)).scalar()
+
+            # Máximo desde la última alerta, contando la ventana
+            reference = case(
+                (or_(Watch.drop_reference_price.is_(None), changed.c.peak > Watch.drop_reference_price), changed.c.peak),
+                else_=Watch.drop_reference_price,
+            )
+            rules = {
+                "target": and_(
+                    Watch.target_price.is_not(None),
+                    changed.c.price <= Watch.target_price,
+                    or_(Watch.last_seen_price.is_(None), Watch.last_seen_price > Watch.target_price),
+                ),
+                "drop": and_(
+                    Watch.drop_pct.is_not(None),
+                    changed.c.price <= reference * (1 - Watch.drop_pct / 100.0),
+                ),
+            }
+            columns = ["user_id", "watch_id", "rtr_id", "rule", "old_price", "new_price", "record_date",
+                       "created_at", "status"]
+            for rule, condition in rules.items():
+                old_price = Watch.last_seen_price if rule == "target" else reference
+                result[rule] = session.execute(
+                    insert(Notification).from_select(columns, select(
+                        Watch.user_id, Watch.id, Watch.rtr_id, literal(rule), old_price,
+                        changed.c.price, changed.c.record_date, literal(now), literal("pending"),
+                    ).join(changed, changed.c.rtr_id == Watch.rtr_id).where(condition))
+                ).rowcount
+
+            # Estado de las reglas de los artículos afectados (UPDATE ... FROM changed_prices)
+            target_hit, drop_hit = rules["target"], rules["drop"]
+            session.execute(
+                update(Watch)
+                .where(Watch.rtr_id == changed.c.rtr_id)
+                .values(
+                    last_seen_price=changed.c.price,
+                    drop_reference_price=case((drop_hit, changed.c.price), else_=reference),
+                    last_notified_at=case((or_(target_hit, drop_hit), now), else_=Watch.last_notified_at),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        return result
+
+    def pending_notifications(self, limit: int = 100) -> List[Notification]:
+        with self.get_session() as session:
+            return session.execute(
+                select(Notification).where(Notification.status == "pending").order_by(Notification.id).limit(limit)
+            ).scalars().all()
+
+    def mark_notifications(self, ids: Sequence[int], status: str):
+        """status: sent | failed"""
+        if not ids:
+            return
+        with self.get_session() as session:
+            for chunk in chunked(list(ids)):
+                session.execute(
+                    update(Notification).where(Notification.id.in_(chunk))
+                    .values(status=status, sent_at=datetime.now() if status == "sent" else None)
+                    .execution_options(synchronize_session=False)
+                )
+            session.commit()
+
+    def user_notifications(self, user_id: int, limit: int = 50) -> List[Notification]:
+        with self.get_session() as session:
+            return session.execute(
+                select(Notification).where(Notification.user_id == user_id)
+                .order_by(Notification.id.desc()).limit(limit)
+            ).scalars().all()
+
+
+class ChangeLogCRUD(CRUDOperations):
+    """Lectura del registro de cambios de precio (price_changes) por número de secuencia"""
+
+    def since(self, seq: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Eventos con seq > `seq`, en orden"""
+        with self.get_session() as session:
+            return [dict(row) for row in session.execute(
+                select(PriceChange.seq, PriceChange.rtr_id, PriceChange.old_price, PriceChange.new_price,
+                       PriceChange.record_date)
+                .where(PriceChange.seq > seq).order_by(PriceChange.seq).limit(limit)
+            ).mappings()]
+
+    def last_seq(self) -> int:
+        with self.get_session() as session:
+            return session.execute(select(func.coalesce(func.max(PriceChange.seq), 0))).scalar()
+
+
 # Instancias globales para usar en funciones independientes
 article_crud = ArticleCRUD(db_manager)
 price_record_crud = PriceRecordCRUD(db_manager)
 analytics_crud = AnalyticsCRUD(db_manager)
 last_price_crud = LastPriceCRUD(db_manager)
-user_crud = UserCRUD(db_manager)
\ No newline at end of file
+user_crud = UserCRUD(db_manager)
+ingestion_crud = IngestionCRUD(db_manager)
+job_crud = JobCRUD(db_manager)
+crawl_task_crud = CrawlTaskCRUD(db_manager)
+alert_crud = AlertCRUD(db_manager)
+change_log_crud = ChangeLogCRUD(db_manager)
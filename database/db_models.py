@@ -1,6 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy import ForeignKey
-from sqlalchemy import Date, func, String, Integer, Numeric, Boolean, DateTime
+from sqlalchemy import Date, func, String, Integer, Numeric, Boolean, DateTime, Index, Float, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
@@ -32,7 +32,7 @@ class Article(Base):
     status: Mapped[bool] = mapped_column(Boolean, default=True)
     
     # Relación con price_record
-    price_records: Mapped[list["PriceRecord"]] = relationship(back_populates="article")
+    price_records: Mapped[list["PriceRecord"]] = relationship(back_populates="article", order_by="PriceRecord.record_date")
     
     # Relación con last_price
     updated_price: Mapped["LastPrice"] = relationship(back_populates="article", uselist=False)
@@ -48,6 +48,11 @@ class PriceRecord(Base):
     
     # Relación con Articles
     article: Mapped["Article"] = relationship(back_populates="price_records")
+
+    # Todas las consultas de historial filtran por artículo y rango/orden de fechas
+    __table_args__ = (
+        Index("ix_price_records_rtr_id_record_date", "rtr_id", "record_date"),
+    )
     
 # Definir la tabla de ultimo precio
 class LastPrice(Base):
@@ -74,3 +79,133 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(timezone.utc))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     role: Mapped[str] = mapped_column(String, default="user")
+
+
+# Locks de trabajos programados (un trabajo no se solapa consigo mismo, ni entre procesos)
+class JobLock(Base):
+    __tablename__ = "job_locks"
+
+    name: Mapped[str] = mapped_column(String(200), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(200), nullable=False)
+    acquired_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+# Historial de ejecuciones de trabajos programados
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    category: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    owner: Mapped[str] = mapped_column(String(200), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="running")
+    duration_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    stats: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),
+    )
+
+
+# Cola de trabajo del crawl distribuido (orchestration.work_queue): una tarea por página de categoría
+class CrawlTask(Base):
+    __tablename__ = "crawl_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    crawl_id: Mapped[str] = mapped_column(String(50), nullable=False)
+    category: Mapped[str] = mapped_column(String(100), nullable=False)
+    category_url: Mapped[str] = mapped_column(String(500), nullable=False)
+    page: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | leased | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    products: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("crawl_id", "category", "page", name="uq_crawl_tasks_page"),
+        Index("ix_crawl_tasks_status_id", "status", "id"),
+    )
+
+
+# Productos vigilados por cada usuario: precio objetivo y/o bajada porcentual
+class Watch(Base):
+    __tablename__ = "watches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    rtr_id: Mapped[int] = mapped_column(Integer, ForeignKey("articles.rtr_id"), nullable=False)
+    target_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    drop_pct: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Último precio evaluado (cruce del objetivo) y máximo desde la última alerta (bajada %)
+    last_seen_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    drop_reference_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_notified_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "rtr_id", name="uq_watches_user_article"),
+        Index("ix_watches_rtr_id", "rtr_id"),
+    )
+
+
+# Cola de notificaciones generadas por la evaluación de alertas
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    watch_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    rtr_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    rule: Mapped[str] = mapped_column(String(20), nullable=False)  # target | drop
+    old_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    new_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    record_date: Mapped[date] = mapped_column(Date, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | sent | failed
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_notifications_status_id", "status", "id"),
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+    )
+
+
+# Registro de cambios de precio (feed incremental para consumidores: GET /changes?since=seq)
+class PriceChange(Base):
+    __tablename__ = "price_changes"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    rtr_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    old_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)  # None = artículo nuevo
+    new_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    record_date: Mapped[date] = mapped_column(Date, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # AUTOINCREMENT en SQLite: seq nunca se reutiliza aunque se borren filas
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+
+# Fila única que se bloquea (UPDATE) antes de añadir eventos a price_changes y hasta
+# el commit: los escritores se serializan y los seq quedan en orden de commit
+class ChangeLogLock(Base):
+    __tablename__ = "change_log_lock"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+# Hasta qué seq de price_changes se han evaluado las alertas
+class AlertCursor(Base):
+    __tablename__ = "alert_cursors"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
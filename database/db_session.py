@@ -1,12 +1,19 @@
 from contextlib import contextmanager
 # from typing import Optional, List
-from sqlalchemy import create_engine, select, join
+from datetime import datetime
+from sqlalchemy import create_engine, select, insert, join
 from sqlalchemy.orm import sessionmaker, Session as SQLSession
-from sqlalchemy.exc import SQLAlchemyError
-from .db_models import Base, Article, PriceRecord
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from .db_models import Base, Article, PriceRecord, ChangeLogLock
+from monitoring.query_stats import instrument_engine
+from monitoring.metrics import track_db_pool
 # from fastapi import HTTPException
 # from schemas.articles import ArticuloFullData, ArticuloResponse
 import logging
+import os
+
+# URL de la base de datos (sobreescribible por entorno, p.ej. para benchmarks)
+DATABASE_URL = os.getenv('RTR_DATABASE_URL', 'sqlite:///rtr_crawler_Alchemy.db')
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -15,8 +22,9 @@ logger = logging.getLogger(__name__)
 class DatabaseManager:
     """Clase para manejar las operaciones de base de datos"""
     
-    def __init__(self, database_url: str = 'sqlite:///rtr_crawler_Alchemy.db'):
+    def __init__(self, database_url: str = DATABASE_URL):
         self.engine = create_engine(database_url)
+        instrument_engine(self.engine)  # consultas/tiempo por petición y fase, log de lentas
         self.SessionLocal = sessionmaker(bind=self.engine)
     
     @contextmanager
@@ -36,14 +44,29 @@ class DatabaseManager:
         """Crear todas las tablas en la base de datos"""
         try:
             Base.metadata.create_all(self.engine)
+            # create_all no añade índices nuevos a tablas ya existentes
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
+            self._seed_change_log_lock()
             logger.info("Tables created successfully")
         except SQLAlchemyError as e:
             logger.error(f"Error creating tables: {e}")
             raise
 
+    def _seed_change_log_lock(self):
+        """Fila única de change_log_lock (la bloquea log_price_changes; nunca se crea al escribir)"""
+        try:
+            with self.engine.begin() as conn:
+                if conn.execute(select(ChangeLogLock.id).where(ChangeLogLock.id == 1)).first() is None:
+                    conn.execute(insert(ChangeLogLock).values(id=1, updated_at=datetime.now()))
+        except IntegrityError:
+            pass  # otro proceso la ha creado a la vez
+
 
 # Instancia global del database manager
 db_manager = DatabaseManager()
+track_db_pool(db_manager.engine)  # uso del pool en /metrics
 
 if __name__ == "__main__":
     #db_manager.create_tables()
@@ -0,0 +1,219 @@
+"""
+Exportación masiva de articles, price_records y last_price.
+
+Las filas se leen por lotes de EXPORT_BATCH_ROWS directamente del cursor
+(yield_per), así que la memoria no depende del tamaño de la exportación:
+
+- CSV: generador de bytes (StreamingResponse en la API o archivo/stdout).
+- Parquet / Arrow IPC: un RecordBatch por lote, escrito según se lee.
+  Requiere 'pyarrow' (dependencia opcional).
+
+    python -m database.exports price_records --format parquet --output prices.parquet
+    python -m database.exports price_records --category Coches --min-date 2025-01-01 > prices.csv
+"""
+from datetime import date
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+import argparse
+import csv
+import io
+import os
+import sys
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, select, type_coerce
+from sqlalchemy.types import NullType
+
+from .db_models import Article, PriceRecord, LastPrice
+from .db_session import db_manager
+
+try:  # Dependencia opcional
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+EXPORT_TABLES = {"articles": Article, "price_records": PriceRecord, "last_price": LastPrice}
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+EXPORT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+EXPORT_BATCH_ROWS = int(os.getenv("RTR_EXPORT_BATCH_ROWS", "50000"))
+CSV_FORMAT_CACHE = 65536
+
+
+def export_query(table: str, category: Optional[str] = None, min_date: Optional[date] = None,
+                 max_date: Optional[date] = None, raw: bool = False):
+    """
+    SELECT de todas las columnas de la tabla con los filtros, en orden de id.
+    raw=True: sin conversión de tipos en Python (precios y fechas tal como los
+    devuelve el driver; en SQLite float y texto ISO), para el CSV, que formatea
+    los Numeric con su escala (numeric_formats).
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}' (expected one of {', '.join(EXPORT_TABLES)})")
+    model = EXPORT_TABLES[table]
+    columns = model.__table__.columns
+    if raw:
+        columns = [type_coerce(column, NullType()).label(column.name) for column in columns]
+    query = select(*columns).order_by(model.id)
+    if category is not None:
+        query = query.where(Article.category == category) if model is Article else (
+            query.join(Article, Article.rtr_id == model.rtr_id).where(Article.category == category)
+        )
+    if min_date is not None or max_date is not None:
+        if model is Article:
+            raise ValueError("Date filters only apply to price_records and last_price")
+        if min_date is not None:
+            query = query.where(model.record_date >= min_date)
+        if max_date is not None:
+            query = query.where(model.record_date <= max_date)
+    return query
+
+
+def column_names(table: str) -> List[str]:
+    return [column.name for column in EXPORT_TABLES[table].__table__.columns]
+
+
+def numeric_formats(table: str) -> List[Tuple[int, str]]:
+    """(posición, formato) de las columnas Numeric: '993.2' o 12.345000000000001 -> '993.20', '12.35'"""
+    return [
+        (position, f".{column.type.scale}f")
+        for position, column in enumerate(EXPORT_TABLES[table].__table__.columns)
+        if isinstance(column.type, Numeric) and not isinstance(column.type, Float) and column.type.scale is not None
+    ]
+
+
+def iter_batches(query, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[list]:
+    """Listas de filas (tuplas) de como mucho batch_rows, leídas del cursor según se consumen"""
+    with db_manager.get_session() as session:
+        # Core (sin la capa de carga del ORM): tuplas directamente del cursor
+        result = session.connection().execution_options(yield_per=batch_rows).execute(query)
+        for partition in result.partitions():
+            yield partition
+
+
+def iter_csv(table: str, batch_rows: int = EXPORT_BATCH_ROWS, **filters) -> Iterator[bytes]:
+    """
+    CSV (UTF-8, con cabecera) en trozos de un lote. Los filtros se validan al
+    llamar (ValueError), no al empezar a consumir.
+    """
+    return _csv_chunks(export_query(table, raw=True, **filters), column_names(table), batch_rows,
+                       numeric_formats(table))
+
+
+def _csv_chunks(query, header: List[str], batch_rows: int,
+                formats: Sequence[Tuple[int, str]] = ()) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    # Los precios se repiten mucho: cada valor distinto se formatea una vez por columna
+    caches = [(position, _FormattedValues(spec)) for position, spec in formats]
+    for rows in iter_batches(query, batch_rows):
+        if caches:
+            columns = list(zip(*rows))
+            for position, cache in caches:
+                if len(cache) > CSV_FORMAT_CACHE:
+                    cache.clear()
+                columns[position] = map(cache.__getitem__, columns[position])
+            rows = zip(*columns)
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # exportación vacía: solo la cabecera
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _FormattedValues(dict):
+    """valor -> texto con el formato dado (None se queda en None), calculado al primer acceso"""
+
+    def __init__(self, spec: str):
+        super().__init__()
+        self.spec = spec
+
+    def __missing__(self, value):
+        text = self[value] = None if value is None else format(value, self.spec)
+        return text
+
+
+def arrow_schema(table: str):
+    """Esquema Arrow a partir de los tipos de las columnas (Numeric -> decimal128 exacto)"""
+    fields = []
+    for column in EXPORT_TABLES[table].__table__.columns:
+        column_type = column.type
+        if isinstance(column_type, Boolean):
+            arrow_type = pyarrow.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column_type, Float):
+            arrow_type = pyarrow.float64()
+        elif isinstance(column_type, Numeric):
+            arrow_type = pyarrow.decimal128(column_type.precision, column_type.scale)
+        elif isinstance(column_type, DateTime):
+            arrow_type = pyarrow.timestamp("us")
+        elif isinstance(column_type, Date):
+            arrow_type = pyarrow.date32()
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(column.name, arrow_type, nullable=column.nullable))
+    return pyarrow.schema(fields)
+
+
+def write_columnar(table: str, output: Path, fmt: str = "parquet", batch_rows: int = EXPORT_BATCH_ROWS,
+                   **filters) -> int:
+    """Escribe la exportación en Parquet o Arrow IPC (un RecordBatch por lote). Devuelve las filas."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet/Arrow exports require the 'pyarrow' package")
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown columnar format '{fmt}'")
+    query = export_query(table, **filters)
+    schema = arrow_schema(table)
+    rows_written = 0
+    tmp = output.with_name(output.name + ".tmp")
+    writer = (pyarrow.parquet.ParquetWriter(tmp, schema, compression="zstd") if fmt == "parquet"
+              else pyarrow.ipc.new_file(tmp, schema))
+    try:
+        for rows in iter_batches(query, batch_rows):
+            columns = list(zip(*rows))
+            batch = pyarrow.record_batch(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema,
+            )
+            writer.write_batch(batch)
+            rows_written += len(rows)
+    except BaseException:
+        writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    writer.close()
+    os.replace(tmp, output)
+    return rows_written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportar tablas en CSV, Parquet o Arrow")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", type=Path, help="Archivo de salida (CSV: por defecto stdout)")
+    parser.add_argument("--category")
+    parser.add_argument("--min-date", type=date.fromisoformat)
+    parser.add_argument("--max-date", type=date.fromisoformat)
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    filters = {"category": args.category, "min_date": args.min_date, "max_date": args.max_date}
+    if args.format != "csv" and args.output is None:
+        parser.error(f"--output is required for {args.format}")
+    try:
+        export_query(args.table, **filters)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == "csv":
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for chunk in iter_csv(args.table, args.batch_rows, **filters):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    else:
+        rows = write_columnar(args.table, args.output, args.format, args.batch_rows, **filters)
+        print(f"{rows} rows -> {args.output}", file=sys.stderr)
@@ -0,0 +1,127 @@
+from typing import List, Tuple, Any, Optional, Sequence
+from datetime import date, timedelta
+
+# Máximo de puntos que devuelve cualquier historial si el cliente no pide otro
+HISTORY_MAX_POINTS = 365
+
+HISTORY_MODES = ("raw", "changes", "weekly", "monthly", "lttb")
+
+# Un punto es una tupla (record_date, price, ...). Los campos extra (p.ej. el id
+# del registro) se conservan en los modos que devuelven un subconjunto.
+Point = Tuple[Any, ...]
+
+
+def change_points(points: Sequence[Point]) -> List[Point]:
+    """Conserva solo los puntos donde cambia el precio (más el primero y el último)"""
+    if len(points) <= 2:
+        return list(points)
+
+    result = [points[0]]
+    for point in points[1:-1]:
+        if point[1] != result[-1][1]:
+            result.append(point)
+    result.append(points[-1])
+    return result
+
+
+def _period_start(day: date, period: str) -> date:
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def ohlc_buckets(points: Sequence[Point], period: str = "weekly") -> List[dict]:
+    """Agrupa los puntos en buckets semanales/mensuales open/high/low/close"""
+    buckets: List[dict] = []
+    for point in points:
+        record_date, price = point[0], point[1]
+        start = _period_start(record_date, period)
+        if buckets and buckets[-1]["record_date"] == start:
+            bucket = buckets[-1]
+            bucket["high"] = max(bucket["high"], price)
+            bucket["low"] = min(bucket["low"], price)
+            bucket["close"] = price
+            bucket["price"] = price
+            bucket["samples"] += 1
+        else:
+            buckets.append({
+                "record_date": start,
+                "open": price,
+                "high": price,
+                "low": price,
+                "close": price,
+                "price": price,  # close, para consumidores que solo leen 'price'
+                "samples": 1,
+            })
+    return buckets
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Largest-Triangle-Three-Buckets: reduce la serie a `threshold` puntos
+    conservando su forma visual (picos y valles)."""
+    n = len(points)
+    if threshold >= n:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:max(threshold, 0)]
+
+    xs = [p[0].toordinal() for p in points]
+    ys = [float(p[1]) for p in points]
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Media del bucket siguiente (punto "C" del triángulo)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        # Punto del bucket actual que forma el triángulo de mayor área
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a])
+                - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > max_area:
+                max_area = area
+                chosen = j
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample(points: Sequence[Point], mode: str = "raw",
+               max_points: Optional[int] = HISTORY_MAX_POINTS) -> List[Any]:
+    """
+    Aplica el modo de muestreo pedido y garantiza como mucho `max_points` puntos.
+
+    Args:
+        points: Puntos ordenados por fecha.
+        mode: raw | changes | weekly | monthly | lttb
+        max_points: Cota superior del resultado (None = sin cota).
+
+    Returns:
+        Lista de puntos (modos raw/changes/lttb) o de dicts OHLC (weekly/monthly).
+    """
+    if mode not in HISTORY_MODES:
+        raise ValueError(f"Unknown history mode: {mode}")
+
+    if mode in ("weekly", "monthly"):
+        buckets = ohlc_buckets(points, mode)
+        if max_points is not None and len(buckets) > max_points:
+            buckets = buckets[-max_points:]  # los buckets más recientes
+        return buckets
+
+    result = change_points(points) if mode == "changes" else list(points)
+    if max_points is not None and len(result) > max_points:
+        result = lttb(result, max_points)
+    return result
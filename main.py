@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
 #import schemas
 from typing import List
@@ -7,15 +8,33 @@ from database.crud_operations import article_crud
 from database.db_session import db_manager
 from database.db_models import Article
 from sqlalchemy import select
-from routers import articles, categories, analytics, users, login
+from routers import articles, categories, analytics, users, login, monitoring, exports, watchlist, changes
+from monitoring.middleware import QueryStatsMiddleware, MetricsMiddleware
+from web.compression import CompressionMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tablas e índices nuevos (p.ej. job_runs) al arrancar el servidor, no al importar el módulo
+    db_manager.create_tables()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)  # la más interna: las métricas incluyen el tiempo de compresión
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(articles.router)
 app.include_router(categories.router)
 app.include_router(analytics.router)
 app.include_router(users.router)
 app.include_router(login.router)
+app.include_router(watchlist.router)
+app.include_router(changes.router)
+app.include_router(exports.router)
+app.include_router(monitoring.router)
+app.include_router(monitoring.metrics_router)
 
 
 @app.get("/", tags=["Index"])
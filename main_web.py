@@ -1,14 +1,33 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Query
+from typing import Optional
+from datetime import date
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from database.crud_operations import article_crud, price_record_crud, analytics_crud
+from database.db_session import db_manager
+from monitoring.middleware import QueryStatsMiddleware, MetricsMiddleware
+from web.compression import CompressionMiddleware, PrecompressedStaticFiles
+from routers import monitoring
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tablas e índices nuevos (p.ej. job_runs) al arrancar el servidor, no al importar el módulo
+    db_manager.create_tables()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)  # la más interna: las métricas incluyen el tiempo de compresión
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.include_router(monitoring.router)
+app.include_router(monitoring.metrics_router)
 
 # Configura los templates y los archivos estáticos
 templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -37,15 +56,22 @@ async def search_products(request: Request, q: str = ""):
 
 
 @app.get("/products/{rtr_id}", response_class=HTMLResponse)
-async def product_detail(request: Request, rtr_id: int):
+async def product_detail(
+    request: Request,
+    rtr_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    modo: str = Query("changes", pattern="^(raw|changes|weekly|monthly|lttb)$"),
+):
     # Obtén el producto por su rtr_id
     product = article_crud.get_by_rtr_id(rtr_id)
-    # Obtén el historial de precios (ajusta según tu modelo)
-    price_history = price_record_crud.get_price_history(rtr_id)
+    # Historial acotado: por defecto solo los cambios de precio, como mucho HISTORY_MAX_POINTS filas
+    price_history = price_record_crud.get_price_history(rtr_id, desde, hasta, modo)
     return templates.TemplateResponse("product_detail.html", {
         "request": request,
         "product": product,
         "price_history": price_history,
+        "history_mode": modo,
         "active_page": "products"
     })
 
@@ -0,0 +1,301 @@
+"""
+Métricas en formato de exposición de Prometheus (text/plain; version=0.0.4).
+
+Registro propio y mínimo (Counter, Gauge, Histogram con etiquetas), sin
+dependencias: lo exporta la ruta /metrics de las apps y el pipeline lo envía
+a un Pushgateway al terminar cada crawl si RTR_PUSHGATEWAY_URL está definido.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from urllib.parse import quote
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import math
+import os
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+PUSHGATEWAY_URL = os.getenv("RTR_PUSHGATEWAY_URL")
+PUSH_TIMEOUT = 5
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets por defecto (segundos), los mismos que usa prometheus_client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+PHASE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] | None = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base: una familia de series indexadas por los valores de sus etiquetas"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: str):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._series.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._series.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            # [conteos por bucket (no acumulados) + overflow, suma]
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas y 'collectors' (callbacks que actualizan gauges al exportar)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Registro global
+registry = Registry()
+
+# --- API (FastAPI) ---
+http_requests_total = registry.counter(
+    "rtr_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "rtr_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_requests_in_flight = registry.gauge(
+    "rtr_http_requests_in_flight", "HTTP requests currently being handled")
+http_responses_compressed_total = registry.counter(
+    "rtr_http_responses_compressed_total", "Compressed responses by encoding and source (live, cache, stream, static)",
+    ("encoding", "source"))
+http_compression_saved_bytes_total = registry.counter(
+    "rtr_http_compression_saved_bytes_total", "Response bytes saved by on-the-fly compression")
+
+# --- Base de datos (actualizadas por collect_db_pool al exportar) ---
+db_pool_size = registry.gauge("rtr_db_pool_size", "Configured connection pool size")
+db_pool_checked_out = registry.gauge("rtr_db_pool_checked_out", "Connections currently in use")
+db_pool_overflow = registry.gauge("rtr_db_pool_overflow", "Connections opened beyond the pool size")
+
+# --- Autenticación (pool de bcrypt) ---
+auth_hash_duration = registry.histogram(
+    "rtr_auth_hash_duration_seconds", "bcrypt hash/verify duration", ("operation",))
+auth_hash_pending = registry.gauge(
+    "rtr_auth_hash_pending", "Password hashing operations queued or running")
+auth_hash_rejected_total = registry.counter(
+    "rtr_auth_hash_rejected_total", "Password hashing requests rejected because the pool was saturated")
+login_attempts_total = registry.counter(
+    "rtr_login_attempts_total", "Login attempts by throttle decision", ("result",))
+login_throttled_total = registry.counter(
+    "rtr_login_throttled_total", "Login attempts rejected by the throttle, by limit hit", ("scope",))
+login_throttle_keys = registry.gauge(
+    "rtr_login_throttle_keys", "Usernames and IPs tracked by the login throttle")
+
+# --- Cachés (hit ratio = hits / (hits + misses)) ---
+cache_requests_total = registry.counter(
+    "rtr_cache_requests_total", "Cache lookups by result", ("cache", "result"))
+
+# --- Pipeline de scraping ---
+scraper_pages_fetched_total = registry.counter(
+    "rtr_scraper_pages_fetched_total", "Pages downloaded by the scraper")
+scraper_bytes_downloaded_total = registry.counter(
+    "rtr_scraper_bytes_downloaded_total", "Bytes of HTML downloaded by the scraper")
+scraper_fetch_duration = registry.histogram(
+    "rtr_scraper_fetch_duration_seconds", "Page download latency")
+scraper_products_parsed_total = registry.counter(
+    "rtr_scraper_products_parsed_total", "Products parsed from listing pages")
+pipeline_rows_inserted_total = registry.counter(
+    "rtr_pipeline_rows_inserted_total", "Rows written by the pipeline", ("table",))
+pipeline_phase_duration = registry.histogram(
+    "rtr_pipeline_phase_duration_seconds", "Duration of pipeline phases", ("phase",), PHASE_BUCKETS)
+pipeline_runs_total = registry.counter(
+    "rtr_pipeline_runs_total", "Pipeline runs by result", ("status",))
+pipeline_last_run_timestamp = registry.gauge(
+    "rtr_pipeline_last_run_timestamp_seconds", "Unix time of the last finished pipeline run", ("status",))
+queue_tasks_total = registry.counter(
+    "rtr_queue_tasks_total", "Crawl work-queue tasks processed by result", ("result",))
+alert_notifications_total = registry.counter(
+    "rtr_alert_notifications_total", "Watchlist notifications queued by rule", ("rule",))
+change_stream_clients = registry.gauge("rtr_change_stream_clients", "Open /changes/stream connections")
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def observe_fetch(url: str, html: str, elapsed: float):
+    """Listener de scrap.engine.page_parser (fn(url, html, elapsed))"""
+    scraper_pages_fetched_total.inc()
+    scraper_bytes_downloaded_total.inc(len(html.encode("utf-8")))
+    scraper_fetch_duration.observe(elapsed)
+
+
+def track_db_pool(engine):
+    """Exporta el uso del pool de conexiones del engine (si el pool lo soporta)"""
+    pool = engine.pool
+
+    def collect():
+        if hasattr(pool, "checkedout"):
+            db_pool_checked_out.set(pool.checkedout())
+        if hasattr(pool, "size"):
+            db_pool_size.set(pool.size())
+        if hasattr(pool, "overflow"):
+            db_pool_overflow.set(max(pool.overflow(), 0))
+
+    registry.add_collector(collect)
+
+
+def push_metrics(job: str, gateway_url: Optional[str] = PUSHGATEWAY_URL, **grouping: str) -> bool:
+    """
+    Envía el registro completo a un Pushgateway (PUT /metrics/job/<job>/<label>/<value>...).
+    No lanza excepciones: un fallo de monitorización no debe romper el crawl.
+    """
+    if not gateway_url:
+        return False
+    url = f"{gateway_url.rstrip('/')}/metrics/job/{quote(job, safe='')}"
+    for label, value in grouping.items():
+        url += f"/{label}/{quote(str(value), safe='')}"
+    try:
+        response = requests.put(url, data=registry.render().encode("utf-8"),
+                                headers={"Content-Type": CONTENT_TYPE}, timeout=PUSH_TIMEOUT)
+        response.raise_for_status()
+        return True
+    except requests.RequestException as e:
+        logger.warning(f"Pushgateway push failed ({url}): {e}")
+        return False
@@ -0,0 +1,80 @@
+"""Middlewares ASGI de monitorización."""
+import time
+
+from monitoring.query_stats import begin_scope, end_scope
+from monitoring.metrics import http_requests_total, http_request_duration, http_requests_in_flight
+
+
+def route_name(scope) -> str:
+    """Plantilla de la ruta (p.ej. /articles/{article_id}) para agrupar; el path si no hay ruta"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+class QueryStatsMiddleware:
+    """
+    Atribuye las consultas SQL de cada petición HTTP a su ruta y las expone en la
+    respuesta: Server-Timing (db, app) y X-DB-Queries.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_scope("")
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_time_ms:.2f};desc="{stats.statements} queries", app;dur={app_ms:.2f}'.encode(),
+                ))
+                headers.append((b"x-db-queries", str(stats.statements).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # El nombre se conoce tras el enrutado
+            stats.name = f"{scope.get('method', 'GET')} {route_name(scope)}"
+            end_scope(stats, token)
+
+
+class MetricsMiddleware:
+    """Latencia por ruta, peticiones por código de estado y peticiones en curso (Prometheus)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            method, route = scope.get("method", "GET"), route_name(scope)
+            # Rutas inexistentes se agrupan para no disparar la cardinalidad
+            if scope.get("route") is None:
+                route = "<unmatched>"
+            http_request_duration.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests_total.inc(method=method, route=route, status=str(status["code"]))
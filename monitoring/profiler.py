@@ -0,0 +1,245 @@
+"""
+Perfilado opcional del pipeline (MasterOrchestrator.run_complete_pipeline).
+
+Genera un informe por ejecución con tiempo de pared y CPU por fase, tiempos por
+categoría, páginas más lentas (separando descarga de parseo/validación) y
+conteos de artículos insertados/sin cambios/descartados. Opcionalmente añade
+un perfil cProfile o pyinstrument. Los informes se guardan como JSON en
+RUN_REPORT_DIR para poder comparar ejecuciones:
+
+    python -m monitoring.profiler [--last 10]      # tabla de las últimas ejecuciones
+    python -m monitoring.profiler --show <run_id>  # informe completo
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import argparse
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+
+from scrap.engine import page_parser, extractor
+
+try:  # Dependencia opcional
+    import pyinstrument
+except ImportError:  # pragma: no cover
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+RUN_REPORT_DIR = Path(os.getenv("RTR_RUN_REPORT_DIR", "run_reports"))
+# None (sin perfilado) | "phases" (solo informe) | "cprofile" | "pyinstrument"
+PIPELINE_PROFILE = os.getenv("RTR_PIPELINE_PROFILE") or None
+PROFILE_MODES = ("phases", "cprofile", "pyinstrument")
+SLOWEST_PAGES = 20
+PROFILE_TOP_FUNCTIONS = 30
+
+
+@dataclass
+class PhaseTiming:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"wall_s": round(self.wall, 4), "cpu_s": round(self.cpu, 4), "calls": self.calls}
+
+
+class RunProfiler:
+    """
+    Recoge los tiempos de una ejecución del pipeline. Usar como context manager:
+    al salir se desenganchan los listeners y, si está activo, se guarda el informe.
+
+    El CPU es el del proceso (incluye los hilos de scraping). cProfile solo
+    perfila el hilo que ejecuta el pipeline; con max_workers > 1 conviene
+    pyinstrument o repetir con un solo worker.
+    """
+
+    def __init__(self, mode: Optional[str] = None, category: Optional[str] = None,
+                 report_dir: Path = RUN_REPORT_DIR):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {PROFILE_MODES})")
+        if mode == "pyinstrument" and pyinstrument is None:
+            logger.warning("pyinstrument not installed, falling back to cProfile")
+            mode = "cprofile"
+        self.mode = mode
+        self.enabled = mode is not None
+        self.category = category
+        self.report_dir = report_dir
+        self.run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{category or 'all'}"
+        self.status: Optional[str] = None
+        self.report_path: Optional[Path] = None
+        self.phases: Dict[str, PhaseTiming] = {}
+        self.counts: Dict[str, int] = {}
+        self.pages: List[Dict[str, Any]] = []
+        self._fetches: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    # --- Medición ---
+    @contextmanager
+    def phase(self, name: str):
+        """Acumula tiempo de pared y CPU en la fase `name` (se puede llamar muchas veces)"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            timing = self.phases.setdefault(name, PhaseTiming())
+            timing.wall += time.perf_counter() - wall
+            timing.cpu += time.process_time() - cpu
+            timing.calls += 1
+
+    def count(self, key: str, amount: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def _on_fetch(self, url: str, html: str, elapsed: float):
+        with self._lock:
+            self._fetches[url] = elapsed
+
+    def _on_page(self, url: str, category: str, products: int, elapsed: float):
+        with self._lock:
+            fetch = self._fetches.pop(url, 0.0)
+            self.pages.append({
+                "url": url,
+                "category": category,
+                "products": products,
+                "wall_s": round(elapsed, 4),
+                "fetch_s": round(fetch, 4),
+                "parse_s": round(max(elapsed - fetch, 0.0), 4),
+            })
+
+    # --- Ciclo de vida ---
+    def __enter__(self):
+        self.started = datetime.now()
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        if not self.enabled:
+            return self
+        page_parser.add_fetch_listener(self._on_fetch)
+        extractor.add_page_listener(self._on_page)
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "pyinstrument":
+            self._profiler = pyinstrument.Profiler()
+            self._profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._wall
+        self.cpu = time.process_time() - self._cpu
+        if exc_type is not None and self.status is None:
+            self.status = "error"
+        if not self.enabled:
+            return
+        if self.mode == "cprofile":
+            self._profiler.disable()
+        elif self.mode == "pyinstrument":
+            self._profiler.stop()
+        page_parser.remove_fetch_listener(self._on_fetch)
+        extractor.remove_page_listener(self._on_page)
+        try:
+            self.report_path = self.save()
+            logger.info(f"Run report saved to {self.report_path}")
+        except OSError as e:
+            logger.warning(f"Could not save run report: {e}")
+
+    # --- Informe ---
+    def _categories(self) -> Dict[str, Dict[str, Any]]:
+        categories: Dict[str, Dict[str, Any]] = {}
+        for page in self.pages:
+            cat = categories.setdefault(page["category"], {"pages": 0, "products": 0, "wall_s": 0.0, "fetch_s": 0.0})
+            cat["pages"] += 1
+            cat["products"] += page["products"]
+            cat["wall_s"] += page["wall_s"]
+            cat["fetch_s"] += page["fetch_s"]
+        for cat in categories.values():
+            cat["wall_s"], cat["fetch_s"] = round(cat["wall_s"], 4), round(cat["fetch_s"], 4)
+        return dict(sorted(categories.items(), key=lambda kv: kv[1]["wall_s"], reverse=True))
+
+    def _save_profile(self) -> Optional[Dict[str, Any]]:
+        if self.mode == "cprofile":
+            path = self.report_dir / f"run_{self.run_id}.prof"
+            self._profiler.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            return {"file": str(path), "top": out.getvalue().splitlines()}
+        if self.mode == "pyinstrument":
+            path = self.report_dir / f"run_{self.run_id}.html"
+            path.write_text(self._profiler.output_html(), encoding="utf-8")
+            return {"file": str(path), "top": self._profiler.output_text(unicode=False).splitlines()}
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        fetch_total = sum(self._fetches.values()) + sum(p["fetch_s"] for p in self.pages)
+        return {
+            "run_id": self.run_id,
+            "started": self.started.isoformat(timespec="seconds"),
+            "category": self.category,
+            "mode": self.mode,
+            "status": self.status,
+            "wall_s": round(self.wall, 4),
+            "cpu_s": round(self.cpu, 4),
+            "phases": {name: timing.as_dict() for name, timing in self.phases.items()},
+            "counts": dict(self.counts),
+            "categories": self._categories(),
+            "pages": {
+                "count": len(self.pages),
+                # Descargas sin página de productos asociada (árbol de categorías, paginación)
+                "other_fetches": len(self._fetches),
+                "fetch_s_total": round(fetch_total, 4),
+                "slowest": sorted(self.pages, key=lambda p: p["wall_s"], reverse=True)[:SLOWEST_PAGES],
+            },
+        }
+
+    def save(self) -> Path:
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / f"run_{self.run_id}.json"
+        suffix = 1
+        while path.exists():  # dos ejecuciones en el mismo segundo
+            suffix += 1
+            path = self.report_dir / f"run_{self.run_id}-{suffix}.json"
+        self.run_id = path.stem[len("run_"):]
+        report = self.report()
+        report["profile"] = self._save_profile()
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+def load_reports(report_dir: Path = RUN_REPORT_DIR, last: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Informes guardados, del más antiguo al más reciente"""
+    paths = sorted(report_dir.glob("run_*.json"), key=lambda p: p.stat().st_mtime)
+    if last:
+        paths = paths[-last:]
+    return [json.loads(p.read_text(encoding="utf-8")) for p in paths]
+
+
+def print_reports(reports: List[Dict[str, Any]]):
+    phases = sorted({name for r in reports for name in r["phases"]})
+    counts = sorted({name for r in reports for name in r["counts"]})
+    columns = ["status", "wall_s", "cpu_s"] + [f"{p}_s" for p in phases] + counts
+    print("\t".join(["run_id"] + columns))
+    for r in reports:
+        row = [r["run_id"], str(r["status"]), f"{r['wall_s']:.1f}", f"{r['cpu_s']:.1f}"]
+        row += [f"{r['phases'][p]['wall_s']:.1f}" if p in r["phases"] else "-" for p in phases]
+        row += [str(r["counts"].get(c, "-")) for c in counts]
+        print("\t".join(row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Informes de ejecución del pipeline")
+    parser.add_argument("--dir", type=Path, default=RUN_REPORT_DIR)
+    parser.add_argument("--last", type=int, default=10, help="Número de ejecuciones a listar")
+    parser.add_argument("--show", help="Mostrar el informe completo de un run_id")
+    args = parser.parse_args()
+
+    if args.show:
+        print((args.dir / f"run_{args.show}.json").read_text(encoding="utf-8"))
+    else:
+        print_reports(load_reports(args.dir, args.last))
@@ -0,0 +1,162 @@
+"""
+Instrumentación de consultas SQL basada en eventos de SQLAlchemy.
+
+Cada consulta se atribuye al "scope" activo (una petición HTTP o una fase del
+pipeline) mediante un ContextVar: número de sentencias y tiempo acumulado en
+base de datos. Las consultas lentas se registran con su plan de ejecución.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import os
+import threading
+import time
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("monitoring.slow_queries")
+
+# Umbral de consulta lenta (ms)
+SLOW_QUERY_MS = float(os.getenv("RTR_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = 50
+
+
+@dataclass
+class QueryStats:
+    """Contadores de un scope (petición o fase)"""
+    name: str
+    statements: int = 0
+    db_time: float = 0.0
+    slow: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def db_time_ms(self) -> float:
+        return self.db_time * 1000
+
+
+@dataclass
+class ScopeTotals:
+    """Acumulado por nombre de scope desde el arranque"""
+    count: int = 0
+    statements: int = 0
+    db_time: float = 0.0
+    max_statements: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "statements": self.statements,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "avg_statements": round(self.statements / self.count, 2) if self.count else 0,
+            "avg_db_time_ms": round(self.db_time * 1000 / self.count, 3) if self.count else 0,
+            "max_statements": self.max_statements,
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_totals: Dict[str, ScopeTotals] = {}
+_totals_lock = threading.Lock()
+slow_queries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_slow_thresholds: "WeakKeyDictionary[Engine, float]" = WeakKeyDictionary()
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def begin_scope(name: str) -> Tuple[QueryStats, Token]:
+    stats = QueryStats(name)
+    return stats, _current.set(stats)
+
+
+def end_scope(stats: QueryStats, token: Token):
+    _current.reset(token)
+    record_scope(stats)
+
+
+@contextmanager
+def query_scope(name: str):
+    """Atribuye a `name` todas las consultas ejecutadas dentro del bloque.
+    Los scopes anidados no suman al exterior: cada consulta cuenta una vez."""
+    stats, token = begin_scope(name)
+    try:
+        yield stats
+    finally:
+        end_scope(stats, token)
+
+
+def record_scope(stats: QueryStats):
+    with _totals_lock:
+        totals = _totals.setdefault(stats.name, ScopeTotals())
+        totals.count += 1
+        totals.statements += stats.statements
+        totals.db_time += stats.db_time
+        totals.max_statements = max(totals.max_statements, stats.statements)
+
+
+def scope_totals() -> Dict[str, Dict[str, Any]]:
+    with _totals_lock:
+        return {name: totals.as_dict() for name, totals in sorted(_totals.items())}
+
+
+def reset_totals():
+    with _totals_lock:
+        _totals.clear()
+    slow_queries.clear()
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """Plan de ejecución con un cursor DBAPI aparte (no dispara eventos)"""
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"(explain failed: {e})"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= _slow_thresholds.get(conn.engine, SLOW_QUERY_MS):
+        plan = None if executemany else _explain(conn, statement, parameters)
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "scope": stats.name if stats else None,
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "plan": plan,
+        }
+        slow_queries.append(entry)
+        if stats is not None:
+            stats.slow.append(entry)
+        slow_logger.warning(
+            f"Slow query ({entry['duration_ms']} ms, scope={entry['scope']}): {statement}\nPlan:\n{plan}"
+        )
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float = SLOW_QUERY_MS):
+    """Registra los listeners de instrumentación en el engine (una sola vez)"""
+    _slow_thresholds[engine] = slow_query_ms
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,76 @@
+"""
+Alertas de precio de las listas de seguimiento (watches).
+
+Tras cada ejecución del pipeline (MasterOrchestrator.run_complete_pipeline y
+el fin de un crawl distribuido) se evalúan en bloque los cambios de precio
+registrados desde la evaluación anterior contra todas las reglas (alert_crud.evaluate) y
+las coincidencias quedan en la cola de notificaciones. El envío es aparte:
+dispatch_notifications() entrega las pendientes a un `sender` (por defecto se
+registran en el log; aquí se conectaría correo, webhook, etc.).
+
+    python -m orchestration.alerts evaluate
+    python -m orchestration.alerts dispatch [--limit 100]
+    python -m orchestration.alerts pending
+"""
+from typing import Callable, Dict, Any
+import argparse
+import logging
+
+from database.crud_operations import alert_crud
+from database.db_models import Notification
+from database.db_session import db_manager
+from monitoring import metrics
+from monitoring.query_stats import query_scope
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH = 100
+
+
+def evaluate_alerts() -> Dict[str, Any]:
+    """Evalúa las reglas contra los precios nuevos. Devuelve los contadores de alert_crud.evaluate."""
+    with query_scope("pipeline:alerts"), metrics.pipeline_phase_duration.time(phase="alerts"):
+        result = alert_crud.evaluate()
+    for rule in ("target", "drop"):
+        metrics.alert_notifications_total.inc(result[rule], rule=rule)
+    logger.info(f"Alerts evaluated: {result}")
+    return result
+
+
+def log_sender(notification: Notification):
+    logger.info(f"Price alert for user {notification.user_id}: {notification.rtr_id} {notification.rule} "
+                f"{notification.old_price} -> {notification.new_price} ({notification.record_date})")
+
+
+def dispatch_notifications(sender: Callable[[Notification], Any] = log_sender, limit: int = DISPATCH_BATCH) -> Dict[str, int]:
+    """Entrega las notificaciones pendientes (como mucho `limit`) y las marca como sent/failed"""
+    sent, failed = [], []
+    for notification in alert_crud.pending_notifications(limit):
+        try:
+            sender(notification)
+            sent.append(notification.id)
+        except Exception as e:
+            logger.warning(f"Notification {notification.id} failed: {e}")
+            failed.append(notification.id)
+    alert_crud.mark_notifications(sent, "sent")
+    alert_crud.mark_notifications(failed, "failed")
+    return {"sent": len(sent), "failed": len(failed)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alertas de precio de las listas de seguimiento")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("evaluate", help="Evaluar las reglas contra los precios nuevos")
+    dispatch = commands.add_parser("dispatch", help="Enviar las notificaciones pendientes")
+    dispatch.add_argument("--limit", type=int, default=DISPATCH_BATCH)
+    commands.add_parser("pending", help="Listar las notificaciones pendientes")
+    args = parser.parse_args()
+
+    db_manager.create_tables()  # watches, notifications, alert_cursors
+    if args.command == "evaluate":
+        print(evaluate_alerts())
+    elif args.command == "dispatch":
+        print(dispatch_notifications(limit=args.limit))
+    elif args.command == "pending":
+        for n in alert_crud.pending_notifications(1000):
+            print(n.id, n.user_id, n.rtr_id, n.rule, n.old_price, n.new_price, n.record_date)
@@ -0,0 +1,111 @@
+"""
+Estado del crawl incremental: huella de la primera página de cada categoría.
+
+Si la huella (ids + precios de los productos de la página 1) coincide con la de
+la última ejecución, la categoría se da por no modificada y no se recorren el
+resto de sus páginas. Un cambio en páginas posteriores sin reflejo en la
+primera no se detecta hasta el siguiente crawl completo de la categoría, que se
+fuerza cuando han pasado FULL_CRAWL_INTERVAL_HOURS desde el último.
+
+    python -m orchestration.crawl_state            # ver el estado
+    python -m orchestration.crawl_state --reset    # forzar crawl completo la próxima vez
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CRAWL_STATE_FILE = Path(os.getenv("RTR_CRAWL_STATE", "temp_data/crawl_state.json"))
+# Cada cuántas horas se fuerza un crawl completo de cada categoría
+FULL_CRAWL_INTERVAL_HOURS = float(os.getenv("RTR_FULL_CRAWL_HOURS", "24"))
+# Crawl incremental por defecto en MasterOrchestrator.run_complete_pipeline
+INCREMENTAL_CRAWL = os.getenv("RTR_INCREMENTAL_CRAWL", "0") == "1"
+
+
+def category_fingerprint(products: Iterable[Any]) -> str:
+    """Huella de una página de listado: ids y precios, sin depender del orden"""
+    entries = sorted(f"{p.rtr_id}:{p.price}" for p in products)
+    return hashlib.sha1("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """Huellas y fecha del último crawl completo por categoría (JSON en disco)"""
+
+    _save_lock = threading.Lock()  # varias instancias (trabajos en paralelo) sobre el mismo archivo
+
+    def __init__(self, path: Path = CRAWL_STATE_FILE,
+                 full_crawl_interval: timedelta = timedelta(hours=FULL_CRAWL_INTERVAL_HOURS)):
+        self.path = path
+        self.full_crawl_interval = full_crawl_interval
+        self._lock = threading.Lock()
+        self._touched = set()
+        self.data: Dict[str, Any] = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path.exists():
+            try:
+                return json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                logger.warning(f"Corrupt crawl state {self.path}, starting from scratch")
+        return {"categories": {}}
+
+    def is_unchanged(self, category: str, fingerprint: str, now: Optional[datetime] = None) -> bool:
+        """La categoría se puede saltar: misma huella y crawl completo reciente"""
+        entry = self.data["categories"].get(category)
+        if entry is None or entry["fingerprint"] != fingerprint or not entry.get("last_crawled"):
+            return False
+        last_crawled = datetime.fromisoformat(entry["last_crawled"])
+        return (now or datetime.now()) - last_crawled < self.full_crawl_interval
+
+    def record(self, category: str, fingerprint: str, pages: Optional[int] = None, crawled: bool = True):
+        """
+        Guarda la huella de la categoría (en memoria; persistir con save()).
+        crawled=False: solo se comprobó la primera página (sin cambios).
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            entry = self.data["categories"].setdefault(category, {"pages": None, "last_crawled": None})
+            entry["fingerprint"] = fingerprint
+            entry["last_checked"] = now
+            if crawled:
+                entry["last_crawled"] = now
+                entry["pages"] = pages
+            self._touched.add(category)
+
+    def save(self):
+        """
+        Escritura atómica de las categorías registradas por esta instancia, sobre
+        el estado actual del archivo (no pisa lo que hayan guardado otros trabajos).
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._save_lock, self._lock:
+            current = self._load()
+            for category in self._touched:
+                current["categories"][category] = self.data["categories"][category]
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.data = current
+            self._touched.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estado del crawl incremental")
+    parser.add_argument("--path", type=Path, default=CRAWL_STATE_FILE)
+    parser.add_argument("--reset", action="store_true", help="Borrar el estado (el próximo crawl será completo)")
+    args = parser.parse_args()
+
+    if args.reset:
+        args.path.unlink(missing_ok=True)
+        print(f"Removed {args.path}")
+    else:
+        state = CrawlState(args.path)
+        for name, entry in sorted(state.data["categories"].items()):
+            print(f"{name}: pages={entry['pages']} crawled={entry['last_crawled']} checked={entry['last_checked']}")
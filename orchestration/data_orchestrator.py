@@ -1,10 +1,14 @@
 from scrap.schemas.schema_product import Product
-from orchestration.utils.pydantic_conversion import product_to_articlecreate
+from orchestration.utils.pydantic_conversion import product_to_articlecreate, product_to_json_dict
+from orchestration.utils.snapshot_io import (
+    SnapshotWriter, iter_snapshot, read_snapshot_meta, snapshot_path,
+    SNAPSHOT_PATTERNS, META_SUFFIX,
+)
 import json
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Optional, Union
+from typing import Dict, Any, List, Tuple, Optional, Union, Iterator, Iterable
 import logging
 from schemas.articles import ArticleCreate
 from decimal import Decimal
@@ -15,62 +19,80 @@ logger = logging.getLogger(__name__)
 TEMP_DIR = Path("temp_data")
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Compresión de los snapshots: None | "gzip" | "zstd" (requiere 'zstandard')
+TEMP_COMPRESSION = "gzip"
+
 class DataOrchestrator:
     def __init__(self, scraped_data: List[Product]):
         # Dependency injection
         self.scraped_data = scraped_data
 
-    def save_to_temp_file(self, prefix: str = "scraped") -> Path:
+    def open_temp_writer(self, prefix: str = "scraped", compression: Optional[str] = TEMP_COMPRESSION) -> SnapshotWriter:
         """
-        Guarda datos scrapeados a un archivo JSON temporal.
+        Abre un snapshot NDJSON para ir escribiendo registros según se scrapean.
         
         Args:
             prefix: Para componer el nombre del archivo
+            compression: None | "gzip" | "zstd"
         
         Returns:
-            Ruta del archivo creado.
+            SnapshotWriter (usar como context manager o llamar a close()).
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_file = TEMP_DIR / f"{prefix}_{timestamp}.json"
-        
-        # Convertir tuplas a formato serializable
-        serializable_data = []
-        for item in self.scraped_data:
+        temp_file = snapshot_path(TEMP_DIR, prefix, timestamp, compression)
+        return SnapshotWriter(temp_file, prefix=prefix, timestamp=timestamp)
+
+    @staticmethod
+    def serialize_item(item: Product) -> Dict[str, Any]:
+        """Producto -> dict serializable (precio como string para no perder decimales)"""
+        return product_to_json_dict(item)
+
+    def write_items(self, writer: SnapshotWriter, items: Iterable[Product]) -> int:
+        """Añade productos a un snapshot abierto. Devuelve cuántos se escribieron."""
+        written = 0
+        for item in items:
             try:
-                article = product_to_articlecreate(item)
-                
-                data = article.model_dump()
-                
-                if isinstance(data.get("price"), Decimal):
-                    data["price"] = float(data["price"])
-                if isinstance(data.get("price_date"), date):
-                    data["price_date"] = str(data["price_date"])
-                
-                serializable_data.append(data)
+                writer.write(self.serialize_item(item))
+                written += 1
             except Exception as e:
                 logger.warning(f"Invalid data structure skipped: {item}")
-        
-        # Guardar datos y metadatos
-        temp_data = {
-        'timestamp': timestamp,
-        'data': serializable_data
-        }
+        return written
 
-        with open(temp_file, 'w', encoding='utf-8') as file:
-            json.dump(temp_data, file, indent=2, ensure_ascii=False)
+    def save_to_temp_file(self, prefix: str = "scraped", compression: Optional[str] = TEMP_COMPRESSION) -> Path:
+        """
+        Guarda datos scrapeados a un snapshot NDJSON temporal, registro a registro.
         
-        logger.info(f"Data saved temporarily to: {temp_file}")
-        logger.info(f"Total items saved: {len(serializable_data)}")
+        Args:
+            prefix: Para componer el nombre del archivo
+            compression: None | "gzip" | "zstd"
+        
+        Returns:
+            Ruta del archivo creado.
+        """
+        with self.open_temp_writer(prefix, compression) as writer:
+            self.write_items(writer, self.scraped_data)
+        
+        logger.info(f"Data saved temporarily to: {writer.path}")
+        logger.info(f"Total items saved: {writer.count}")
+
+        return writer.path
 
+    def iter_temp_file(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros de un snapshot en streaming (memoria acotada).
         
-        return temp_file
+        Args:
+            file_path (Path): Ruta al snapshot (.ndjson[.gz|.zst] o .json antiguo).
+        """
+        return iter_snapshot(file_path)
     
     def load_from_temp_file(self, file_path: Path) -> Optional[dict]:
         """
-        Carga datos scrapeados desde un archivo JSON temporal.
+        Carga datos scrapeados desde un snapshot temporal.
+        Materializa todos los registros: para archivos grandes usar iter_temp_file.
         
         Args:
-            file_path (Path): Ruta al archivo JSON a cargar.
+            file_path (Path): Ruta al archivo a cargar.
         
         Returns:
             dict con los datos cargados, o None si hay error.
@@ -79,8 +101,11 @@ class DataOrchestrator:
             logger.error(f"El archivo {file_path} no existe.")
             return None
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            meta = read_snapshot_meta(file_path)
+            data = {
+                'timestamp': meta['header'].get('timestamp'),
+                'data': list(iter_snapshot(file_path)),
+            }
             logger.info(f"Datos cargados correctamente desde: {file_path}")
             return data
         except Exception as e:
@@ -111,29 +136,28 @@ class DataOrchestrator:
             return False
         
     def list_temp_files(self) -> List[Dict[str, Any]]:
-        """Lista archivos temporales disponibles para recuperación"""
+        """Lista archivos temporales disponibles para recuperación (solo lee metadatos)"""
         temp_files = []
-        for file_path in TEMP_DIR.glob("*.json"):
+        paths = {p for pattern in SNAPSHOT_PATTERNS for p in TEMP_DIR.glob(pattern)}
+        for file_path in paths:
+            if file_path.name.endswith(META_SUFFIX):
+                continue
             try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
+                meta = read_snapshot_meta(file_path)
+                stat = file_path.stat()
+                footer = meta.get('footer') or {}
                 
                 file_info = {
                     'path': str(file_path),
                     'name': file_path.name,
-                    'size': file_path.stat().st_size,
-                    'created': datetime.fromtimestamp(file_path.stat().st_ctime).isoformat(),
-                    'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
+                    'size': stat.st_size,
+                    'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    'timestamp': meta['header'].get('timestamp'),
+                    'items_count': footer.get('count'),
+                    'complete': meta['complete'],
                 }
-                
-                # # Agregar estadísticas si están disponibles
-                # if isinstance(data, dict) and 'stats' in data:
-                #     file_info['stats'] = data['stats']
-                #     file_info['items_count'] = len(data.get('data', []))
-                # else:
-                #     file_info['items_count'] = len(data) if isinstance(data, list) else 0
-                
-                # temp_files.append(file_info)
+                temp_files.append(file_info)
                 
             except Exception as e:
                 logger.warning(f"Could not read temp file {file_path}: {e}")
@@ -1,74 +1,244 @@
-from orchestration.utils.pydantic_conversion import product_to_articlecreate, product_to_db_dict
+from orchestration.utils.pydantic_conversion import product_to_articlecreate, product_to_article_dict
 from orchestration.scraping_orchestrator import ScrapOrchestrator
 from orchestration.data_orchestrator import DataOrchestrator
-from database.crud_operations import article_crud, price_record_crud, last_price_crud
+from orchestration.streaming_pipeline import StreamingPipeline
+from orchestration.crawl_state import CrawlState, INCREMENTAL_CRAWL
+from orchestration.alerts import evaluate_alerts
+from database.crud_operations import article_crud, price_record_crud, last_price_crud, ingestion_crud
+from database.db_session import db_manager
+from orchestration.utils.snapshot_io import read_snapshot_meta
+from monitoring.query_stats import query_scope
+from monitoring import metrics
+from monitoring.profiler import RunProfiler, PIPELINE_PROFILE
+from scrap.engine import page_parser
+from scrap.web_navigation.web_tree import get_categories_tree
 import logging
 from schemas.articles import ArticleCreate
 from decimal import Decimal
 from datetime import date
 from pathlib import Path
+from contextlib import contextmanager
+import os
+import time
+from typing import Iterable, List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Registros por transacción al re-ingerir snapshots
+REPLAY_BATCH_SIZE = 2000
+# Pipeline en streaming (descarga -> parseo -> escritura por lotes a la vez);
+# RTR_STREAMING_PIPELINE=0 vuelve al modo 'scrapear todo y luego insertar'
+STREAMING_PIPELINE = os.getenv("RTR_STREAMING_PIPELINE", "1") == "1"
+
 class MasterOrchestrator:
     def __init__(self):
         self.scrap_orch = ScrapOrchestrator()
+        page_parser.add_fetch_listener(metrics.observe_fetch)  # páginas, bytes y latencia de descarga
         # No instanciamos DataOrchestrator xq se instancia cuando tienes datos a guardar/cargar
     
-    def run_complete_pipeline(self, category: str|None = None):
+    def run_complete_pipeline(self, category: str|None = None, profile: str|None = PIPELINE_PROFILE,
+                              streaming: bool = STREAMING_PIPELINE, incremental: bool = INCREMENTAL_CRAWL,
+                              full_crawl: bool = False):
+        """
+        Scraping -> snapshot temporal -> base de datos.
+
+        Args:
+            category: Categoría a scrapear (None = todas).
+            profile: None | "phases" | "cprofile" | "pyinstrument". Si se indica, se
+                guarda un informe de la ejecución en RUN_REPORT_DIR (monitoring.profiler).
+            streaming: Descarga, parseo e inserción concurrentes (StreamingPipeline).
+            incremental: Saltar las categorías cuya primera página no ha cambiado desde la
+                última ejecución (orchestration.crawl_state). Cada categoría se recorre
+                entera al menos cada FULL_CRAWL_INTERVAL_HOURS.
+            full_crawl: Con incremental, recorrer todas las páginas aunque la primera no haya
+                cambiado (renueva las huellas y el plazo del crawl completo de cada categoría).
+
+        Returns:
+            Resumen de la ejecución: status ("success" | "no_data" | "error"), conteos y segundos.
+        """
+        status = "error"
+        crawl_state = CrawlState() if incremental else None
+        with RunProfiler(profile, category) as profiler:
+            try:
+                if streaming:
+                    status = self._run_streaming_pipeline(category, profiler, crawl_state, full_crawl)
+                else:
+                    status = self._run_complete_pipeline(category, profiler, crawl_state, full_crawl)
+                if status == "success":
+                    self._evaluate_alerts(profiler)
+            finally:
+                profiler.status = status
+                metrics.pipeline_runs_total.inc(status=status)
+                metrics.pipeline_last_run_timestamp.set(time.time(), status=status)
+                metrics.push_metrics("rtr_pipeline", category=category or "all")
+        return {"status": status, "counts": dict(profiler.counts), "wall_s": round(profiler.wall, 3)}
+
+    def _evaluate_alerts(self, profiler: RunProfiler):
+        """Un fallo de las alertas no falla la ejecución: los precios se evalúan en la siguiente"""
+        try:
+            with profiler.phase("alerts"):
+                result = evaluate_alerts()
+            profiler.count("alerts", result["target"] + result["drop"])
+        except Exception as e:
+            logger.error(f"Alert evaluation failed: {e}")
+
+    @contextmanager
+    def _phase(self, profiler: RunProfiler, name: str):
+        """Fase del pipeline: consultas SQL, histograma de Prometheus e informe de ejecución"""
+        with query_scope(f"pipeline:{name}") as stats, metrics.pipeline_phase_duration.time(phase=name), profiler.phase(name):
+            yield stats
+
+    def _run_streaming_pipeline(self, category: str|None, profiler: RunProfiler,
+                                crawl_state: CrawlState|None = None, full_crawl: bool = False) -> str:
+        categories = list(get_categories_tree() or [])
+        if category:
+            categories = [(name, url) for name, url in categories if name == category]
+            if not categories:
+                logger.warning(f"Unknown category: {category}")
+                return "no_data"
+        if not categories:
+            logger.warning("No categories found.")
+            return "no_data"
+
+        data_orch = DataOrchestrator([])
+        with self._phase(profiler, "streaming") as db_stats, data_orch.open_temp_writer(prefix=category or "all") as writer:
+            stats = StreamingPipeline(writer=writer, crawl_state=crawl_state, full_crawl=full_crawl).run(categories)
+        if crawl_state is not None:
+            crawl_state.save()
+        logger.info(f"Snapshot saved to: {writer.path} ({writer.count} items)")
+        logger.info(f"Streaming ingest: {db_stats.statements} queries, {db_stats.db_time_ms:.0f} ms in database")
+
+        metrics.scraper_products_parsed_total.inc(stats["products"] + stats["duplicates"] + stats["invalid"])
+        metrics.pipeline_rows_inserted_total.inc(stats["inserted"], table="articles")
+        metrics.pipeline_rows_inserted_total.inc(stats["price_records"], table="price_records")
+        for key in ("categories", "categories_unchanged", "pages", "fetch_errors", "parse_errors", "products", "duplicates", "invalid",
+                    "inserted", "updated", "unchanged", "price_records", "stale"):
+            profiler.count(key, stats[key])
+        return "success" if stats["products"] else "no_data"
+
+    def _run_complete_pipeline(self, category: str|None, profiler: RunProfiler,
+                               crawl_state: CrawlState|None = None, full_crawl: bool = False) -> str:
         # 1. Scraping
-        scraped_data = self.scrap_orch.run_category_scraping(category) if category else self.scrap_orch.run_full_scraping()
+        with self._phase(profiler, "scraping"):
+            if crawl_state is not None:
+                scraped_data = self.scrap_orch.run_incremental_scraping(crawl_state, full_crawl, category)
+                crawl_state.save()
+            else:
+                scraped_data = self.scrap_orch.run_category_scraping(category) if category else self.scrap_orch.run_full_scraping()
         if not scraped_data:
             logger.warning("No data scraped.")
-            return print(f'Faliure during Scraping')
+            print(f'Faliure during Scraping')
+            return "no_data"
         
         # 2. Guardar temporal
         if not isinstance(scraped_data, list): # Validamos que es una lista antes de crear la instancia del objeto DataOrchestator
             logger.error("scraped_data no es una lista. No se puede guardar temporalmente.")
-            return
-        data_orch = DataOrchestrator(scraped_data)
-        temp_file = data_orch.save_to_temp_file(prefix=category or "all")
+            return "error"
+        metrics.scraper_products_parsed_total.inc(len(scraped_data))
+        profiler.count("scraped", len(scraped_data))
+        with self._phase(profiler, "snapshot"):
+            data_orch = DataOrchestrator(scraped_data)
+            temp_file = data_orch.save_to_temp_file(prefix=category or "all")
         
         # 3. Insertar en base de datos usando CRUD directamente
-        for item in scraped_data:
-            try:
-                article = product_to_articlecreate(item)
-                article_dict = product_to_db_dict(item)
-           
-                if not article_crud.exists_by_rtr_id(article.rtr_id):
-                    logger.info('New Article in DB')                   
-                    article_crud.insert_one_with_price(article_dict)
-                
-                if price_record_crud.exists_for_date(article_dict['rtr_id'], article_dict['precio']):
-                    logger.info('Price already updated')
+        with self._phase(profiler, "db_insert") as db_stats:
+            for item in scraped_data:
+                try:
+                    with profiler.phase("db_insert.validation"):
+                        article = product_to_article_dict(item)
+                except Exception as e:
+                    profiler.count("skipped")
+                    logger.warning(f"Invalid data structure skipped: {item} ({e})")
                     continue
 
-                data_to_update = {
-                    "rtr_id" : article.rtr_id, 
-                    "precio" : article.price,
-                    "fecha" : article.record_date
+                try:
+                    with profiler.phase("db_insert.write"):
+                        if not article_crud.exists_by_rtr_id(article["rtr_id"]):
+                            logger.info('New Article in DB')
+                            if article_crud.insert_one_with_price(article):
+                                profiler.count("inserted")
+                                metrics.pipeline_rows_inserted_total.inc(table="articles")
+                                metrics.pipeline_rows_inserted_total.inc(table="price_records")
+                            else:
+                                profiler.count("failed")
+                            continue
 
-                }
-                price_record_crud.insert_one(data_to_update)
-                last_price_crud.upsert_ultimo_precio(data_to_update['rtr_id'], data_to_update['precio'])
-            except Exception as e:
-                logger.warning(f"Invalid data structure skipped: {item}")
+                        # El CRUD decide si hace falta fila en el historial (PRICE_STORAGE_MODE)
+                        # y actualiza el último precio en la misma transacción
+                        if price_record_crud.record_price(article["rtr_id"], article["price"], article["record_date"]):
+                            profiler.count("price_changed")
+                            metrics.pipeline_rows_inserted_total.inc(table="price_records")
+                        else:
+                            profiler.count("unchanged")
+                            logger.debug('Price unchanged')
+                except Exception as e:
+                    profiler.count("failed")
+                    logger.warning(f"Could not store {article['rtr_id']}: {e}")
+        logger.info(f"DB insert: {db_stats.statements} queries, {db_stats.db_time_ms:.0f} ms in database")
+        return "success"
         
     def run_from_temp_file(self, file_path: str):
+        return self.replay_snapshots([file_path])
+
+    def replay_snapshots(self, file_paths: Iterable[str], batch_size: int = REPLAY_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Re-ingiere uno o varios snapshots (artículos, historial y último precio)
+        en lotes transaccionales con upserts idempotentes.
+
+        Los snapshots se procesan en orden cronológico (timestamp de la cabecera),
+        así que sirve para reconstruir una base de datos vacía a partir de meses
+        de snapshots archivados.
+        
+        Args:
+            file_paths: Rutas a snapshots .ndjson[.gz|.zst] o .json antiguos.
+            batch_size: Registros por transacción.
+        
+        Returns:
+            Totales acumulados de la ingesta.
+        """
         data_orch = DataOrchestrator([])
-        loaded = data_orch.load_from_temp_file(Path(file_path))
-        if not loaded or "data" not in loaded:
-            logger.error("No se pudieron cargar datos del archivo temporal.")
-            return
-        for item in loaded["data"]:
-            try:
-                article = product_to_articlecreate(item)
-                article_dict = article.model_dump()
-                if not article_crud.exists_by_rtr_id(article.rtr_id):
-                    article_crud.insert_one(article_dict)
-                article_crud.update_one(article.rtr_id, article_dict)
-            except Exception as e:
-                logger.warning(f"Invalid data structure skipped: {item} ({e})")
+        paths = [Path(p) for p in file_paths]
+        missing = [p for p in paths if not p.exists()]
+        for path in missing:
+            logger.error(f"El archivo {path} no existe.")
+        paths = sorted(
+            (p for p in paths if p.exists()),
+            key=lambda p: (read_snapshot_meta(p)['header'].get('timestamp') or '', p.name)
+        )
+
+        with query_scope("pipeline:replay"), metrics.pipeline_phase_duration.time(phase="replay"):
+            return self._replay(data_orch, paths, batch_size)
+
+    def _replay(self, data_orch: DataOrchestrator, paths: List[Path], batch_size: int) -> Dict[str, Any]:
+        totals: Dict[str, Any] = {
+            "files": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+            "price_records": 0, "stale": 0, "invalid": 0, "changes": 0,
+        }
+        for path in paths:
+            batch: List[Dict[str, Any]] = []
+            for item in data_orch.iter_temp_file(path):
+                try:
+                    batch.append(ArticleCreate.model_validate(item).model_dump())
+                except Exception as e:
+                    totals["invalid"] += 1
+                    logger.warning(f"Invalid data structure skipped: {item} ({e})")
+                    continue
+                if len(batch) >= batch_size:
+                    self._accumulate(totals, ingestion_crud.upsert_batch(batch))
+                    batch = []
+            if batch:
+                self._accumulate(totals, ingestion_crud.upsert_batch(batch))
+            totals["files"] += 1
+            logger.info(f"Snapshot replayed: {path} -> {totals}")
+        return totals
+
+    @staticmethod
+    def _accumulate(totals: Dict[str, Any], result: Dict[str, Any]):
+        for key in ("inserted", "updated", "unchanged", "price_records", "stale"):
+            totals[key] += result[key]
+        totals["changes"] += len(result["changes"])
+        metrics.pipeline_rows_inserted_total.inc(result["inserted"], table="articles")
+        metrics.pipeline_rows_inserted_total.inc(result["price_records"], table="price_records")
 
     def run_full_db_update(self):
         self.run_complete_pipeline(category=None)
@@ -86,6 +256,7 @@ class MasterOrchestrator:
 
 
 if __name__ == "__main__":
+    db_manager.create_tables()  # price_changes / change_log_lock en bases ya existentes
     test = MasterOrchestrator()
     test.run_complete_pipeline()
 
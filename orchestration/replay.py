@@ -0,0 +1,35 @@
+from orchestration.master_orchestrator import MasterOrchestrator, REPLAY_BATCH_SIZE
+from orchestration.utils.snapshot_io import SNAPSHOT_PATTERNS, META_SUFFIX
+from database.db_session import db_manager
+from pathlib import Path
+from typing import List
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Acepta archivos y directorios (se toman todos los snapshots del directorio)"""
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for pattern in SNAPSHOT_PATTERNS:
+                files.extend(
+                    str(p) for p in path.glob(pattern) if not p.name.endswith(META_SUFFIX)
+                )
+        else:
+            files.append(str(path))
+    return files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-ingiere snapshots de scraping archivados en la base de datos")
+    parser.add_argument("paths", nargs="+", help="Snapshots o directorios con snapshots")
+    parser.add_argument("--batch-size", type=int, default=REPLAY_BATCH_SIZE, help="Registros por transacción")
+    args = parser.parse_args()
+
+    db_manager.create_tables()
+    totals = MasterOrchestrator().replay_snapshots(expand_paths(args.paths), batch_size=args.batch_size)
+    print(totals)
@@ -0,0 +1,293 @@
+"""
+Planificador del pipeline: ejecuta un trabajo por categoría según intervalos
+tipo cron, con varias categorías en paralelo dentro de un presupuesto de
+concurrencia.
+
+- Cada categoría tiene su propia expresión (las categorías "calientes" se
+  pueden refrescar más a menudo). Formatos: cron de 5 campos
+  ("*/30 * * * *", "0 6,18 * * 1-5") o "@every 45m" / "@every 6h" / "@every 1d".
+  "off" desactiva la categoría.
+- Un trabajo nunca se solapa consigo mismo: además de no relanzarlo mientras
+  corre en este proceso, se toma un lock con caducidad en base de datos
+  (job_locks), así que dos planificadores sobre la misma base no duplican
+  ejecuciones. El lock se renueva en cada tick mientras el trabajo sigue vivo.
+- Cada ejecución queda en el historial (job_runs, GET /monitoring/jobs).
+
+Configuración en RTR_SCHEDULE_FILE (JSON), por ejemplo:
+
+    {"default": "@every 6h", "max_parallel": 2,
+     "categories": {"Portátiles": "@every 1h", "Accesorios": "0 3 * * *"}}
+
+    python -m orchestration.scheduler                  # servicio
+    python -m orchestration.scheduler --once           # lanza lo pendiente, espera y sale
+    python -m orchestration.scheduler --once --full-crawl  # ídem, recorriendo todas las páginas
+    python -m orchestration.scheduler --history 20     # últimas ejecuciones
+"""
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+import argparse
+import json
+import logging
+import os
+import re
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from database.crud_operations import job_crud
+from database.db_session import db_manager
+from orchestration.master_orchestrator import MasterOrchestrator
+from scrap.web_navigation.web_tree import get_categories_tree
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_FILE = Path(os.getenv("RTR_SCHEDULE_FILE", "schedule.json"))
+# Expresión para las categorías sin entrada propia en SCHEDULE_FILE
+DEFAULT_SCHEDULE = os.getenv("RTR_SCHEDULE_DEFAULT", "@every 6h")
+# Trabajos (categorías) ejecutándose a la vez
+MAX_PARALLEL_JOBS = int(os.getenv("RTR_SCHEDULER_MAX_PARALLEL", "2"))
+TICK_SECONDS = 30
+# Caducidad del lock: si el proceso muere, otro planificador puede retomar el trabajo pasado este tiempo
+LOCK_TTL_SECONDS = 600
+CATEGORY_REFRESH_SECONDS = 3600
+JOB_PREFIX = "scrape:"
+
+EVERY_RE = re.compile(r"^@every\s+(\d+)\s*([smhd])$")
+EVERY_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+# (mínimo, máximo) de cada campo cron: minuto, hora, día del mes, mes, día de la semana (0 y 7 = domingo)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    """'*', 'n', 'a-b', listas 'a,b' y pasos '*/n', 'a-b/n', 'a/n'"""
+    values = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start  # "5/15" = desde 5 cada 15
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Campo cron no válido: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+@dataclass
+class Schedule:
+    """Expresión de planificación ya parseada (cron o @every)"""
+
+    expression: str
+    interval: Optional[timedelta] = None
+    fields: Optional[Tuple[Set[int], ...]] = None
+    # Con día del mes y día de la semana restringidos, cron ejecuta si coincide cualquiera
+    day_or: bool = False
+
+    @classmethod
+    def parse(cls, expression: str) -> "Schedule":
+        expression = expression.strip()
+        match = EVERY_RE.match(expression)
+        if match:
+            amount, unit = int(match.group(1)), match.group(2)
+            if amount <= 0:
+                raise ValueError(f"Intervalo no válido: {expression!r}")
+            return cls(expression, interval=timedelta(**{EVERY_UNITS[unit]: amount}))
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expresión no válida (cron de 5 campos o @every): {expression!r}")
+        fields = [_parse_cron_field(part, low, high) for part, (low, high) in zip(parts, CRON_FIELDS)]
+        fields[4] = {day % 7 for day in fields[4]}
+        fields = tuple(fields)
+        return cls(expression, fields=fields, day_or=parts[2] != "*" and parts[4] != "*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        _, _, days, months, weekdays = self.fields
+        if dt.month not in months:
+            return False
+        day, weekday = dt.day in days, (dt.weekday() + 1) % 7 in weekdays
+        return (day or weekday) if self.day_or else (day and weekday)
+
+    def next_after(self, dt: datetime) -> datetime:
+        """Primera ejecución estrictamente posterior a dt"""
+        if self.interval is not None:
+            return dt + self.interval
+        minutes, hours = self.fields[0], self.fields[1]
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)  # p.ej. 29 de febrero
+        while candidate < limit:
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"La expresión nunca se cumple: {self.expression!r}")
+
+
+def load_schedule_config(path: Path = SCHEDULE_FILE) -> Dict[str, Any]:
+    """Configuración del planificador (valores por defecto si no existe el archivo)"""
+    config = {"default": DEFAULT_SCHEDULE, "max_parallel": MAX_PARALLEL_JOBS, "categories": {}}
+    if path.exists():
+        config.update(json.loads(path.read_text(encoding="utf-8")))
+    return config
+
+
+class Scheduler:
+    """
+    Bucle de planificación: en cada tick calcula qué categorías tocan (según su
+    último inicio en job_runs, así sobrevive a reinicios) y las lanza en un pool
+    de max_parallel hilos. Los trabajos pendientes esperan turno sin tomar lock.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, max_parallel: Optional[int] = None,
+                 tick_seconds: float = TICK_SECONDS, lock_ttl: float = LOCK_TTL_SECONDS, full_crawl: bool = False):
+        config = config or load_schedule_config()
+        default = config.get("default", DEFAULT_SCHEDULE)
+        self.default = None if default == "off" else Schedule.parse(default)
+        self.schedules: Dict[str, Optional[Schedule]] = {
+            name: None if expr == "off" else Schedule.parse(expr)
+            for name, expr in config.get("categories", {}).items()
+        }
+        self.max_parallel = max(1, max_parallel or config.get("max_parallel") or MAX_PARALLEL_JOBS)
+        self.tick_seconds = tick_seconds
+        self.lock_ttl = lock_ttl
+        # Con crawl incremental (RTR_INCREMENTAL_CRAWL=1): no saltar categorías sin cambios en la primera página
+        self.full_crawl = full_crawl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="job")
+        self.running: Dict[str, Future] = {}
+        self._categories: List[str] = []
+        self._categories_loaded = 0.0
+        self._stop = threading.Event()
+
+    # --- Planificación ---
+    def categories(self) -> List[str]:
+        """Categorías de la web, refrescadas cada CATEGORY_REFRESH_SECONDS"""
+        if not self._categories or time.monotonic() - self._categories_loaded > CATEGORY_REFRESH_SECONDS:
+            try:
+                tree = get_categories_tree()
+            except Exception as e:
+                logger.error(f"Could not load categories: {e}")
+                tree = None
+            if tree:
+                self._categories = [name for name, _ in tree]
+                self._categories_loaded = time.monotonic()
+        return self._categories
+
+    def schedule_for(self, category: str) -> Optional[Schedule]:
+        return self.schedules.get(category, self.default)
+
+    def due_jobs(self, now: Optional[datetime] = None) -> List[str]:
+        """Categorías a lanzar ahora, de la más atrasada a la menos"""
+        now = now or datetime.now()
+        last_started = job_crud.last_started()
+        due = []
+        for category in self.categories():
+            schedule = self.schedule_for(category)
+            if schedule is None or category in self.running:
+                continue
+            last = last_started.get(JOB_PREFIX + category)
+            next_run = schedule.next_after(last) if last else datetime.min
+            if next_run <= now:
+                due.append((next_run, category))
+        return [category for _, category in sorted(due)]
+
+    # --- Ejecución ---
+    def _run_job(self, category: str) -> Dict[str, Any]:
+        job_name = JOB_PREFIX + category
+        run_id = job_crud.start_run(job_name, self.owner, category)
+        logger.info(f"Job started: {job_name} (run {run_id})")
+        try:
+            summary = MasterOrchestrator().run_complete_pipeline(category=category, full_crawl=self.full_crawl)
+        except Exception as e:
+            logger.error(f"Job failed: {job_name}: {e}")
+            job_crud.finish_run(run_id, "error", error=traceback.format_exc())
+            raise
+        finally:
+            job_crud.release_lock(job_name, self.owner)
+        job_crud.finish_run(run_id, summary["status"], stats=summary)
+        logger.info(f"Job finished: {job_name} -> {summary['status']} in {summary['wall_s']:.1f}s")
+        return summary
+
+    def _reap(self):
+        """Quita los trabajos terminados y renueva el lock de los que siguen corriendo"""
+        for category, future in list(self.running.items()):
+            if future.done():
+                del self.running[category]
+            else:
+                job_crud.acquire_lock(JOB_PREFIX + category, self.owner, self.lock_ttl)
+
+    def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """Lanza los trabajos pendientes que quepan en el presupuesto. Devuelve los lanzados."""
+        self._reap()
+        started = []
+        for category in self.due_jobs(now):
+            if len(self.running) >= self.max_parallel:
+                break
+            if not job_crud.acquire_lock(JOB_PREFIX + category, self.owner, self.lock_ttl):
+                logger.debug(f"Job {JOB_PREFIX + category} is locked by another scheduler, skipping")
+                continue
+            self.running[category] = self.executor.submit(self._run_job, category)
+            started.append(category)
+        return started
+
+    def run(self, once: bool = False):
+        """Bucle principal hasta stop() (o, con once=True, hasta acabar lo pendiente)"""
+        logger.info(f"Scheduler {self.owner} started (max_parallel={self.max_parallel})")
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                if once:
+                    break
+                self._stop.wait(self.tick_seconds)
+            for future in list(self.running.values()):
+                future.exception()  # espera a que terminen (los errores ya están en job_runs)
+        finally:
+            self.executor.shutdown(wait=True)
+            self._reap()
+            logger.info(f"Scheduler {self.owner} stopped")
+
+    def stop(self):
+        """Termina tras los trabajos en curso; no se lanzan nuevos"""
+        self._stop.set()
+
+
+def print_history(limit: int, job_name: Optional[str] = None):
+    print("\t".join(["id", "job", "status", "started", "duration_s", "owner"]))
+    for run in job_crud.recent_runs(limit, job_name):
+        print("\t".join([str(run.id), run.job_name, run.status, run.started_at.isoformat(timespec="seconds"),
+                         str(run.duration_s if run.duration_s is not None else "-"), run.owner]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Planificador del pipeline de scraping")
+    parser.add_argument("--config", type=Path, default=SCHEDULE_FILE, help="Archivo JSON de planificación")
+    parser.add_argument("--max-parallel", type=int, help="Trabajos en paralelo (por defecto el de la configuración)")
+    parser.add_argument("--once", action="store_true", help="Lanzar los trabajos pendientes, esperar y salir")
+    parser.add_argument("--history", type=int, metavar="N", help="Mostrar las N últimas ejecuciones y salir")
+    parser.add_argument("--full-crawl", action="store_true",
+                        help="Crawl incremental: recorrer todas las páginas y renovar las huellas")
+    args = parser.parse_args()
+
+    db_manager.create_tables()  # job_locks / job_runs
+    if args.history:
+        print_history(args.history)
+    else:
+        scheduler = Scheduler(load_schedule_config(args.config), max_parallel=args.max_parallel,
+                              full_crawl=args.full_crawl)
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+        try:
+            scheduler.run(once=args.once)
+        except KeyboardInterrupt:
+            logger.info("Interrupted, waited for running jobs")
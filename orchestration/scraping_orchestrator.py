@@ -1,6 +1,9 @@
 from scrap.schemas.schema_product import Product
 from scrap.engine.scraper import ScrapEngine
-from scrap.web_navigation.web_tree import get_categories_tree
+from scrap.web_navigation.web_tree import get_categories_tree, category_page_url
+from scrap.engine.page_parser import soup_generator
+from scrap.utils.remove_duplicates import remove_duplicates_by_id
+from orchestration.crawl_state import CrawlState, category_fingerprint
 import requests
 import time
 import logging
@@ -83,6 +86,52 @@ class ScrapOrchestrator:
         url = dict(get_categories_tree())[category]
         result = self._retry_with_timeout(self.scrap_engine.scrap_category,category,url)
         return result
+
+    def run_incremental_scraping(self, crawl_state: CrawlState, full_crawl: bool = False,
+                                 category: Optional[str] = None) -> Optional[List[Product]]:
+        """
+        Scraping incremental: de cada categoría se descarga la primera página y, si su
+        huella coincide con la de la última ejecución y el último crawl completo de la
+        categoría es reciente (FULL_CRAWL_INTERVAL_HOURS), no se recorre el resto.
+
+        Args:
+            crawl_state: Huellas de la ejecución anterior (se actualizan, sin guardar).
+            full_crawl: Recorrer todas las páginas aunque no haya cambios (actualiza huellas).
+            category: Limitar a una categoría.
+
+        Returns:
+            Productos scrapeados (primera página de las categorías sin cambios) o None si falla.
+        """
+        categories = list(get_categories_tree() or [])
+        if category:
+            categories = [(name, url) for name, url in categories if name == category]
+            if not categories:
+                logger.warning(f"Unknown category: {category}")
+                return None
+        if not categories:
+            return None
+
+        all_data = []
+        for cat, url in categories:
+            soup = self._retry_with_timeout(soup_generator, category_page_url(url, 1))
+            if soup is None:
+                continue
+            first_page = self.scrap_engine.extractor.parse_products(soup, cat)
+            fingerprint = category_fingerprint(first_page)
+            if not full_crawl and crawl_state.is_unchanged(cat, fingerprint):
+                logger.info(f"Categoría sin cambios, solo primera página: {cat}")
+                crawl_state.record(cat, fingerprint, crawled=False)
+                all_data.extend(first_page)
+                continue
+
+            cat_data = self._retry_with_timeout(self.scrap_engine.scrap_category, cat, url)
+            if cat_data is None:
+                # Sin huella nueva: se volverá a recorrer en la próxima ejecución
+                all_data.extend(first_page)
+                continue
+            crawl_state.record(cat, fingerprint)
+            all_data.extend(cat_data)
+        return remove_duplicates_by_id(all_data)
             
          
         
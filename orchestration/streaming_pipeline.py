@@ -0,0 +1,303 @@
+"""
+Pipeline de scraping en streaming: las páginas fluyen por
+
+    descarga (N hilos) -> parseo -> dedupe + snapshot + escritura por lotes
+
+con colas acotadas entre etapas. Si la base de datos va lenta las colas se
+llenan y la descarga espera (backpressure), así que la memoria no depende del
+tamaño del catálogo y la ingesta termina poco después de llegar la última página.
+
+Cada página de categoría se descarga una sola vez: la propia descarga sirve
+para detectar el final de la paginación (antes get_category_pages descargaba
+cada página para comprobarla y el extractor la volvía a descargar).
+"""
+from queue import Queue, Empty, Full
+from typing import Dict, Any, List, Tuple, Optional, Iterable
+import logging
+import threading
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+from scrap.config import config
+from scrap.engine import page_parser, extractor as extractor_module
+from scrap.engine.extractor import ProductsExtractor
+from scrap.web_navigation.web_tree import MAX_CATEGORY_PAGES, category_page_url, is_page_not_found
+from orchestration.utils.pydantic_conversion import product_to_article_dict, product_to_json_dict
+from orchestration.utils.snapshot_io import SnapshotWriter
+from orchestration.crawl_state import CrawlState, category_fingerprint
+from database.crud_operations import ingestion_crud
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de las colas entre etapas (páginas) y del lote de escritura (registros)
+PAGE_QUEUE_SIZE = 16
+RECORD_QUEUE_SIZE = 64
+STREAM_BATCH_SIZE = 500
+# Segundos sin registros nuevos tras los que se escribe el lote parcial
+FLUSH_INTERVAL = 2.0
+FETCH_RETRIES = 3
+RETRY_BACKOFF = 2.0
+
+_DONE = object()  # Fin de etapa
+_CATEGORY_END = object()  # Última página de una categoría encolada (crawl incremental)
+
+
+class StreamingPipeline:
+    """
+    Ejecuta el crawl de las categorías dadas e ingiere en la base de datos
+    mediante ingestion_crud.upsert_batch (idempotente, respeta PRICE_STORAGE_MODE).
+
+    La escritura se hace en el hilo que llama a run(): así las consultas se
+    atribuyen al query_scope activo y SQLite solo tiene un escritor.
+    """
+
+    def __init__(self, product_extractor: Optional[ProductsExtractor] = None,
+                 fetch_workers: Optional[int] = None, batch_size: int = STREAM_BATCH_SIZE,
+                 page_queue_size: int = PAGE_QUEUE_SIZE, record_queue_size: int = RECORD_QUEUE_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, writer: Optional[SnapshotWriter] = None,
+                 crawl_state: Optional[CrawlState] = None, full_crawl: bool = False):
+        self.extractor = product_extractor or ProductsExtractor()
+        self.fetch_workers = max(1, fetch_workers or config.max_workers)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = writer
+        # Crawl incremental (con crawl_state): se salta el resto de páginas de las categorías
+        # cuya primera página no ha cambiado (y con crawl completo reciente), salvo con full_crawl
+        self.crawl_state = crawl_state
+        self.full_crawl = full_crawl
+        self.pages: Queue = Queue(maxsize=page_queue_size)
+        self.records: Queue = Queue(maxsize=record_queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None  # primer fallo de una etapa en segundo plano
+        self._parse_failed = set()  # categorías con alguna página sin parsear (solo el hilo de parseo)
+        self.stats: Dict[str, Any] = {
+            "categories": 0, "categories_unchanged": 0, "pages": 0, "fetch_errors": 0, "parse_errors": 0,
+            "products": 0, "duplicates": 0, "invalid": 0,
+            "inserted": 0, "updated": 0, "unchanged": 0, "price_records": 0, "stale": 0,
+            "changes": 0, "batches": 0,
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _fail(self, stage: str, error: BaseException):
+        """Registra el fallo de una etapa y detiene las demás (run() lo relanza)"""
+        logger.error(f"Streaming pipeline {stage} stage failed: {error!r}")
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, queue: Queue, item) -> bool:
+        """put bloqueante que se puede interrumpir si otra etapa ha fallado"""
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    # --- Etapa 1: descarga ---
+    def _fetch(self, session: requests.Session, url: str) -> Optional[Tuple[str, float]]:
+        for attempt in range(1, FETCH_RETRIES + 1):
+            try:
+                started = time.perf_counter()
+                html = page_parser.fetch_html(url, session=session)
+                return html, time.perf_counter() - started
+            except requests.Timeout:
+                logger.warning(f"Timeout fetching {url} (attempt {attempt}/{FETCH_RETRIES})")
+                time.sleep(RETRY_BACKOFF * attempt)
+            except requests.RequestException as e:
+                logger.error(f"Error fetching {url}: {e}")
+                break
+        self._count("fetch_errors")
+        return None
+
+    def _parse_page(self, category: str, url: str, html: str) -> Optional[Tuple[list, float]]:
+        """(productos, segundos de parseo) o None si la página no se puede parsear"""
+        started = time.perf_counter()
+        try:
+            soup = BeautifulSoup(html, config.html_parser)
+            products = self.extractor.parse_products(soup, category)
+        except Exception as e:
+            logger.error(f"Error parsing {url}: {e}")
+            self._count("parse_errors")
+            return None
+        return products, time.perf_counter() - started
+
+    def _fetch_category(self, session: requests.Session, category: str, cat_url: str) -> bool:
+        """Encola las páginas de la categoría. False si el pipeline se ha detenido."""
+        fingerprint, complete, pages = None, True, 0
+        for page in range(1, MAX_CATEGORY_PAGES + 1):
+            url = category_page_url(cat_url, page)
+            fetched = self._fetch(session, url)
+            if fetched is None:
+                complete = False
+                break
+            html, fetch_elapsed = fetched
+            if is_page_not_found(html):
+                break
+            pages += 1
+            parsed, unchanged = None, False
+            if page == 1 and self.crawl_state is not None:
+                # La primera página se parsea aquí para decidir si seguir paginando
+                parsed = self._parse_page(category, url, html)
+                if parsed is None:
+                    complete = False
+                    break
+                fingerprint = category_fingerprint(parsed[0])
+                unchanged = not self.full_crawl and self.crawl_state.is_unchanged(category, fingerprint)
+            if not self._put(self.pages, (category, url, html, fetch_elapsed, parsed)):
+                return False
+            if unchanged:
+                self._count("categories_unchanged")
+                self.crawl_state.record(category, fingerprint, crawled=False)
+                return True
+        self._count("categories")
+        # La huella se guarda en la etapa de parseo, cuando todas las páginas se han parseado sin errores
+        if self.crawl_state is not None and fingerprint is not None and complete:
+            return self._put(self.pages, (_CATEGORY_END, category, fingerprint, pages))
+        return True
+
+    def _fetch_worker(self, categories: Queue):
+        try:
+            with requests.Session() as session:
+                while not self._stop.is_set():
+                    try:
+                        category, cat_url = categories.get_nowait()
+                    except Empty:
+                        return
+                    if not self._fetch_category(session, category, cat_url):
+                        return
+        except BaseException as e:
+            self._fail("fetch", e)
+
+    # --- Etapa 2: parseo ---
+    def _parse_worker(self):
+        try:
+            while True:
+                try:
+                    item = self.pages.get(timeout=0.5)
+                except Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                if item is _DONE:
+                    return
+                if item[0] is _CATEGORY_END:
+                    _, category, fingerprint, pages = item
+                    if category not in self._parse_failed:
+                        self.crawl_state.record(category, fingerprint, pages)
+                    continue
+                category, url, html, fetch_elapsed, parsed = item
+                parsed = parsed or self._parse_page(category, url, html)
+                if parsed is None:
+                    self._parse_failed.add(category)
+                    continue
+                products, parse_elapsed = parsed
+                for listener in extractor_module.page_listeners:
+                    listener(url, category, len(products), fetch_elapsed + parse_elapsed)
+                self._count("pages")
+                if products and not self._put(self.records, products):
+                    return
+        except BaseException as e:
+            self._fail("parse", e)
+        finally:
+            # El escritor termina con _DONE; si el pipeline se ha detenido, al ver el hilo terminado
+            if not self._put(self.records, _DONE):
+                try:
+                    self.records.put_nowait(_DONE)
+                except Full:
+                    pass
+
+    # --- Etapa 3: dedupe + snapshot + base de datos ---
+    def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        result = ingestion_crud.upsert_batch(batch)
+        for key in ("inserted", "updated", "unchanged", "price_records", "stale"):
+            self.stats[key] += result[key]
+        self.stats["changes"] += len(result["changes"])
+        self.stats["batches"] += 1
+        batch.clear()
+
+    def _write(self, parser: threading.Thread):
+        seen = set()
+        batch: List[Dict[str, Any]] = []
+        while True:
+            try:
+                products = self.records.get(timeout=self.flush_interval)
+            except Empty:
+                self._flush(batch)  # sin datos nuevos: no retener el lote parcial
+                if self._stop.is_set() and not parser.is_alive():
+                    break
+                continue
+            if products is _DONE:
+                break
+            for product in products:
+                if product.rtr_id in seen:
+                    self.stats["duplicates"] += 1
+                    continue
+                seen.add(product.rtr_id)
+                try:
+                    row = product_to_article_dict(product)
+                    if self.writer is not None:
+                        self.writer.write(product_to_json_dict(product))
+                except Exception as e:
+                    self.stats["invalid"] += 1
+                    logger.warning(f"Invalid data structure skipped: {product} ({e})")
+                    continue
+                self.stats["products"] += 1
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+        self._flush(batch)
+        if self._error is not None:
+            raise self._error
+
+    def run(self, categories: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Args:
+            categories: pares (categoría, url de la categoría).
+
+        Returns:
+            Contadores del crawl y de la ingesta.
+
+        Si falla una etapa en segundo plano (descarga o parseo) se detienen las
+        demás, se escribe lo ya encolado y se relanza su excepción.
+        """
+        pending: Queue = Queue()
+        for category in categories:
+            pending.put(category)
+
+        fetchers = [
+            threading.Thread(target=self._fetch_worker, args=(pending,), name=f"fetch-{i}", daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        parser = threading.Thread(target=self._parse_worker, name="parse", daemon=True)
+
+        def close_fetch_stage():
+            for thread in fetchers:
+                thread.join()
+            self._put(self.pages, _DONE)
+
+        closer = threading.Thread(target=close_fetch_stage, name="fetch-closer", daemon=True)
+        for thread in fetchers + [parser, closer]:
+            thread.start()
+
+        try:
+            self._write(parser)
+        except BaseException:
+            # Desbloquea las etapas anteriores para que terminen
+            self._stop.set()
+            raise
+        finally:
+            closer.join()
+            parser.join()
+        logger.info(f"Streaming pipeline finished: {self.stats}")
+        return self.stats
@@ -1,6 +1,8 @@
 # utils/conversion.py
 from schemas.articles import ArticleCreate
 from scrap.schemas.schema_product import Product
+from scrap.schemas.scraped_record import ScrapedRecord
+from typing import Dict, Any
 from decimal import Decimal
 from datetime import date
 
@@ -13,10 +15,22 @@ def product_to_articlecreate(item: Product) -> ArticleCreate:
         ean=int(item.ean) if item.ean else None,
         art_url=item.url,
         img_url=item.image_url,
-        price_date=item.scraped_date if isinstance(item.scraped_date, date)
+        record_date=item.scraped_date if isinstance(item.scraped_date, date)
             else date.fromisoformat(item.scraped_date)
     )
 
+def product_to_article_dict(item: Product | ScrapedRecord) -> Dict[str, Any]:
+    """Fila para la base de datos; ScrapedRecord ya viene validado y no pasa por ArticleCreate"""
+    if isinstance(item, ScrapedRecord):
+        return item.as_article_dict()
+    return product_to_articlecreate(item).model_dump()
+
+def product_to_json_dict(item: Product | ScrapedRecord) -> Dict[str, Any]:
+    """Registro serializable para los snapshots"""
+    if isinstance(item, ScrapedRecord):
+        return item.as_json_dict()
+    return product_to_articlecreate(item).model_dump(mode="json")
+
 def product_to_db_dict(item: Product):
     db_dict = {
         "categoria": item.category,
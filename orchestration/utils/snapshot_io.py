@@ -0,0 +1,167 @@
+# utils/snapshot_io.py
+"""
+Snapshots de scraping en NDJSON (opcionalmente gzip/zstd).
+
+Formato: una línea JSON por registro, precedidas de una cabecera
+{"_header": {...}} y cerradas con un pie {"_footer": {"count": N, ...}}.
+Un archivo sin pie es un snapshot incompleto (el proceso se cortó a mitad).
+Al cerrar se escribe además un sidecar <archivo>.meta.json con cabecera y pie,
+para poder listar snapshots sin descomprimir ni recorrer el archivo.
+"""
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, IO
+import gzip
+import io
+import json
+import os
+import logging
+
+try:  # Dependencia opcional
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+SNAPSHOT_PATTERNS = ("*.ndjson", "*.ndjson.gz", "*.ndjson.zst", "*.json")
+META_SUFFIX = ".meta.json"
+_TAIL_BYTES = 4096
+
+
+def _compression_of(path: Path) -> Optional[str]:
+    if path.suffix == ".gz":
+        return "gzip"
+    if path.suffix == ".zst":
+        return "zstd"
+    return None
+
+
+def _open_text(path: Path, mode: str) -> IO[str]:
+    """Abre el archivo en modo texto aplicando la compresión según la extensión"""
+    compression = _compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd snapshots require the 'zstandard' package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def snapshot_path(directory: Path, prefix: str, timestamp: str, compression: Optional[str] = None) -> Path:
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return directory / f"{prefix}_{timestamp}.ndjson{COMPRESSION_SUFFIXES[compression]}"
+
+
+def meta_path(path: Path) -> Path:
+    return path.with_name(path.name + META_SUFFIX)
+
+
+class SnapshotWriter:
+    """Escritor incremental de snapshots: se puede ir añadiendo según se scrapea"""
+
+    def __init__(self, path: Path, **header: Any):
+        self.path = path
+        self.count = 0
+        self.meta: Optional[Dict[str, Any]] = None
+        self.header = {
+            "format": "rtr-snapshot",
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "created": datetime.now().isoformat(),
+            **header,
+        }
+        self._file = _open_text(path, "w")
+        self._write_line({"_header": self.header})
+
+    def _write_line(self, obj: Dict[str, Any]):
+        self._file.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str))
+        self._file.write("\n")
+
+    def write(self, record: Dict[str, Any]):
+        self._write_line(record)
+        self.count += 1
+
+    def close(self, **footer: Any) -> Optional[Dict[str, Any]]:
+        """Escribe el pie y el sidecar de metadatos. Devuelve los metadatos."""
+        if self._file.closed:
+            return self.meta
+        footer = {"count": self.count, "finished": datetime.now().isoformat(), **footer}
+        self._write_line({"_footer": footer})
+        self._file.close()
+        self.meta = {"header": self.header, "footer": footer}
+        tmp = meta_path(self.path).with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, meta_path(self.path))
+        return self.meta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Sin pie: queda marcado como incompleto
+            self._file.close()
+
+
+def iter_snapshot(path: Path) -> Iterator[Dict[str, Any]]:
+    """Recorre los registros de un snapshot sin cargarlo entero en memoria.
+    Acepta también el formato JSON antiguo ({'timestamp', 'data': [...]})."""
+    if path.suffix == ".json" and not path.name.endswith(META_SUFFIX):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f).get("data", [])
+        return
+
+    with _open_text(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            if "_header" in obj or "_footer" in obj:
+                continue
+            yield obj
+
+
+def read_snapshot_meta(path: Path) -> Dict[str, Any]:
+    """
+    Metadatos del snapshot (cabecera, pie y si está completo) en O(1):
+    sidecar si existe; si no, primera línea y final del archivo (sin comprimir).
+    complete es None cuando no se puede saber sin recorrer el archivo.
+    """
+    sidecar = meta_path(path)
+    if sidecar.exists():
+        meta = json.loads(sidecar.read_text(encoding="utf-8"))
+        return {**meta, "complete": True}
+
+    if path.suffix == ".json":  # formato antiguo: no hay forma barata de contar
+        return {"header": {}, "footer": None, "complete": True}
+
+    with _open_text(path, "r") as f:
+        first = f.readline()
+    header = json.loads(first).get("_header", {}) if first.strip() else {}
+
+    if _compression_of(path) is not None:
+        # Sin sidecar no se puede leer el pie de un comprimido sin descomprimirlo
+        return {"header": header, "footer": None, "complete": None}
+
+    footer = None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - _TAIL_BYTES))
+        lines = f.read().splitlines()
+    if lines:
+        try:
+            footer = json.loads(lines[-1]).get("_footer")
+        except ValueError:
+            footer = None
+    return {"header": header, "footer": footer, "complete": footer is not None}
@@ -0,0 +1,229 @@
+"""
+Crawl distribuido mediante una cola de trabajo en base de datos (crawl_tasks).
+
+- El coordinador crea un crawl y encola la página 1 de cada categoría.
+- Los workers (N procesos, en uno o varios nodos que compartan la base de datos)
+  reclaman tareas con un lease, descargan y parsean la página y envían los
+  productos al sink de ingestión compartido (ingestion_crud.upsert_batch,
+  idempotente). Cada página con productos encola la siguiente, así que la
+  paginación no necesita descargas de comprobación.
+- Si un worker falla o muere, la tarea vuelve a la cola al caducar su lease
+  (o al momento, si el error se captura) hasta QUEUE_MAX_ATTEMPTS intentos.
+
+    python -m orchestration.work_queue enqueue [--category X] [--wait]
+    python -m orchestration.work_queue worker [--threads 4] [--exit-when-idle]
+    python -m orchestration.work_queue status [crawl_id]
+    python -m orchestration.work_queue requeue <crawl_id>
+"""
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+import requests
+from bs4 import BeautifulSoup
+from sqlalchemy.exc import IntegrityError
+
+from database.crud_operations import crawl_task_crud, ingestion_crud
+from database.db_session import db_manager
+from monitoring import metrics
+from orchestration.alerts import evaluate_alerts
+from orchestration.utils.pydantic_conversion import product_to_article_dict
+from scrap.config import config
+from scrap.engine import page_parser
+from scrap.engine.extractor import ProductsExtractor
+from scrap.web_navigation.web_tree import (MAX_CATEGORY_PAGES, category_page_url, get_categories_tree,
+                                           is_page_not_found)
+
+logger = logging.getLogger(__name__)
+
+# Segundos que un worker tiene una tarea antes de que otro pueda reclamarla
+QUEUE_LEASE_SECONDS = float(os.getenv("RTR_QUEUE_LEASE_SECONDS", "120"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("RTR_QUEUE_MAX_ATTEMPTS", "3"))
+# Espera entre consultas a la cola cuando está vacía
+POLL_SECONDS = 2.0
+# Reintentos inmediatos del sink cuando dos workers insertan a la vez el mismo artículo nuevo
+SINK_CONFLICT_RETRIES = 3
+
+
+class CrawlCoordinator:
+    """Crea crawls en la cola y sigue su progreso"""
+
+    def start(self, category: Optional[str] = None) -> Optional[str]:
+        """Encola la primera página de cada categoría. Devuelve el crawl_id (None si no hay categorías o no existe `category`)."""
+        categories = list(get_categories_tree() or [])
+        if category:
+            categories = [(name, url) for name, url in categories if name == category]
+            if not categories:
+                logger.warning(f"Unknown category: {category}")
+                return None
+        if not categories:
+            logger.warning("No categories found.")
+            return None
+        crawl_id = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        crawl_task_crud.enqueue(crawl_id, [
+            {"category": name, "category_url": url, "page": 1} for name, url in categories
+        ])
+        logger.info(f"Crawl {crawl_id} enqueued: {len(categories)} categories")
+        return crawl_id
+
+    def wait(self, crawl_id: str, poll_seconds: float = POLL_SECONDS,
+             max_attempts: int = QUEUE_MAX_ATTEMPTS) -> Dict[str, Any]:
+        """
+        Espera a que no queden tareas pendientes ni en curso y evalúa las alertas
+        de precio. Devuelve los contadores finales.
+        """
+        while True:
+            crawl_task_crud.expire_leases(max_attempts)
+            status = crawl_task_crud.crawl_status(crawl_id)
+            if not status["pending"] and not status["leased"]:
+                logger.info(f"Crawl {crawl_id} finished: {status}")
+                try:
+                    evaluate_alerts()
+                except Exception as e:
+                    logger.error(f"Alert evaluation failed: {e}")
+                return status
+            logger.info(f"Crawl {crawl_id}: {status}")
+            time.sleep(poll_seconds)
+
+
+class CrawlWorker:
+    """
+    Procesa tareas de la cola hasta stop(). Cada hilo de run() usa su propia
+    sesión HTTP; sink recibe las filas (campos de ArticleCreate) de cada página.
+    """
+
+    def __init__(self, owner: Optional[str] = None, sink: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+                 lease_seconds: float = QUEUE_LEASE_SECONDS, max_attempts: int = QUEUE_MAX_ATTEMPTS,
+                 product_extractor: Optional[ProductsExtractor] = None):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.sink = sink or ingestion_crud.upsert_batch
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.extractor = product_extractor or ProductsExtractor()
+        self._stop = threading.Event()
+        page_parser.add_fetch_listener(metrics.observe_fetch)
+
+    def process(self, task: Dict[str, Any], session: Optional[requests.Session] = None, owner: Optional[str] = None) -> str:
+        """Descarga, parsea e ingiere una página. Devuelve el estado final de la tarea."""
+        owner = owner or self.owner
+        url = category_page_url(task["category_url"], task["page"])
+        try:
+            html = page_parser.fetch_html(url, session=session)
+            if is_page_not_found(html):  # fin de la paginación
+                crawl_task_crud.complete(task["id"], owner, 0)
+                return "done"
+            if task["page"] < MAX_CATEGORY_PAGES:
+                crawl_task_crud.enqueue(task["crawl_id"], [{
+                    "category": task["category"], "category_url": task["category_url"], "page": task["page"] + 1,
+                }])
+            products = self.extractor.parse_products(BeautifulSoup(html, config.html_parser), task["category"])
+            rows = []
+            for product in products:
+                try:
+                    rows.append(product_to_article_dict(product))
+                except Exception as e:
+                    logger.warning(f"Invalid data structure skipped: {product} ({e})")
+            metrics.scraper_products_parsed_total.inc(len(products))
+            self._ingest(rows)
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            status = crawl_task_crud.fail(task["id"], owner, error, self.max_attempts)
+            logger.error(f"Task {task['id']} ({url}) failed, attempt {task['attempts']}: {error} -> {status}")
+            metrics.queue_tasks_total.inc(result="failed" if status == "failed" else "retried")
+            return status
+        if not crawl_task_crud.complete(task["id"], owner, len(rows)):
+            # El lease caducó y otro worker la ha reclamado; la ingesta es idempotente
+            logger.warning(f"Task {task['id']} lease lost before completion ({url})")
+        metrics.queue_tasks_total.inc(result="done")
+        return "done"
+
+    def _ingest(self, rows: List[Dict[str, Any]]):
+        """
+        Envía las filas al sink. Un artículo puede aparecer en páginas que se procesan
+        a la vez: si otro worker lo ha insertado antes, el lote se repite (ya existe).
+        """
+        for attempt in range(1, SINK_CONFLICT_RETRIES + 1):
+            try:
+                return self.sink(rows)
+            except IntegrityError:
+                if attempt == SINK_CONFLICT_RETRIES:
+                    raise
+                logger.info(f"Concurrent insert conflict, retrying batch ({attempt}/{SINK_CONFLICT_RETRIES})")
+
+    def _loop(self, owner: str, exit_when_idle: bool):
+        with requests.Session() as session:
+            while not self._stop.is_set():
+                task = crawl_task_crud.claim(owner, self.lease_seconds, self.max_attempts)
+                if task is None:
+                    if exit_when_idle and not crawl_task_crud.open_tasks():
+                        return
+                    self._stop.wait(POLL_SECONDS)
+                    continue
+                self.process(task, session, owner)
+
+    def run(self, threads: int = 1, exit_when_idle: bool = False):
+        """
+        Procesa la cola con `threads` hilos. exit_when_idle: terminar cuando no
+        quedan tareas pendientes ni en curso en ningún crawl.
+        """
+        logger.info(f"Worker {self.owner} started ({threads} threads)")
+        workers = [
+            threading.Thread(target=self._loop, args=(f"{self.owner}:{i}", exit_when_idle),
+                             name=f"queue-worker-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in workers:
+            thread.start()
+        try:
+            for thread in workers:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        finally:
+            self.stop()
+            logger.info(f"Worker {self.owner} stopped")
+
+    def stop(self):
+        """Los hilos terminan tras la tarea en curso"""
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl distribuido con cola de trabajo en base de datos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="Crear un crawl y encolar sus categorías")
+    enqueue.add_argument("--category", help="Limitar a una categoría")
+    enqueue.add_argument("--wait", action="store_true", help="Esperar a que los workers terminen")
+    worker = commands.add_parser("worker", help="Procesar tareas de la cola")
+    worker.add_argument("--threads", type=int, default=1)
+    worker.add_argument("--exit-when-idle", action="store_true", help="Salir cuando no queden tareas")
+    status = commands.add_parser("status", help="Tareas por estado de un crawl")
+    status.add_argument("crawl_id", nargs="?", help="Por defecto el último")
+    requeue = commands.add_parser("requeue", help="Volver a encolar las tareas fallidas de un crawl")
+    requeue.add_argument("crawl_id")
+    args = parser.parse_args()
+
+    db_manager.create_tables()  # crawl_tasks
+    if args.command == "enqueue":
+        coordinator = CrawlCoordinator()
+        crawl_id = coordinator.start(args.category)
+        if crawl_id is None:
+            parser.exit(1, "No crawl enqueued: category not found or no categories\n")
+        print(crawl_id)
+        if args.wait:
+            print(coordinator.wait(crawl_id))
+    elif args.command == "worker":
+        try:
+            CrawlWorker().run(threads=args.threads, exit_when_idle=args.exit_when_idle)
+        except KeyboardInterrupt:
+            logger.info("Interrupted")
+    elif args.command == "status":
+        crawl_id = args.crawl_id or crawl_task_crud.latest_crawl_id()
+        print(crawl_id, crawl_task_crud.crawl_status(crawl_id) if crawl_id else "-")
+    elif args.command == "requeue":
+        print(f"Requeued {crawl_task_crud.requeue_failed(args.crawl_id)} tasks")
@@ -7,6 +7,7 @@ from database.crud_operations import article_crud, analytics_crud
 from database.db_session import db_manager
 from database.db_models import Article
 from sqlalchemy import select
+from routers.fast_json import FastJSONResponse, fast_json_enabled
 
 
 
@@ -44,6 +45,8 @@ def get_category_stats(category: str):
 @router.get("/test/price-drop")
 def test_price_drop():
     results = analytics_crud.get_products_with_price_drop()
+    if fast_json_enabled():
+        return FastJSONResponse(results)
     return results
 
 '''
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query
 import schemas.articles
+import schemas.hist_prices
 from typing import List
+from collections import Counter
 from datetime import date
 from decimal import Decimal
-from database.crud_operations import article_crud
+from pydantic import ValidationError
+import os
+from database.crud_operations import article_crud, price_record_crud, ingestion_crud, chunked
+from database.price_history import downsample, HISTORY_MAX_POINTS
 from database.db_session import db_manager
 from database.db_models import Article
 from sqlalchemy import select
+from routers.fast_json import FastJSONResponse, fast_json_enabled
 
 
 router = APIRouter(
@@ -15,6 +21,28 @@ router = APIRouter(
 )
 
 
+# Modos de muestreo que devuelven registros reales (compatibles con PriceRecordResponse)
+RECORD_MODES_PATTERN = "^(raw|changes|lttb)$"
+MAX_POINTS_LIMIT = 5000
+# Items por transacción en POST /articles/bulk
+BULK_BATCH_SIZE = int(os.getenv("RTR_BULK_BATCH_SIZE", "1000"))
+
+
+def bounded_full_data(article: Article, mode: str, max_points: int) -> schemas.articles.ArticleFullData:
+    """Valida el artículo y acota su historial según el modo de muestreo"""
+    data = schemas.articles.ArticleFullData.model_validate(article)
+    points = downsample([(r.record_date, r.price, r) for r in data.price_records], mode, max_points)
+    data.price_records = [point[2] for point in points]
+    return data
+
+
+def bounded_full_data_row(row: dict, mode: str, max_points: int) -> dict:
+    """bounded_full_data para las filas de article_crud.search_with_history_rows (camino RTR_FAST_JSON)"""
+    points = downsample([(r["record_date"], r["price"], r) for r in row["price_records"]], mode, max_points)
+    row["price_records"] = [point[2] for point in points]
+    return row
+
+
 #### SEARCH ENDPOINTS
 @router.get('/search', response_model=List[schemas.articles.ArticleResponse])
 def search_article(
@@ -63,7 +91,9 @@ def search_article_history(
     max_price: Decimal = Query(None, gt=0, description="Max price"),
     min_date: date = Query(None, description="From date"),
     max_date: date = Query(None, description="To date"),
-    limit: int = Query(20, ge=1, le=100, description="Max results (1-100)")
+    limit: int = Query(20, ge=1, le=100, description="Max results (1-100)"),
+    mode: str = Query("raw", pattern=RECORD_MODES_PATTERN, description="History sampling: raw | changes | lttb"),
+    max_points: int = Query(HISTORY_MAX_POINTS, ge=1, le=MAX_POINTS_LIMIT, description="Max history points per article")
     ):
 
     try:
@@ -98,9 +128,13 @@ def search_article_history(
                 raise HTTPException(400, "min_date cannot be greater than max_date")
 
         # 4. Llamar al CRUD 
+        if fast_json_enabled():
+            rows = article_crud.search_with_history_rows(filters, limit=limit)
+            return FastJSONResponse([bounded_full_data_row(row, mode, max_points) for row in rows])
+
         results = article_crud.search_with_history(filters, limit=limit)
 
-        return results
+        return [bounded_full_data(article, mode, max_points) for article in results]
         
     except HTTPException:
         raise
@@ -116,6 +150,8 @@ def search_article_history(
 def get_all_articles():
     """Obtener todos los artículos"""
     try:
+        if fast_json_enabled():
+            return FastJSONResponse(article_crud.get_all_rows())
         articles = article_crud.get_all()
         return articles
     except Exception as e:
@@ -126,14 +162,10 @@ def create_article(article: schemas.articles.ArticleCreate):
     
     # 1.-Convertimosa dicciónario
     product_data = dict(article)
-    print(product_data)
-    print(type(product_data))
-    
 
     # 2.-Comprobamos que no exista ya el artículo:
     
     if article_crud.exists_by_rtr_id(article.rtr_id):
-        print('Artículo ya declarado en la DB')
         raise HTTPException(409, "Already exists")
     
     # 3.-Insertamos el artículo en la db
@@ -148,6 +180,90 @@ def create_article(article: schemas.articles.ArticleCreate):
     
     return schemas.articles.ArticleResponse.model_validate(product_data_rtned)
 
+@router.post("/bulk", response_model=schemas.articles.ArticleBulkResponse)
+def create_articles_bulk(bulk: schemas.articles.ArticleBulkRequest):
+    """
+    Alta/actualización idempotente de muchos artículos con su precio: cada item
+    se valida como ArticleCreate y los válidos se escriben con
+    ingestion_crud.upsert_batch en transacciones de BULK_BATCH_SIZE. Reenviar
+    el mismo lote devuelve 'unchanged'. Estado por item, en el orden pedido.
+
+    Un (rtr_id, record_date) repetido en la petición es 'invalid' (se escribe
+    solo el primero): dos precios del mismo día dejarían el historial y el
+    último precio en desacuerdo.
+    """
+    results = [None] * len(bulk.items)
+    valid = []
+    first_seen = {}  # (rtr_id, record_date) -> índice del primer item
+    for index, raw in enumerate(bulk.items):
+        try:
+            item = schemas.articles.ArticleCreate.model_validate(raw)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            rtr_id = raw.get("rtr_id")
+            results[index] = {"index": index, "rtr_id": rtr_id if isinstance(rtr_id, int) else None,
+                              "status": "invalid", "error": errors}
+            continue
+        key = (item.rtr_id, item.record_date)
+        if key in first_seen:
+            results[index] = {"index": index, "rtr_id": item.rtr_id, "status": "invalid",
+                              "error": f"duplicate rtr_id and record_date (item {first_seen[key]})"}
+            continue
+        first_seen[key] = index
+        valid.append((index, item.model_dump()))
+
+    for batch in chunked(valid, BULK_BATCH_SIZE):
+        try:
+            result = ingestion_crud.upsert_batch([item for _, item in batch])
+        except Exception as e:
+            # Los lotes anteriores ya están confirmados; este no se escribe
+            for index, item in batch:
+                results[index] = {"index": index, "rtr_id": item["rtr_id"], "status": "error", "error": str(e)}
+            continue
+        for (index, item), (status, price) in zip(batch, result["items"]):
+            results[index] = {"index": index, "rtr_id": item["rtr_id"], "status": status, "price": price}
+
+    return {"items": results, "counts": dict(Counter(item["status"] for item in results))}
+
+@router.post("/batch", response_model=schemas.articles.ArticleBatchResponse)
+def get_articles_batch(batch: schemas.articles.ArticleBatchRequest):
+    """Artículos (con último precio) por lista de rtr_ids y/o EANs, en el orden pedido"""
+    try:
+        articles = article_crud.get_many(batch.rtr_ids, batch.eans)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving articles: {str(e)}")
+
+    by_rtr_id = {article.rtr_id: article for article in articles}
+    by_ean = {}
+    for article in sorted(articles, key=lambda a: a.id):
+        if article.ean is not None:
+            by_ean.setdefault(article.ean, []).append(article)
+
+    # Primero los rtr_ids y luego los EANs, cada artículo una sola vez
+    ordered, seen = [], set()
+    missing_rtr_ids, missing_eans = [], []
+    for rtr_id in batch.rtr_ids:
+        article = by_rtr_id.get(rtr_id)
+        if article is None:
+            missing_rtr_ids.append(rtr_id)
+        elif article.id not in seen:
+            seen.add(article.id)
+            ordered.append(article)
+    for ean in batch.eans:
+        matches = by_ean.get(ean)
+        if not matches:
+            missing_eans.append(ean)
+        for article in matches or []:
+            if article.id not in seen:
+                seen.add(article.id)
+                ordered.append(article)
+
+    return schemas.articles.ArticleBatchResponse(
+        articles=[schemas.articles.ArticleWithLastPrice.model_validate(article) for article in ordered],
+        missing_rtr_ids=missing_rtr_ids,
+        missing_eans=missing_eans,
+    )
+
 @router.put("/{rtr_id}", response_model=schemas.articles.ArticleResponse)
 def update_article(rtr_id: int, update_data: schemas.articles.ArticleUpdate):
     try:
@@ -166,23 +282,42 @@ def update_article(rtr_id: int, update_data: schemas.articles.ArticleUpdate):
         raise HTTPException(status_code=500, detail=f"Error updating article: {str(e)}")
 
 @router.get("/all_data/{article_id}", response_model=schemas.articles.ArticleFullData)
-def article_by_id_all_data(article_id: int):
-    """Obtener artículo con historial completo por ID"""
-    with db_manager.get_session() as session:
-        try:
-            article = session.scalar(
-                select(Article).filter(Article.id == article_id)
-            )
-            
-            if article is None:
-                raise HTTPException(status_code=404, detail="Article not found")
-            
-            return schemas.articles.ArticleFullData.model_validate(article)
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error retrieving article data: {str(e)}")
+def article_by_id_all_data(
+    article_id: int,
+    min_date: date = Query(None, description="From date"),
+    max_date: date = Query(None, description="To date"),
+    mode: str = Query("raw", pattern=RECORD_MODES_PATTERN, description="History sampling: raw | changes | lttb"),
+    max_points: int = Query(HISTORY_MAX_POINTS, ge=1, le=MAX_POINTS_LIMIT, description="Max history points")
+    ):
+    """Obtener artículo con historial (acotado) por ID"""
+    try:
+        article = article_crud.get_full_data_by_id(article_id, min_date, max_date)
+        
+        if article is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        
+        return bounded_full_data(article, mode, max_points)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving article data: {str(e)}")
+
+@router.get("/history/{rtr_id}", response_model=List[schemas.hist_prices.PriceHistoryPoint], response_model_exclude_none=True)
+def article_price_history(
+    rtr_id: int,
+    min_date: date = Query(None, description="From date"),
+    max_date: date = Query(None, description="To date"),
+    mode: str = Query("changes", pattern="^(raw|changes|weekly|monthly|lttb)$", description="raw | changes | weekly | monthly | lttb"),
+    max_points: int = Query(HISTORY_MAX_POINTS, ge=1, le=MAX_POINTS_LIMIT, description="Max history points")
+    ):
+    """Historial de precios muestreado en servidor (para gráficas)"""
+    if min_date and max_date and min_date > max_date:
+        raise HTTPException(400, "min_date cannot be greater than max_date")
+    try:
+        return price_record_crud.get_price_history(rtr_id, min_date, max_date, mode, max_points)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving price history: {str(e)}")
 
 @router.get("/{article_id}", response_model=schemas.articles.ArticleResponse)
 def article_by_id(article_id: int):
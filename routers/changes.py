@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import asyncio
+import os
+from database.crud_operations import change_log_crud
+from monitoring import metrics
+from routers.fast_json import dumps
+from schemas.changes import ChangeFeedResponse
+
+
+router = APIRouter(
+    prefix="/changes",      # prefijo común para estas rutas
+    tags=["Changes"]        # agrupación en la documentación
+)
+
+CHANGES_MAX_LIMIT = 10000
+# Cada cuánto consulta el stream si hay eventos nuevos, y cada cuánto envía un comentario para mantener la conexión
+CHANGES_POLL_SECONDS = float(os.getenv("RTR_CHANGES_POLL_SECONDS", "1"))
+CHANGES_HEARTBEAT_SECONDS = float(os.getenv("RTR_CHANGES_HEARTBEAT_SECONDS", "15"))
+CHANGES_STREAM_BATCH = 1000
+
+
+@router.get("/", response_model=ChangeFeedResponse)
+def get_changes(
+    since: int = Query(0, ge=0, description="Último seq recibido (0 = desde el principio)"),
+    limit: int = Query(1000, gt=0, le=CHANGES_MAX_LIMIT, description="Máximo de eventos"),
+    ):
+    """
+    Cambios de precio con seq > since, en orden. Para seguir el feed se pide
+    de nuevo con since=next_since (has_more indica que ya hay otra página).
+    Los seq se asignan en orden de commit (log_price_changes), así que no
+    aparece después un seq menor que uno ya servido.
+    """
+    try:
+        changes = change_log_crud.since(since, limit + 1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading change log: {str(e)}")
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return {"changes": changes, "next_since": changes[-1]["seq"] if changes else since, "has_more": has_more}
+
+
+async def _event_stream(request: Request, since: int) -> AsyncIterator[bytes]:
+    """Eventos SSE (id = seq) según se escriben; consulta el registro cada CHANGES_POLL_SECONDS"""
+    metrics.change_stream_clients.inc()
+    try:
+        idle = 0.0
+        while not await request.is_disconnected():
+            changes = await run_in_threadpool(change_log_crud.since, since, CHANGES_STREAM_BATCH)
+            for change in changes:
+                yield b"id: %d\nevent: price_change\ndata: %s\n\n" % (change["seq"], dumps(change))
+            if changes:
+                since, idle = changes[-1]["seq"], 0.0
+                if len(changes) == CHANGES_STREAM_BATCH:
+                    continue  # hay más pendientes: sin esperar
+            else:
+                await asyncio.sleep(CHANGES_POLL_SECONDS)
+                idle += CHANGES_POLL_SECONDS
+                if idle >= CHANGES_HEARTBEAT_SECONDS:
+                    yield b": keepalive\n\n"
+                    idle = 0.0
+    finally:
+        metrics.change_stream_clients.dec()
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Último seq recibido (por defecto, solo cambios nuevos)"),
+    last_event_id: Optional[str] = Header(None, description="Reconexión del EventSource: continúa tras este seq"),
+    ):
+    """
+    Server-Sent Events con cada cambio de precio (event: price_change, id: seq).
+    Al reconectar, el navegador envía Last-Event-ID y el stream continúa sin
+    perder ni repetir eventos.
+    """
+    if last_event_id is not None and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = await run_in_threadpool(change_log_crud.last_seq)
+    return StreamingResponse(
+        _event_stream(request, since), media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
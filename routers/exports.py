@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from datetime import date
+from pathlib import Path
+import os
+import tempfile
+from database.exports import EXPORT_SUFFIXES, EXPORT_TABLES, iter_csv, write_columnar
+
+
+router = APIRouter(
+    prefix="/exports",      # prefijo común para estas rutas
+    tags=["Exports"]        # agrupación en la documentación
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+@router.get("/{table}")
+def export_table(
+    table: str,
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$", description="csv (streamed) | parquet | arrow"),
+    category: str = Query(None, description="Category (exact match)"),
+    min_date: date = Query(None, description="From date (price_records, last_price)"),
+    max_date: date = Query(None, description="To date (price_records, last_price)"),
+    ):
+    """
+    Exportación completa de articles, price_records o last_price. El CSV se
+    envía según se lee de la base de datos; Parquet/Arrow se escriben por lotes
+    en un archivo temporal que se borra tras enviarlo.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table '{table}'")
+    if min_date and max_date and min_date > max_date:
+        raise HTTPException(400, "min_date cannot be greater than max_date")
+    filters = {"category": category, "min_date": min_date, "max_date": max_date}
+    filename = f"{table}{EXPORT_SUFFIXES[format]}"
+
+    try:
+        if format == "csv":
+            return StreamingResponse(
+                iter_csv(table, **filters), media_type=MEDIA_TYPES["csv"],
+                headers={"content-disposition": f'attachment; filename="{filename}"'},
+            )
+        fd, path = tempfile.mkstemp(suffix=EXPORT_SUFFIXES[format])
+        os.close(fd)
+        try:
+            write_columnar(table, Path(path), format, **filters)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return FileResponse(path, media_type=MEDIA_TYPES[format], filename=filename,
+                            background=BackgroundTask(os.unlink, path))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:  # falta pyarrow
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting {table}: {str(e)}")
@@ -0,0 +1,38 @@
+"""
+Serialización rápida (orjson) para respuestas grandes.
+
+Con RTR_FAST_JSON=1 los endpoints de listados grandes (/articles/,
+/articles/search/history, /analytics/test/price-drop) devuelven filas ya con la
+forma del schema, serializadas con orjson, sin crear objetos ORM ni validar con
+Pydantic. El JSON es el mismo que el del camino por defecto (Decimal como
+string, fechas ISO); se comprueba con benchmarks.serialization_bench.
+"""
+from decimal import Decimal
+from typing import Any
+import os
+
+import orjson
+from fastapi.responses import Response
+
+
+def fast_json_enabled() -> bool:
+    """Se lee en cada petición (el benchmark compara ambos caminos en el mismo proceso)"""
+    return os.getenv("RTR_FAST_JSON", "0") == "1"
+
+
+def _default(value: Any) -> Any:
+    # Igual que Pydantic en modo JSON: Decimal -> str (conserva la escala, "12.50")
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
 from database.crud_operations import article_crud, user_crud
 from schemas.users import UserResponse, UserCreate, UserLogin
 from auth import hashing_pw, jwt_gen
+from auth.throttle import login_throttle
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 
 
 
@@ -14,10 +16,21 @@ router = APIRouter(
 )
 
 
+# async: bcrypt va al pool acotado de hashing_pw y la BD al threadpool, así una
+# ráfaga de logins no ocupa los hilos que atienden al resto de endpoints
 @router.post('/')
-def login_user(log_form: OAuth2PasswordRequestForm = Depends()):
+async def login_user(request: Request, log_form: OAuth2PasswordRequestForm = Depends()):
     try:
-        user_db = user_crud.get_user_by_usr_name(log_form.username)  # Usar username, no email
+        # 0.-Limitamos los intentos por usuario e IP (antes de la BD y de bcrypt)
+        retry_after = login_throttle.attempt(log_form.username, request.client.host if request.client else None)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail='Demasiados intentos de login, inténtalo más tarde',
+                headers={"Retry-After": str(retry_after)}
+                )
+
+        user_db = await run_in_threadpool(user_crud.get_user_by_usr_name, log_form.username)  # Usar username, no email
         
         # 1.-Comprobamos que el user_name esté en la DB
         if not user_db:
@@ -27,12 +40,15 @@ def login_user(log_form: OAuth2PasswordRequestForm = Depends()):
                 )
         
         # 2.-Comprobamos que la contraseña es correcta
-        password_validation = hashing_pw.verify_password(log_form.password, user_db.hashed_password)
+        password_validation, new_hash = await hashing_pw.verify_and_update_async(log_form.password, user_db.hashed_password)
         if not password_validation:
             raise HTTPException(
                 status_code=401, 
                 detail='Usuario o contraseña incorrectos'
                 )
+        if new_hash:  # el hash guardado usa otro coste: se actualiza
+            await run_in_threadpool(user_crud.update_password_hash, user_db.id, new_hash)
+        login_throttle.succeeded(log_form.username)
         
         # 3.-Preparamos los datos para pasar al jwt_gen
         log_data = {'sub': user_db.user_name,
@@ -43,7 +59,12 @@ def login_user(log_form: OAuth2PasswordRequestForm = Depends()):
         # 4.-Retornamos el token en formato estándar
         access_token = jwt_gen.create_access_token(log_data)
         return {"access_token": access_token, "token_type": "bearer"}
-     
+
+    except HTTPException:
+        raise
+    except hashing_pw.HashingBusy:
+        raise HTTPException(status_code=503, detail='Servicio saturado, inténtalo de nuevo',
+                            headers={"Retry-After": str(hashing_pw.HASH_RETRY_AFTER_SECONDS)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving articles: {str(e)}")
     
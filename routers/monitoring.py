@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import Response
+from typing import List, Optional
+import schemas.jobs
+from database.crud_operations import job_crud
+from monitoring.metrics import registry, CONTENT_TYPE
+from monitoring.query_stats import scope_totals, slow_queries, SLOW_QUERY_MS
+
+
+router = APIRouter(
+    prefix="/monitoring",      # prefijo común para estas rutas
+    tags=["Monitoring"]        # agrupación en la documentación
+)
+
+# /metrics sin prefijo: es la ruta que espera Prometheus por defecto
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@metrics_router.get("/metrics")
+def get_metrics():
+    """Métricas de la API, la base de datos y el pipeline en formato Prometheus"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/queries")
+def get_query_stats():
+    """Consultas SQL y tiempo en base de datos acumulados por ruta y fase del pipeline"""
+    return {
+        "slow_query_ms": SLOW_QUERY_MS,
+        "scopes": scope_totals(),
+        "slow_queries": list(slow_queries),
+    }
+
+
+@router.get("/jobs", response_model=List[schemas.jobs.JobRunResponse])
+def get_job_runs(limit: int = Query(50, ge=1, le=500), job_name: Optional[str] = None):
+    """Historial de ejecuciones del planificador (las más recientes primero)"""
+    return job_crud.recent_runs(limit, job_name)
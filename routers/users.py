@@ -3,6 +3,7 @@ from typing import List
 from database.crud_operations import article_crud, user_crud
 from schemas.users import UserResponse, UserCreate, UserLogin, UserUpdate
 from auth import hashing_pw, jwt_gen
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(
     prefix="/users",      # prefijo común para estas rutas
@@ -12,13 +13,16 @@ router = APIRouter(
 
 
 @router.post('/', response_model= UserResponse)
-def create_user(user_data: UserCreate):
+async def create_user(user_data: UserCreate):
     """Crear un nuevo usuario"""
     try:
         user_dict = dict(user_data)
-        user_dict['hashed_password'] = hashing_pw.hash_password(user_dict.pop('password'))
-        user = user_crud.insert_user(user_dict)
+        user_dict['hashed_password'] = await hashing_pw.hash_password_async(user_dict.pop('password'))
+        user = await run_in_threadpool(user_crud.insert_user, user_dict)
         return user
+    except hashing_pw.HashingBusy:
+        raise HTTPException(status_code=503, detail='Servicio saturado, inténtalo de nuevo',
+                            headers={"Retry-After": str(hashing_pw.HASH_RETRY_AFTER_SECONDS)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving user: {str(e)}")
 
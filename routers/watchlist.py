@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List
+from sqlalchemy.exc import IntegrityError
+import schemas.watchlist
+from database.crud_operations import alert_crud
+from auth import jwt_gen
+
+
+router = APIRouter(
+    prefix="/watchlist",      # prefijo común para estas rutas
+    tags=["Watchlist"]        # agrupación en la documentación
+)
+
+
+@router.get("/", response_model=List[schemas.watchlist.WatchResponse])
+def get_watchlist(current_user: dict = Depends(jwt_gen.get_current_user)):
+    """Productos vigilados por el usuario actual"""
+    try:
+        return alert_crud.list_watches(current_user['user_id'])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving watchlist: {str(e)}")
+
+@router.post("/", response_model=schemas.watchlist.WatchResponse, status_code=201)
+def add_watch(watch: schemas.watchlist.WatchCreate, current_user: dict = Depends(jwt_gen.get_current_user)):
+    """Vigilar un producto (las alertas se evalúan tras cada ejecución del pipeline)"""
+    try:
+        return alert_crud.add_watch(current_user['user_id'], watch.rtr_id, watch.target_price, watch.drop_pct)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Article not found")
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Already in watchlist")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error adding to watchlist: {str(e)}")
+
+@router.delete("/{rtr_id}", status_code=204)
+def remove_watch(rtr_id: int, current_user: dict = Depends(jwt_gen.get_current_user)):
+    """Dejar de vigilar un producto"""
+    try:
+        removed = alert_crud.remove_watch(current_user['user_id'], rtr_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error removing from watchlist: {str(e)}")
+    if not removed:
+        raise HTTPException(status_code=404, detail="Not in watchlist")
+
+@router.get("/notifications", response_model=List[schemas.watchlist.NotificationResponse])
+def get_notifications(limit: int = Query(50, ge=1, le=500), current_user: dict = Depends(jwt_gen.get_current_user)):
+    """Alertas del usuario actual (las más recientes primero)"""
+    try:
+        return alert_crud.user_notifications(current_user['user_id'], limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving notifications: {str(e)}")
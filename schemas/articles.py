@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Any, Dict, List, Optional
 from datetime import date
 from decimal import Decimal
 from .hist_prices import PriceRecordResponse
@@ -44,3 +44,53 @@ class ArticleFullData(ArticleResponse):
     
     model_config = ConfigDict(from_attributes=True)
 
+
+# Máximo de identificadores (rtr_ids + eans) por petición de /articles/batch
+ARTICLE_BATCH_MAX_ITEMS = 1000
+
+# Schema para consultar muchos artículos a la vez (POST /articles/batch)
+class ArticleBatchRequest(BaseModel):
+    rtr_ids: List[int] = Field(default_factory=list, description="RTR IDs")
+    eans: List[int] = Field(default_factory=list, description="EAN codes")
+
+    @model_validator(mode="after")
+    def check_size(self):
+        total = len(self.rtr_ids) + len(self.eans)
+        if total == 0:
+            raise ValueError("At least one rtr_id or ean is required")
+        if total > ARTICLE_BATCH_MAX_ITEMS:
+            raise ValueError(f"At most {ARTICLE_BATCH_MAX_ITEMS} rtr_ids + eans per request")
+        return self
+
+# Schema para artículo con su último precio (sin historial)
+class ArticleWithLastPrice(ArticleResponse):
+    updated_price: Optional[LastPriceResponse] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Schema para la respuesta de /articles/batch: artículos en el orden pedido y los no encontrados
+class ArticleBatchResponse(BaseModel):
+    articles: List[ArticleWithLastPrice]
+    missing_rtr_ids: List[int] = Field(default_factory=list)
+    missing_eans: List[int] = Field(default_factory=list)
+
+ARTICLE_BULK_MAX_ITEMS = 5000
+
+# Schema para dar de alta/actualizar muchos artículos con su precio (POST /articles/bulk).
+# Cada item se valida como ArticleCreate por separado: uno inválido no rechaza el lote.
+class ArticleBulkRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=ARTICLE_BULK_MAX_ITEMS,
+                                        description="Items con los campos de ArticleCreate")
+
+# Schema para el resultado de cada item de /articles/bulk (mismo orden que la petición)
+class ArticleBulkItemResult(BaseModel):
+    index: int
+    rtr_id: Optional[int] = None
+    status: str                      # inserted | updated | unchanged | invalid | error
+    price: Optional[str] = None      # changed | unchanged | stale
+    error: Optional[str] = None
+
+# Schema para la respuesta de /articles/bulk
+class ArticleBulkResponse(BaseModel):
+    items: List[ArticleBulkItemResult]
+    counts: Dict[str, int]
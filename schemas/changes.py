@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+
+
+# Schema de un evento del registro de cambios de precio
+class PriceChangeEvent(BaseModel):
+    seq: int
+    rtr_id: int
+    old_price: Optional[Decimal] = None  # None = primer precio del artículo
+    new_price: Decimal
+    record_date: date
+
+# Schema para respuesta de GET /changes: siguiente página con ?since=next_since
+class ChangeFeedResponse(BaseModel):
+    changes: List[PriceChangeEvent]
+    next_since: int
+    has_more: bool
@@ -19,4 +19,14 @@ class PriceRecordCreate(BaseModel):
     price: Decimal = Field(..., ge=0, description="Precio del producto")
     record_date: date = Field(default_factory=date.today, description="Fecha del precio")
     
-    # Nota: rtr_id se tomará del artículo al que se asocia el precio
\ No newline at end of file
+    # Nota: rtr_id se tomará del artículo al que se asocia el precio
+
+# Schema para puntos de historial muestreado (raw/changes/lttb u OHLC semanal/mensual)
+class PriceHistoryPoint(BaseModel):
+    record_date: date
+    price: Decimal
+    open: Optional[Decimal] = None
+    high: Optional[Decimal] = None
+    low: Optional[Decimal] = None
+    close: Optional[Decimal] = None
+    samples: Optional[int] = None
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+
+# Schema RESPONSE para el historial de trabajos programados (orchestration.scheduler)
+class JobRunResponse(BaseModel):
+    id: int
+    job_name: str
+    category: Optional[str] = None
+    owner: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    status: str                      # running | success | no_data | error
+    duration_s: Optional[float] = None
+    stats: Optional[dict] = None
+    error: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+
+# Schema para vigilar un producto: precio objetivo y/o bajada porcentual
+class WatchCreate(BaseModel):
+    rtr_id: int = Field(..., gt=0, description="RTR ID del producto")
+    target_price: Optional[Decimal] = Field(None, ge=0, description="Avisar al bajar hasta este precio")
+    drop_pct: Optional[float] = Field(None, gt=0, lt=100, description="Avisar al caer este % desde el máximo reciente")
+
+    @model_validator(mode="after")
+    def check_rule(self):
+        if self.target_price is None and self.drop_pct is None:
+            raise ValueError("target_price or drop_pct is required")
+        return self
+
+# Schema para respuesta de un producto vigilado
+class WatchResponse(BaseModel):
+    id: int
+    rtr_id: int
+    target_price: Optional[Decimal] = None
+    drop_pct: Optional[float] = None
+    last_seen_price: Optional[Decimal] = None
+    created_at: datetime
+    last_notified_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Schema para respuesta de una notificación de alerta
+class NotificationResponse(BaseModel):
+    id: int
+    rtr_id: int
+    rule: str
+    old_price: Optional[Decimal] = None
+    new_price: Decimal
+    record_date: date
+    created_at: datetime
+    status: str
+
+    model_config = ConfigDict(from_attributes=True)
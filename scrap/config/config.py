@@ -1,7 +1,19 @@
+import os
 
 
-main_url = 'https://www.rtrvalladolid.es/87-crawler'
+# La URL base y el parser se pueden sobreescribir por entorno (p.ej. para el
+# benchmark contra el corpus de fixtures local)
+main_url = os.getenv('RTR_MAIN_URL', 'https://www.rtrvalladolid.es/87-crawler')
 
 headers = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
+
+# Backend de BeautifulSoup: "html.parser" | "lxml" | "html5lib" (estos dos son opcionales)
+html_parser = os.getenv('RTR_HTML_PARSER', 'html.parser')
+
+# Categorías scrapeadas en paralelo por ScrapEngine.scrap_all_categories (1 = secuencial)
+max_workers = int(os.getenv('RTR_SCRAP_WORKERS', '1'))
+
+# Validación de cada producto: False = ScrapedRecord (rápido), True = Product (Pydantic completo, depuración)
+strict_validation = os.getenv('RTR_STRICT_VALIDATION', '0') == '1'
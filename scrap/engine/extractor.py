@@ -1,13 +1,28 @@
 from scrap.schemas.schema_product import Product
+from scrap.schemas.scraped_record import ScrapedRecord
+from scrap.config import config
 from bs4 import Tag
-from typing import List
+from typing import Callable, List
 from datetime import datetime
+import time
 from scrap.config.config import main_url
 from scrap.engine.page_parser import soup_generator
 from itertools import zip_longest
 from scrap.web_navigation.web_tree import get_category_pages
 from scrap.utils.remove_duplicates import remove_duplicates_by_id
 
+# Observadores de cada página de categoría procesada (descarga + parseo + validación):
+# fn(url, category, products, elapsed_seconds)
+page_listeners: List[Callable[[str, str, int, float], None]] = []
+
+def add_page_listener(listener: Callable[[str, str, int, float], None]):
+    if listener not in page_listeners:
+        page_listeners.append(listener)
+
+def remove_page_listener(listener: Callable[[str, str, int, float], None]):
+    if listener in page_listeners:
+        page_listeners.remove(listener)
+
 
 class ProductsExtractor:
     # def __init__(self):
@@ -41,13 +56,21 @@ class ProductsExtractor:
     
     def scrap_product_details_in_child(self, url, cat) -> List[Product]:    
         print(f"\nObteniendo información: Categoria:{cat} {url}")
+        start = time.perf_counter()
 
         # Generamos la sopa para la url child
         child_soup = soup_generator(url)
         if not child_soup:
             return []
-            
 
+        products = self.parse_products(child_soup, cat)
+        elapsed = time.perf_counter() - start
+        for listener in page_listeners:
+            listener(url, cat, len(products), elapsed)
+        return products
+
+    def parse_products(self, child_soup, cat) -> List[Product]:
+        """Extrae los productos de la sopa de una página de categoría (sin red)"""
         # EXTRACCIÓN REFACTORIZADA - Más limpia y menos propensa a errores
         prod_urls = self.extract_safe_data(
             child_soup, 
@@ -65,9 +88,10 @@ class ProductsExtractor:
             [lambda a: a.find('img'), lambda img: img.get('data-full-size-image-url') if img else None]
         )
 
-        # CREAR PRODUCTOS CON PYDANTIC
-        # Utilizamos pydantic para que valide, formatee y extraiga la info que falta.
-        # La magia aquí la hace Pydantic 
+        # CREAR PRODUCTOS
+        # ScrapedRecord limpia y valida en una sola pasada (regex precompiladas, sin Pydantic).
+        # Con config.strict_validation se usa Product (Pydantic) para depurar.
+        factory = Product.from_url if config.strict_validation else ScrapedRecord.from_card
         products = []
         fecha = datetime.now().date()
         
@@ -79,7 +103,7 @@ class ProductsExtractor:
                 continue
                 
             try:
-                product = Product.from_url(
+                product = factory(
                     url=href,
                     category=cat,
                     name=name or "Producto sin nombre",
@@ -1,19 +1,43 @@
 import requests
+import time
 from bs4 import BeautifulSoup
+from typing import Callable, List
+from scrap.config import config
 from scrap.config.config import headers, main_url
 
 url = main_url
 
+# Observadores de cada descarga: fn(url, html, elapsed_seconds)
+# (grabación de fixtures, métricas...)
+fetch_listeners: List[Callable[[str, str, float], None]] = []
+
+def add_fetch_listener(listener: Callable[[str, str, float], None]):
+    if listener not in fetch_listeners:
+        fetch_listeners.append(listener)
+
+def remove_fetch_listener(listener: Callable[[str, str, float], None]):
+    if listener in fetch_listeners:
+        fetch_listeners.remove(listener)
+
 ## GENERADORES ##
+#Descarga de una página (con los observadores de fetch_listeners)
+def fetch_html(url, session=None) -> str:
+    """Descarga el HTML de `url`. `session` (requests.Session) reutiliza conexiones."""
+    start = time.perf_counter()
+    res = (session or requests).get(url, headers=headers, timeout=10)
+    res.raise_for_status()
+    content = res.text
+    elapsed = time.perf_counter() - start
+    for listener in fetch_listeners:
+        listener(url, content, elapsed)
+    return content
+
 #Función generador de sopas
 def soup_generator(url):
     try:
-        res = requests.get(url,headers=headers, timeout=10)
-        res.raise_for_status()
-        content = res.text
-        soup = BeautifulSoup(content, "html.parser")
+        content = fetch_html(url)
+        soup = BeautifulSoup(content, config.html_parser)
         return soup
     except requests.RequestException as e: #Falta definir ¿qué pasa si la url no se ha scrapeado
         print(f"Error fetching {url}: {e}")
         raise
-
@@ -1,6 +1,8 @@
 from scrap.schemas.schema_product import Product
 from typing import List
 from scrap.config.config import main_url
+from scrap.config import config
+from concurrent.futures import ThreadPoolExecutor
 from scrap.web_navigation.web_tree import get_categories_tree
 from scrap.utils.remove_duplicates import remove_duplicates_by_id
 import logging
@@ -8,10 +10,11 @@ from scrap.engine.extractor import ProductsExtractor
 
 
 class ScrapEngine:
-    def __init__(self, logger=None, product_extractor=None):
+    def __init__(self, logger=None, product_extractor=None, max_workers=None):
         self.main_url = main_url
         self.logger = logger or self._create_default_logger()
         self.extractor = product_extractor or ProductsExtractor()
+        self.max_workers = max_workers or config.max_workers
         self.stats = {'products_found': 0, 'errors': 0, 'categories_processed': 0}
 
     def _create_default_logger(self):
@@ -29,11 +32,17 @@ class ScrapEngine:
 
         # 2. Iterar sobre cada categoría
         all_data = []
-        for cat, url in result:
-            # 3. Llamar a scrap_category() para cada una
-            cat_data = self.scrap_category(cat,url)
-            # 4. Aplanar resultados con .extend()
-            all_data.extend(cat_data)
+        if self.max_workers > 1:
+            # 3. Categorías en paralelo (el trabajo es sobre todo espera de red)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for cat_data in pool.map(lambda cat_url: self.scrap_category(*cat_url), list(result)):
+                    all_data.extend(cat_data)
+        else:
+            for cat, url in result:
+                # 3. Llamar a scrap_category() para cada una
+                cat_data = self.scrap_category(cat,url)
+                # 4. Aplanar resultados con .extend()
+                all_data.extend(cat_data)
         # 5. Eliminar duplicados UNA VEZ al final
         all_data = remove_duplicates_by_id(all_data)
         # 6. Retornar lista plana
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from datetime import datetime, date
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Dict, Any
+import re
+
+from scrap.schemas.schema_product import Product
+
+# Mismas expresiones que Product, compiladas una sola vez
+URL_INFO_RE = re.compile(r"(-\d+[\w-]+)\.html")
+RTR_ID_RE = re.compile(r"^-(\d+)")
+EAN_RE = re.compile(r"-(\d+)$")
+URL_NAME_WITH_EAN_RE = re.compile(r"-\d+([a-zA-Z0-9-]+)-\d+$")
+URL_NAME_RE = re.compile(r"-\d+([a-zA-Z0-9-]+)")
+
+# Límites de ArticleCreate (schemas.articles)
+MAX_CATEGORY_LENGTH = 100
+MAX_NAME_LENGTH = 255
+MAX_URL_LENGTH = 500
+
+
+@dataclass(slots=True)
+class ScrapedRecord:
+    """
+    Registro scrapeado ligero: mismos campos y mismas reglas de limpieza que
+    Product, pero sin Pydantic. Se valida una sola vez al crearlo (from_card)
+    y pasa directamente a filas de base de datos (as_article_dict).
+
+    Product (validación Pydantic completa) sigue disponible como modo de
+    depuración: config.strict_validation / RTR_STRICT_VALIDATION=1.
+    """
+
+    category: str
+    rtr_id: str
+    name: str
+    price: str
+    ean: Optional[str]
+    url: str
+    image_url: str
+    scraped_date: date
+
+    @classmethod
+    def from_card(cls, url: str, category: str, name: str, price,
+                  image_url: str, scraped_date: date | None) -> "ScrapedRecord":
+        """Equivalente a Product.from_url + las conversiones de ArticleCreate. Lanza ValueError."""
+        url = str(url).strip()
+        match = URL_INFO_RE.search(url)
+        if not match:
+            raise ValueError(f"No se pudo extraer información de la URL: {url}")
+        full_match = match.group(1)
+        rtr_id = RTR_ID_RE.match(full_match).group(1)
+        ean_match = EAN_RE.search(full_match)
+
+        name = str(name).strip()
+        if '...' in name:
+            url_name = cls._name_from_url_match(full_match)
+            if url_name:
+                name = Product._fix_incomplete_name(name, url_name)
+
+        category = str(category).strip()
+        image_url = str(image_url).strip()
+        record = cls(
+            category=category,
+            rtr_id=rtr_id,
+            name=name,
+            price=cls._format_price(price),
+            ean=ean_match.group(1) if ean_match else None,
+            url=url,
+            image_url=image_url,
+            scraped_date=scraped_date or datetime.now().date(),
+        )
+        record._check()
+        return record
+
+    @staticmethod
+    def _format_price(v) -> str:
+        """Misma limpieza que Product.format_price"""
+        price = str(v).replace("€", "").replace(",", ".").strip()
+        # Si tiene más de 6 caracteres, quitar el primer punto (separador de miles)
+        if len(price) > 6:
+            price = price.replace(".", "", 1)
+        return price
+
+    @staticmethod
+    def _name_from_url_match(full_match: str) -> Optional[str]:
+        """Misma lógica que Product._extract_name_from_url sobre el fragmento ya extraído"""
+        item_match = URL_NAME_WITH_EAN_RE.search(full_match) or URL_NAME_RE.search(full_match)
+        if not item_match:
+            return None
+        return item_match.group(1).replace("-", " ").capitalize()
+
+    def _check(self):
+        """Restricciones de ArticleCreate, sin construir el modelo"""
+        try:
+            price = Decimal(self.price)
+        except InvalidOperation:
+            raise ValueError(f"Precio no válido: {self.price!r}")
+        if not price.is_finite() or price < 0:
+            raise ValueError(f"Precio no válido: {self.price!r}")
+        if int(self.rtr_id) <= 0:
+            raise ValueError(f"RTR ID no válido: {self.rtr_id}")
+        if not 0 < len(self.category) <= MAX_CATEGORY_LENGTH:
+            raise ValueError(f"Categoría no válida: {self.category!r}")
+        if not 0 < len(self.name) <= MAX_NAME_LENGTH:
+            raise ValueError(f"Nombre no válido: {self.name!r}")
+        if len(self.url) > MAX_URL_LENGTH or len(self.image_url) > MAX_URL_LENGTH:
+            raise ValueError(f"URL demasiado larga: {self.url}")
+
+    def as_article_dict(self) -> Dict[str, Any]:
+        """Fila lista para la base de datos (mismas claves que ArticleCreate.model_dump())"""
+        return {
+            "rtr_id": int(self.rtr_id),
+            "category": self.category,
+            "name": self.name,
+            "ean": int(self.ean) if self.ean else None,
+            "art_url": self.url,
+            "img_url": self.image_url,
+            "price": Decimal(self.price),
+            "record_date": self.scraped_date,
+        }
+
+    def as_json_dict(self) -> Dict[str, Any]:
+        """Igual que ArticleCreate.model_dump(mode="json") (para los snapshots)"""
+        row = self.as_article_dict()
+        row["price"] = str(row["price"])
+        row["record_date"] = self.scraped_date.isoformat()
+        return row
+
+    def to_tuple(self) -> tuple:
+        """Mismo orden que Product.to_tuple"""
+        return (
+            self.category,
+            self.rtr_id,
+            self.name,
+            self.price,
+            self.ean,
+            self.url,
+            self.image_url,
+            self.scraped_date
+        )
@@ -4,6 +4,11 @@ from scrap.config.config import main_url
 from scrap.engine.page_parser import soup_generator
 from scrap.schemas.schema_cat_url import ScrapCategoriaModel
 from pydantic import ValidationError
+import re
+
+# Páginas máximas por categoría y marca de página vacía (fuera de rango)
+MAX_CATEGORY_PAGES = 9
+PAGE_NOT_FOUND_RE = re.compile(r'class=["\']page-content page-not-found["\']')
 
 ## OBTENIENDO URLS ##
 # Función para obtener las CAT y CAT_URLS
@@ -48,9 +53,16 @@ def get_categories_tree(url=main_url):
         return
 
 # Función que dada la cat_url de la categoria retorna list() de las urls (páginas) que descuelgan de ella para extraer los datos
+def category_page_url(cat_url, page):
+    return f"{cat_url}?page={str(page)}"
+
+def is_page_not_found(html: str) -> bool:
+    """Comprobación sin parsear el HTML (mismo criterio que get_category_pages)"""
+    return PAGE_NOT_FOUND_RE.search(html) is not None
+
 def get_category_pages(cat_url):
-    for i in range(1, 10):
-        test_url = f"{cat_url}?page={str(i)}"
+    for i in range(1, MAX_CATEGORY_PAGES + 1):
+        test_url = category_page_url(cat_url, i)
         soup = soup_generator(test_url)
         if not soup:
             continue
@@ -0,0 +1,25 @@
+"""
+Configuración común de los tests (python -m pytest desde la raíz del repositorio).
+
+Los módulos crean su db_manager global al importarse: se apunta a una base en
+memoria para que importar nunca toque rtr_crawler_Alchemy.db.
+"""
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("RTR_DATABASE_URL", "sqlite://")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_session import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path) -> DatabaseManager:
+    """Base SQLite vacía (con create_tables) para los CRUD del test"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    manager.create_tables()
+    yield manager
+    manager.engine.dispose()
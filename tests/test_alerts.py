@@ -0,0 +1,116 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from database.crud_operations import AlertCRUD, IngestionCRUD, UserCRUD
+
+RTR_ID = 1001
+
+
+class Shop:
+    """Artículo observado día a día a través de la ingesta normal (upsert_batch)"""
+
+    def __init__(self, db):
+        self.ingestion = IngestionCRUD(db)
+        self.day = 0
+
+    def observe(self, price: str, rtr_id: int = RTR_ID):
+        self.day += 1
+        self.ingestion.upsert_batch([{
+            "rtr_id": rtr_id, "category": "Coches", "name": f"Coche {rtr_id}", "ean": rtr_id,
+            "art_url": f"http://shop/{rtr_id}", "img_url": f"http://shop/{rtr_id}.jpg",
+            "price": Decimal(price), "record_date": date(2026, 1, self.day),
+        }])
+
+
+@pytest.fixture
+def shop(db) -> Shop:
+    shop = Shop(db)
+    shop.observe("100")
+    return shop
+
+
+@pytest.fixture
+def alerts(db) -> AlertCRUD:
+    return AlertCRUD(db)
+
+
+@pytest.fixture
+def user_id(db) -> int:
+    return UserCRUD(db).insert_user({"user_name": "ana", "email": "ana@example.com", "hashed_password": "x"}).id
+
+
+def notified(alerts: AlertCRUD, user_id: int):
+    """(regla, precio anterior, precio nuevo) en orden de creación"""
+    return [(n.rule, n.old_price, n.new_price) for n in reversed(alerts.user_notifications(user_id))]
+
+
+def test_only_prices_after_watch_are_evaluated(shop, alerts, user_id):
+    alerts.add_watch(user_id, RTR_ID, target_price=Decimal("150"))
+    assert alerts.evaluate()["changed"] == 0  # 100 <= 150 ya era así al crear la regla
+    assert notified(alerts, user_id) == []
+
+
+def test_target_crossing_and_rearm(shop, alerts, user_id):
+    alerts.add_watch(user_id, RTR_ID, target_price=Decimal("80"))
+
+    shop.observe("90")
+    assert alerts.evaluate()["target"] == 0
+    shop.observe("79")
+    assert alerts.evaluate()["target"] == 1
+    # Sigue por debajo del objetivo: no se repite
+    shop.observe("75")
+    assert alerts.evaluate()["target"] == 0
+    # Vuelve a subir por encima (se rearma) y cruza otra vez
+    shop.observe("85")
+    assert alerts.evaluate()["target"] == 0
+    shop.observe("80")
+    assert alerts.evaluate()["target"] == 1
+
+    assert notified(alerts, user_id) == [
+        ("target", Decimal("90"), Decimal("79")),
+        ("target", Decimal("85"), Decimal("80")),
+    ]
+
+
+def test_drop_is_measured_from_the_reference_maximum(shop, alerts, user_id):
+    alerts.add_watch(user_id, RTR_ID, drop_pct=20)
+
+    # La referencia sube con el precio: la bajada se mide desde el máximo (120)
+    shop.observe("120")
+    shop.observe("110")
+    assert alerts.evaluate()["drop"] == 0
+    shop.observe("97")  # 97 > 120 * 0.8
+    assert alerts.evaluate()["drop"] == 0
+    shop.observe("96")
+    assert alerts.evaluate()["drop"] == 1
+
+    # Tras la alerta la referencia pasa a ser el precio notificado
+    shop.observe("80")
+    assert alerts.evaluate()["drop"] == 0
+    shop.observe("76")
+    assert alerts.evaluate()["drop"] == 1
+
+    assert notified(alerts, user_id) == [
+        ("drop", Decimal("120"), Decimal("96")),
+        ("drop", Decimal("96"), Decimal("76")),
+    ]
+
+
+def test_only_latest_price_of_the_window_counts(shop, alerts, user_id):
+    alerts.add_watch(user_id, RTR_ID, target_price=Decimal("80"))
+    shop.observe("70")
+    shop.observe("90")
+    assert alerts.evaluate() == {"changed": 1, "target": 0, "drop": 0, "skipped": False}
+
+
+def test_other_articles_and_repeated_evaluation(shop, alerts, user_id):
+    shop.observe("100", rtr_id=2002)
+    alerts.add_watch(user_id, RTR_ID, target_price=Decimal("80"))
+    shop.observe("50", rtr_id=2002)
+    assert alerts.evaluate() == {"changed": 1, "target": 0, "drop": 0, "skipped": False}
+    shop.observe("70")
+    assert alerts.evaluate()["target"] == 1
+    assert alerts.evaluate() == {"changed": 0, "target": 0, "drop": 0, "skipped": False}
+    assert [n.status for n in alerts.pending_notifications()] == ["pending"]
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from database.crud_operations import CrawlTaskCRUD
+from database.db_models import CrawlTask
+
+LEASE = 60
+MAX_ATTEMPTS = 2
+
+
+@pytest.fixture
+def tasks(db) -> CrawlTaskCRUD:
+    crud = CrawlTaskCRUD(db)
+    crud.enqueue("crawl-1", [{"category": "Coches", "category_url": "http://shop/coches", "page": 1}])
+    return crud
+
+
+def expire_lease(crud: CrawlTaskCRUD, task_id: int):
+    """Simula un worker que muere: el lease caduca sin complete/fail"""
+    with crud.get_session() as session:
+        session.execute(update(CrawlTask).where(CrawlTask.id == task_id)
+                        .values(lease_expires_at=datetime.now() - timedelta(seconds=1)))
+        session.commit()
+
+
+def task_row(crud: CrawlTaskCRUD, task_id: int) -> CrawlTask:
+    with crud.get_session() as session:
+        return session.get(CrawlTask, task_id)
+
+
+def test_enqueue_ignores_existing_pages(tasks):
+    page = {"category": "Coches", "category_url": "http://shop/coches", "page": 1}
+    assert tasks.enqueue("crawl-1", [page]) == 0
+    assert tasks.enqueue("crawl-1", [{**page, "page": 2}]) == 1
+    assert tasks.crawl_status("crawl-1")["pending"] == 2
+
+
+def test_leased_task_is_not_claimed_twice(tasks):
+    assert tasks.claim("w1", LEASE, MAX_ATTEMPTS)["attempts"] == 1
+    assert tasks.claim("w2", LEASE, MAX_ATTEMPTS) is None
+
+
+def test_claim_after_lease_expiry(tasks):
+    first = tasks.claim("w1", LEASE, MAX_ATTEMPTS)
+    expire_lease(tasks, first["id"])
+
+    second = tasks.claim("w2", LEASE, MAX_ATTEMPTS)
+    assert second["id"] == first["id"]
+    assert second["attempts"] == 2
+    assert task_row(tasks, first["id"]).lease_owner == "w2"
+
+
+def test_complete_after_lease_loss(tasks):
+    task = tasks.claim("w1", LEASE, MAX_ATTEMPTS)
+    expire_lease(tasks, task["id"])
+    tasks.claim("w2", LEASE, MAX_ATTEMPTS)
+
+    # El worker original termina tarde: ni complete ni fail pisan al nuevo dueño
+    assert not tasks.complete(task["id"], "w1", products=10)
+    assert tasks.fail(task["id"], "w1", "late", MAX_ATTEMPTS) == "leased"
+    assert task_row(tasks, task["id"]).lease_owner == "w2"
+
+    assert tasks.complete(task["id"], "w2", products=12)
+    row = task_row(tasks, task["id"])
+    assert (row.status, row.products, row.lease_owner) == ("done", 12, None)
+
+
+def test_expired_lease_without_attempts_left_fails(tasks):
+    task = tasks.claim("w1", LEASE, MAX_ATTEMPTS)
+    expire_lease(tasks, task["id"])
+    tasks.claim("w2", LEASE, MAX_ATTEMPTS)
+    expire_lease(tasks, task["id"])
+
+    assert tasks.claim("w3", LEASE, MAX_ATTEMPTS) is None
+    row = task_row(tasks, task["id"])
+    assert (row.status, row.error, row.attempts) == ("failed", "lease expired", MAX_ATTEMPTS)
+    assert tasks.open_tasks() == 0
+
+
+def test_fail_requeues_until_max_attempts(tasks):
+    task = tasks.claim("w1", LEASE, MAX_ATTEMPTS)
+    assert tasks.fail(task["id"], "w1", "timeout", MAX_ATTEMPTS) == "pending"
+
+    task = tasks.claim("w1", LEASE, MAX_ATTEMPTS)
+    assert task["attempts"] == MAX_ATTEMPTS
+    assert tasks.fail(task["id"], "w1", "timeout", MAX_ATTEMPTS) == "failed"
+    assert tasks.claim("w1", LEASE, MAX_ATTEMPTS) is None
+
+    assert tasks.requeue_failed("crawl-1") == 1
+    assert tasks.claim("w1", LEASE, MAX_ATTEMPTS)["attempts"] == 1
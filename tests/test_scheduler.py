@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from orchestration.scheduler import Schedule
+
+
+def next_after(expression: str, dt: datetime) -> datetime:
+    return Schedule.parse(expression).next_after(dt)
+
+
+@pytest.mark.parametrize("expression, now, expected", [
+    ("*/15 * * * *", datetime(2026, 10, 20, 10, 7), datetime(2026, 10, 20, 10, 15)),
+    ("*/15 * * * *", datetime(2026, 10, 20, 10, 45), datetime(2026, 10, 20, 11, 0)),
+    # "a/n": desde a hasta el máximo del campo
+    ("5/20 * * * *", datetime(2026, 10, 20, 10, 46), datetime(2026, 10, 20, 11, 5)),
+    ("0 0-12/6 * * *", datetime(2026, 10, 20, 6, 0), datetime(2026, 10, 20, 12, 0)),
+    ("0 0-12/6 * * *", datetime(2026, 10, 20, 12, 0), datetime(2026, 10, 21, 0, 0)),
+])
+def test_steps(expression, now, expected):
+    assert next_after(expression, now) == expected
+
+
+def test_step_values():
+    assert Schedule.parse("5/20 * * * *").fields[0] == {5, 25, 45}
+    assert Schedule.parse("0 0-12/6 * * *").fields[1] == {0, 6, 12}
+    assert Schedule.parse("0 0 * * 1-5/2").fields[4] == {1, 3, 5}
+
+
+def test_day_of_month_or_day_of_week():
+    # Con los dos campos restringidos basta con que coincida uno (como cron)
+    schedule = Schedule.parse("0 9 1 * 1")
+    assert schedule.day_or
+    assert schedule.next_after(datetime(2026, 10, 20, 10)) == datetime(2026, 10, 26, 9)  # lunes
+    assert schedule.next_after(datetime(2026, 10, 27, 10)) == datetime(2026, 11, 1, 9)  # día 1 (domingo)
+
+
+def test_single_day_field_restricts_alone():
+    assert not Schedule.parse("0 9 * * 1").day_or
+    assert next_after("0 9 * * 1", datetime(2026, 10, 27, 10)) == datetime(2026, 11, 2, 9)
+    assert next_after("0 9 13 * *", datetime(2026, 10, 27, 10)) == datetime(2026, 11, 13, 9)
+
+
+def test_sunday_as_0_and_7():
+    assert next_after("30 8 * * 7", datetime(2026, 10, 20)) == datetime(2026, 10, 25, 8, 30)
+    assert next_after("30 8 * * 0", datetime(2026, 10, 20)) == datetime(2026, 10, 25, 8, 30)
+
+
+def test_february_29():
+    assert next_after("0 0 29 2 *", datetime(2026, 3, 1)) == datetime(2028, 2, 29)
+    assert next_after("0 0 29 2 *", datetime(2028, 2, 29)) == datetime(2032, 2, 29)
+
+
+def test_day_31_skips_short_months():
+    assert next_after("0 0 31 * *", datetime(2026, 4, 1)) == datetime(2026, 5, 31)
+
+
+def test_strictly_after():
+    assert next_after("0 * * * *", datetime(2026, 10, 20, 10, 0)) == datetime(2026, 10, 20, 11, 0)
+    assert next_after("0 * * * *", datetime(2026, 10, 20, 10, 0, 30)) == datetime(2026, 10, 20, 11, 0)
+
+
+def test_every():
+    schedule = Schedule.parse("@every 45m")
+    assert schedule.next_after(datetime(2026, 10, 20, 10, 7, 3)) == datetime(2026, 10, 20, 10, 52, 3)
+    assert Schedule.parse("@every 1d").interval == timedelta(days=1)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "*/0 * * * *", "5-1 * * * *",
+    "@every 0h", "@every 5w",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        Schedule.parse(expression)
+
+
+def test_never_matching_expression():
+    with pytest.raises(ValueError):
+        next_after("0 0 30 2 *", datetime(2026, 1, 1))
@@ -0,0 +1,285 @@
+"""
+Compresión de respuestas HTTP (gzip y, si está instalado 'brotli', br).
+
+- CompressionMiddleware comprime al vuelo las respuestas de los tipos de
+  COMPRESSION_TYPES a partir de COMPRESSION_MIN_BYTES según Accept-Encoding.
+  Las respuestas de un solo bloque (JSON, páginas y fragmentos HTML) se
+  comprimen enteras y el resultado se guarda en una caché por contenido: un
+  cuerpo idéntico (el catálogo entre dos crawls) no se vuelve a comprimir. Las
+  respuestas en streaming se comprimen por bloques, sin caché.
+- PrecompressedStaticFiles sirve <archivo>.br / <archivo>.gz junto a los de
+  /static si existen y están al día; se generan una vez con:
+
+    python -m web.compression precompress [static] [--force]
+"""
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+import argparse
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import zlib
+
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+from database.cache import TTLCache
+from monitoring import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_ENABLED = os.getenv("RTR_COMPRESSION", "1") == "1"
+# Cuerpos más pequeños se envían sin comprimir (la cabecera gzip no compensa)
+COMPRESSION_MIN_BYTES = int(os.getenv("RTR_COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_TYPES = frozenset(os.getenv(
+    "RTR_COMPRESSION_TYPES",
+    "text/html,text/css,text/plain,text/csv,text/javascript,application/javascript,"
+    "application/json,application/xml,image/svg+xml",
+).split(","))
+# Orden de preferencia cuando el cliente acepta varias con la misma q
+COMPRESSION_ENCODINGS = tuple(
+    encoding for encoding in os.getenv("RTR_COMPRESSION_ENCODINGS", "br,gzip").split(",")
+    if encoding == "gzip" or (encoding == "br" and brotli is not None)
+)
+# Niveles al vuelo (los precomprimidos usan el máximo)
+GZIP_LEVEL = int(os.getenv("RTR_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RTR_BROTLI_QUALITY", "4"))
+# Caché de respuestas ya comprimidas (por hash del cuerpo)
+COMPRESSION_CACHE_SIZE = int(os.getenv("RTR_COMPRESSION_CACHE_SIZE", "64"))
+COMPRESSION_CACHE_TTL = float(os.getenv("RTR_COMPRESSION_CACHE_TTL", "600"))
+COMPRESSION_CACHE_MAX_BODY = 8 * 1024 * 1024
+# A partir de este tamaño se comprime en un hilo para no bloquear el event loop
+OFFLOAD_BYTES = 128 * 1024
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+compressed_cache = TTLCache("compressed_responses", COMPRESSION_CACHE_SIZE, COMPRESSION_CACHE_TTL)
+
+
+def negotiate(accept_encoding: str, available: Sequence[str] = COMPRESSION_ENCODINGS) -> Optional[str]:
+    """Codificación de `available` con mayor q en Accept-Encoding (None = sin comprimir)"""
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else BROTLI_QUALITY)
+    # mtime=0: misma entrada, mismos bytes
+    return gzip.compress(data, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.finish = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.finish = self._compressor.compress, self._compressor.flush
+
+
+def _media_type(headers: Headers) -> str:
+    return headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 content_types: Iterable[str] = COMPRESSION_TYPES,
+                 encodings: Sequence[str] = COMPRESSION_ENCODINGS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_types)
+        self.encodings = tuple(encodings)
+
+    def _compressible(self, status: int, headers: Headers) -> bool:
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        if _media_type(headers) not in self.content_types:
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.minimum_size
+
+    async def _compress_body(self, body: bytes, encoding: str) -> tuple:
+        """(cuerpo comprimido, origen para las métricas: live | cache)"""
+        key = None
+        if len(body) <= COMPRESSION_CACHE_MAX_BODY:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            cached = compressed_cache.get(key)
+            if cached is not None:
+                return cached, "cache"
+        if len(body) >= OFFLOAD_BYTES:
+            compressed = await to_thread.run_sync(compress, body, encoding)
+        else:
+            compressed = compress(body, encoding)
+        if key is not None:
+            compressed_cache.set(key, compressed)
+        return compressed, "live"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "mode": None, "compressor": None}
+
+        def set_encoded_headers(start: dict, content_length: Optional[int]) -> dict:
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers["content-encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            if content_length is None:
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(content_length)
+            # Otra representación del recurso: la ETag deja de ser fuerte
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["etag"] = f"W/{etag}"
+            return {**start, "headers": headers.raw}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                if self._compressible(message["status"], Headers(raw=message["headers"])):
+                    state["start"], state["mode"] = message, "pending"
+                else:
+                    state["mode"] = "passthrough"
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or state["mode"] == "passthrough":
+                await send(message)
+                return
+
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            if state["mode"] == "pending":
+                start = state["start"]
+                if not more_body:
+                    # Respuesta completa en un solo bloque
+                    if len(body) < self.minimum_size:
+                        await send(start)
+                        await send(message)
+                        return
+                    compressed, source = await self._compress_body(body, encoding)
+                    metrics.http_responses_compressed_total.inc(encoding=encoding, source=source)
+                    metrics.http_compression_saved_bytes_total.inc(max(0, len(body) - len(compressed)))
+                    await send(set_encoded_headers(start, len(compressed)))
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                state["mode"], state["compressor"] = "stream", _StreamCompressor(encoding)
+                metrics.http_responses_compressed_total.inc(encoding=encoding, source="stream")
+                await send(set_encoded_headers(start, None))
+
+            compressor = state["compressor"]
+            if len(body) >= OFFLOAD_BYTES:
+                # Bloques grandes (p.ej. lotes de /exports en CSV): fuera del event loop.
+                # Los bloques se comprimen de uno en uno, el compresor nunca se usa a la vez en dos hilos
+                data = await to_thread.run_sync(compressor.compress, body)
+            else:
+                data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles que sirve la variante .br/.gz precomprimida si el cliente la acepta"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        request_headers = Headers(scope=scope)
+        if status_code != 200 or not isinstance(response, FileResponse) or "range" in request_headers:
+            return response
+        available = {}
+        for encoding in COMPRESSION_ENCODINGS:
+            try:
+                variant = os.stat(f"{full_path}{SUFFIXES[encoding]}")
+            except OSError:
+                continue
+            if variant.st_mtime >= stat_result.st_mtime:
+                available[encoding] = variant
+        encoding = negotiate(request_headers.get("accept-encoding", ""), tuple(available))
+        if encoding is None:
+            return response
+        metrics.http_responses_compressed_total.inc(encoding=encoding, source="static")
+        # Misma ETag (débil) que el original: If-None-Match sigue funcionando
+        return FileResponse(
+            f"{full_path}{SUFFIXES[encoding]}", stat_result=available[encoding], media_type=response.media_type,
+            headers={"content-encoding": encoding, "vary": "Accept-Encoding", "etag": f"W/{response.headers['etag']}"},
+        )
+
+
+def precompress_directory(directory: Path, force: bool = False, minimum_size: int = COMPRESSION_MIN_BYTES) -> dict:
+    """Escribe .gz (y .br) junto a cada archivo comprimible de `directory`. Devuelve contadores."""
+    counts = {"written": 0, "up_to_date": 0, "skipped": 0}
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        media_type = mimetypes.guess_type(path.name)[0]
+        stat_result = path.stat()
+        if media_type not in COMPRESSION_TYPES or stat_result.st_size < minimum_size:
+            counts["skipped"] += 1
+            continue
+        data = None
+        for encoding in COMPRESSION_ENCODINGS:
+            target = path.with_name(path.name + SUFFIXES[encoding])
+            if not force and target.exists() and target.stat().st_mtime >= stat_result.st_mtime:
+                counts["up_to_date"] += 1
+                continue
+            data = data if data is not None else path.read_bytes()
+            compressed = compress(data, encoding, best=True)
+            if len(compressed) >= len(data):
+                target.unlink(missing_ok=True)
+                counts["skipped"] += 1
+                continue
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(compressed)
+            os.replace(tmp, target)
+            counts["written"] += 1
+            logger.info(f"{target}: {len(data)} -> {len(compressed)} bytes")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compresión de respuestas y archivos estáticos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    precompress = commands.add_parser("precompress", help="Generar las variantes .gz/.br de los estáticos")
+    precompress.add_argument("directory", type=Path, nargs="?", default=Path("static"))
+    precompress.add_argument("--force", action="store_true", help="Regenerar aunque estén al día")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(precompress_directory(args.directory, args.force))